@@ -11,8 +11,6 @@ from torch.utils.data.sampler import BatchSampler, Sampler
 from torch.utils.model_zoo import tqdm
 import torchvision
 
-from PIL import Image
-
 
 def _repeat_to_at_least(iterable, n):
     repeat_times = math.ceil(n / len(iterable))
@@ -142,11 +140,11 @@ def _compute_aspect_ratios_coco_dataset(dataset, indices=None):
 def _compute_aspect_ratios_voc_dataset(dataset, indices=None):
     if indices is None:
         indices = range(len(dataset))
+    # this only reads the image headers, in parallel
+    infos = torchvision.io.read_image_info([dataset.images[i] for i in indices])
     aspect_ratios = []
-    for i in indices:
-        # this doesn't load the data into memory, because PIL loads it lazily
-        width, height = Image.open(dataset.images[i]).size
-        aspect_ratio = float(width) / float(height)
+    for info in infos:
+        aspect_ratio = float(info.width) / float(info.height)
         aspect_ratios.append(aspect_ratio)
     return aspect_ratios
 
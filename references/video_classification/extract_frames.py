@@ -0,0 +1,61 @@
+import os
+import time
+
+from torchvision.datasets.video_utils import extract_frames
+
+
+def find_videos(root, extensions):
+    video_paths = []
+    for dirpath, _, filenames in sorted(os.walk(root, followlinks=True)):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                video_paths.append(os.path.join(dirpath, filename))
+    return video_paths
+
+
+def main(args):
+    extensions = tuple("." + ext.lower().lstrip(".") for ext in args.extensions)
+    video_paths = find_videos(args.data_path, extensions)
+    print("Extracting the frames of {} videos".format(len(video_paths)))
+    st = time.time()
+    frames_paths = extract_frames(
+        video_paths,
+        args.data_path,
+        args.output_path,
+        frame_rate=args.frame_rate,
+        short_side=args.short_side,
+        packed=args.packed,
+        quality=args.quality,
+        num_workers=args.workers,
+    )
+    print("Extracted the frames of {} videos".format(len(frames_paths)))
+    print("Took", time.time() - st)
+
+
+def parse_args():
+    import argparse
+    parser = argparse.ArgumentParser(description='Extract the frames of video datasets as JPEG images')
+
+    parser.add_argument('--data-path', default='/datasets01_101/kinetics/070618/', help='directory of the videos')
+    parser.add_argument('--output-path', required=True, help='directory in which the frames are stored')
+    parser.add_argument('--extensions', nargs='+', default=['avi', 'mp4'], help='extensions of the videos')
+    parser.add_argument('--frame-rate', default=15, type=float, help='frame rate of the extracted frames')
+    parser.add_argument('--short-side', default=128, type=int, help='size of the smaller edge of the frames')
+    parser.add_argument('--quality', default=90, type=int, help='quality of the JPEG images')
+    parser.add_argument(
+        "--packed",
+        dest="packed",
+        help="Store the frames of each video in a single file instead of a directory",
+        action="store_true",
+    )
+    parser.add_argument('-j', '--workers', default=10, type=int, metavar='N',
+                        help='number of processes extracting the videos (default: 10)')
+
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args)
@@ -131,7 +131,9 @@ def main(args):
             step_between_clips=1,
             transform=transform_train,
             frame_rate=15,
-            extensions=('avi', 'mp4', )
+            extensions=('avi', 'mp4', ),
+            frames_root=os.path.join(args.frames_path, args.train_dir) if args.frames_path else None,
+            decoder_cache_size=args.decoder_cache_size,
         )
         if args.cache_dataset:
             print("Saving dataset_train to {}".format(cache_path))
@@ -159,7 +161,8 @@ def main(args):
             step_between_clips=1,
             transform=transform_test,
             frame_rate=15,
-            extensions=('avi', 'mp4',)
+            extensions=('avi', 'mp4',),
+            frames_root=os.path.join(args.frames_path, args.val_dir) if args.frames_path else None,
         )
         if args.cache_dataset:
             print("Saving dataset_test to {}".format(cache_path))
@@ -167,10 +170,19 @@ def main(args):
             utils.save_on_master((dataset_test, valdir), cache_path)
 
     print("Creating data loaders")
-    train_sampler = RandomClipSampler(dataset.video_clips, args.clips_per_video)
     test_sampler = UniformClipSampler(dataset_test.video_clips, args.clips_per_video)
+    if args.decoder_cache_size > 0:
+        # with open videos cached, sampling the clips of a video together reads them from a single
+        # open video. The videos, rather than the clips, are then split between the processes
+        train_sampler = RandomClipSampler(
+            dataset.video_clips, args.clips_per_video, group_by_video=True,
+            num_replicas=args.world_size if args.distributed else None,
+            rank=args.rank if args.distributed else None)
+    else:
+        train_sampler = RandomClipSampler(dataset.video_clips, args.clips_per_video)
+        if args.distributed:
+            train_sampler = DistributedSampler(train_sampler)
     if args.distributed:
-        train_sampler = DistributedSampler(train_sampler)
         test_sampler = DistributedSampler(test_sampler)
 
     data_loader = torch.utils.data.DataLoader(
@@ -258,12 +270,17 @@ def parse_args():
     parser.add_argument('--data-path', default='/datasets01_101/kinetics/070618/', help='dataset')
     parser.add_argument('--train-dir', default='train_avi-480p', help='name of train dir')
     parser.add_argument('--val-dir', default='val_avi-480p', help='name of val dir')
+    parser.add_argument('--frames-path', default='', help='frames extracted from the dataset with extract_frames.py')
     parser.add_argument('--model', default='r2plus1d_18', help='model')
     parser.add_argument('--device', default='cuda', help='device')
     parser.add_argument('--clip-len', default=16, type=int, metavar='N',
                         help='number of frames per clip')
     parser.add_argument('--clips-per-video', default=5, type=int, metavar='N',
                         help='maximum number of clips per video to consider')
+    parser.add_argument('--decoder-cache-size', default=0, type=int, metavar='N',
+                        help='number of training videos kept open by each data loading worker, '
+                             'the clips of a video are then sampled together, and in distributed mode '
+                             'by the same process (default: 0)')
     parser.add_argument('-b', '--batch-size', default=24, type=int)
     parser.add_argument('--epochs', default=45, type=int, metavar='N',
                         help='number of total epochs to run')
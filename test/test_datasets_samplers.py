@@ -68,6 +68,45 @@ class Tester(unittest.TestCase):
             assert_equal(v_idxs, torch.tensor([0, 1]))
             assert_equal(count, torch.tensor([3, 3]))
 
+    def test_random_clip_sampler_group_by_video(self):
+        with get_list_of_videos(num_videos=3, sizes=[25, 25, 25]) as video_list:
+            video_clips = VideoClips(video_list, 5, 5)
+            sampler = RandomClipSampler(video_clips, 3, group_by_video=True)
+            self.assertEqual(len(sampler), 3 * 3)
+            indices = torch.tensor(list(iter(sampler)))
+            videos = torch.div(indices, 5, rounding_mode='floor')
+            # the clips of each video are sampled one after the other
+            v_idxs, count = torch.unique_consecutive(videos, return_counts=True)
+            assert_equal(v_idxs.sort().values, torch.tensor([0, 1, 2]))
+            assert_equal(count, torch.tensor([3, 3, 3]))
+
+            sampler = RandomClipSampler(video_clips.subset([]), 3, group_by_video=True)
+            self.assertEqual(len(sampler), 0)
+            self.assertEqual(list(iter(sampler)), [])
+
+    def test_random_clip_sampler_group_by_video_distributed(self):
+        with get_list_of_videos(num_videos=5, sizes=[25, 15, 25, 10, 25]) as video_list:
+            video_clips = VideoClips(video_list, 5, 5)
+            offsets = video_clips.num_clips_per_video().cumsum(0)
+            samplers = [RandomClipSampler(video_clips, 3, group_by_video=True, num_replicas=2, rank=rank)
+                        for rank in range(2)]
+            for epoch in range(3):
+                videos = []
+                for sampler in samplers:
+                    sampler.set_epoch(epoch)
+                    indices = torch.tensor(list(iter(sampler)))
+                    self.assertEqual(len(indices), len(sampler))
+                    videos.append(set(torch.bucketize(indices, offsets, right=True).tolist()))
+                self.assertEqual(len(samplers[0]), 7)
+                # every video is sampled, by a single process
+                self.assertEqual(videos[0] & videos[1], set())
+                self.assertEqual(videos[0] | videos[1], set(range(5)))
+
+            with self.assertRaises(ValueError):
+                RandomClipSampler(video_clips, 3, num_replicas=2, rank=0)
+            with self.assertRaises(ValueError):
+                RandomClipSampler(video_clips, 3, group_by_video=True, num_replicas=2, rank=2)
+
     def test_uniform_clip_sampler(self):
         with get_list_of_videos(num_videos=3, sizes=[25, 25, 25]) as video_list:
             video_clips = VideoClips(video_list, 5, 5)
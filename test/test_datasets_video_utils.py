@@ -1,10 +1,13 @@
 import contextlib
 import os
+import pickle
 import torch
 import unittest
+import wave
+from unittest import mock
 
 from torchvision import io
-from torchvision.datasets.video_utils import VideoClips, unfold
+from torchvision.datasets.video_utils import VideoClips, extract_frames, get_frames_path, unfold
 
 from common_utils import get_tmp_dir
 from _assert_utils import assert_equal
@@ -94,6 +97,201 @@ class Tester(unittest.TestCase):
                     assert info["video_fps"] == fps
                     # TODO add tests checking that the content is right
 
+    @unittest.skipIf(not io.video._av_available(), "this test requires av")
+    def test_video_clips_metadata_cache(self):
+        with get_list_of_videos(num_videos=3) as video_list, get_tmp_dir() as cache_dir:
+            expected = VideoClips(video_list, 5, 5).metadata
+
+            video_clips = VideoClips(video_list[:2], 5, 5, metadata_cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+
+            # only the new video gets scanned, and its shard is merged with the other once
+            # the scan is complete
+            video_clips = VideoClips(video_list, 5, 5, metadata_cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+            assert video_clips.metadata["video_fps"] == expected["video_fps"]
+            for pts, expected_pts in zip(video_clips.metadata["video_pts"], expected["video_pts"]):
+                assert_equal(pts, expected_pts)
+
+            # everything is cached
+            video_clips = VideoClips(video_list[::-1], 5, 5, metadata_cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+            assert video_clips.num_clips() == 1 + 2 + 3
+
+            # a modified video is scanned again
+            io.write_video(video_list[0], torch.zeros(20, 300, 400, 3, dtype=torch.uint8), fps=5)
+            video_clips = VideoClips(video_list, 5, 5, metadata_cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+            assert len(video_clips.video_pts[0]) == 20
+
+    def test_video_clips_metadata_cache_failed_scan(self):
+        with get_list_of_videos(num_videos=2) as video_list, get_tmp_dir() as cache_dir:
+            read_video_timestamps = io.read_video_timestamps
+
+            def fail_first_video(path):
+                if path == video_list[0]:
+                    return [], None
+                return read_video_timestamps(path)
+
+            with mock.patch("torchvision.datasets.video_utils.read_video_timestamps", fail_first_video):
+                video_clips = VideoClips(video_list, 5, 5, metadata_cache_dir=cache_dir)
+            assert video_clips.num_clips_per_video().tolist() == [0, 2]
+
+            # the video that failed isn't cached, so it is scanned again
+            video_clips = VideoClips(video_list, 5, 5, metadata_cache_dir=cache_dir)
+            assert video_clips.num_clips_per_video().tolist() == [1, 2]
+
+    @unittest.skipIf(not io.video._av_available(), "this test requires av")
+    def test_video_clips_decoder_cache(self):
+        with get_list_of_videos(num_videos=3) as video_list:
+            video_clips = VideoClips(video_list, 3, 2)
+            cached_clips = VideoClips(video_list, 3, 2, decoder_cache_size=2)
+            for idx in [0, 1, 3, 2, 5, 8, 4, 0]:
+                video, audio, info, video_idx = cached_clips.get_clip(idx)
+                expected = video_clips.get_clip(idx)
+                assert_equal(video, expected[0])
+                assert_equal(audio, expected[1])
+                assert info == expected[2]
+                assert video_idx == expected[3]
+                assert len(cached_clips._video_cache._videos) <= 2
+
+            restored = pickle.loads(pickle.dumps(cached_clips))
+            assert len(restored._video_cache._videos) == 0
+            assert_equal(restored.get_clip(1)[0], video_clips.get_clip(1)[0])
+
+    @unittest.skipIf(not io.video._av_available(), "this test requires av")
+    def test_video_clips_iter_clips(self):
+        with get_list_of_videos(num_videos=3) as video_list:
+            for frame_rate in [None, 15]:
+                video_clips = VideoClips(video_list, 5, 2, frame_rate)
+                clips = list(video_clips.iter_clips())
+                assert len(clips) == video_clips.num_clips()
+                for idx, (video, audio, info, video_idx) in enumerate(clips):
+                    expected = video_clips.get_clip(idx)
+                    assert_equal(video, expected[0])
+                    assert info["video_fps"] == expected[2]["video_fps"]
+                    assert video_idx == expected[3]
+
+            video_clips = VideoClips(video_list, 5, 2)
+            offset = video_clips.num_clips_per_video()[:2].sum().item()
+            for idx, (video, _, _, video_idx) in enumerate(video_clips.iter_clips([2])):
+                assert video_idx == 2
+                assert_equal(video, video_clips.get_clip(offset + idx)[0])
+
+    def test_video_clips_frames(self):
+        with get_list_of_videos(num_videos=3, sizes=[12, 20, 30], fps=[5, 10, 25]) as video_list, \
+                get_tmp_dir() as frames_root:
+            root = os.path.dirname(video_list[0])
+            video_clips = VideoClips(video_list, 5, 3)
+            for packed in [False, True]:
+                output = os.path.join(frames_root, str(packed))
+                frames_paths = extract_frames(video_list, root, output, packed=packed, quality=80, num_workers=2)
+                assert frames_paths == [get_frames_path(path, root, output) for path in video_list]
+                # the frames which were already extracted are kept
+                mtime = os.stat(frames_paths[0]).st_mtime_ns
+                extract_frames(video_list, root, output, packed=packed)
+                assert os.stat(frames_paths[0]).st_mtime_ns == mtime
+
+                frames_clips = VideoClips(frames_paths, 5, 3, decoder_cache_size=2)
+                assert frames_clips.video_fps == [5, 10, 25]
+                assert frames_clips.num_clips() == video_clips.num_clips()
+                for idx in range(video_clips.num_clips()):
+                    video, audio, info, video_idx = frames_clips.get_clip(idx)
+                    expected = video_clips.get_clip(idx)
+                    encoded = io.encode_jpeg(list(expected[0].permute(0, 3, 1, 2)), quality=80)
+                    expected_video = torch.stack(io.decode_jpeg(encoded)).permute(0, 2, 3, 1)
+                    assert_equal(video, expected_video)
+                    assert audio.numel() == 0
+                    assert info == {"video_fps": expected[2]["video_fps"]}
+                    assert video_idx == expected[3]
+
+            frames_paths = extract_frames(video_list, root, frames_root, frame_rate=5, short_side=30, packed=True)
+            frames_clips = VideoClips(frames_paths, 4, 2)
+            assert frames_clips.num_clips() == VideoClips(video_list, 4, 2, frame_rate=5).num_clips()
+            video, _, info, _ = frames_clips.get_clip(0)
+            assert video.shape == (4, 30, 40, 3)
+            assert info["video_fps"] == 5
+
+            # the videos whose frames can't be extracted are left out
+            output = os.path.join(frames_root, "partial")
+            audio_path = os.path.join(root, "audio_only.wav")
+            with wave.open(audio_path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(8000)
+                f.writeframes(bytes(1600))
+            with self.assertWarnsRegex(UserWarning, "has no video stream"):
+                frames_paths = extract_frames([audio_path] + video_list, root, output)
+            assert frames_paths == [get_frames_path(path, root, output) for path in video_list]
+
+    def test_video_clips_index(self):
+        video_pts = [torch.arange(n) * 512 for n in [30, 0, 7, 100, 16]]
+        video_fps = [30, None, 25, 29.97, 5]
+        metadata = {"video_paths": [str(i) for i in range(5)], "video_pts": video_pts, "video_fps": video_fps}
+        for num_frames, step, frame_rate in [(4, 1, None), (5, 3, None), (8, 4, 15), (4, 2, 12), (3, 1, 60)]:
+            video_clips = VideoClips(metadata["video_paths"], num_frames, step, frame_rate,
+                                     _precomputed_metadata=metadata)
+            expected = [
+                VideoClips.compute_clips_for_video(pts, num_frames, step, fps, frame_rate)
+                for pts, fps in zip(video_pts, video_fps)
+            ]
+            num_clips = [len(clips) for clips, _ in expected]
+            assert video_clips.num_clips_per_video().tolist() == num_clips
+            assert video_clips.num_clips() == sum(num_clips)
+
+            idx = 0
+            for video_idx, (clips, idxs) in enumerate(expected):
+                for clip_idx in range(len(clips)):
+                    assert video_clips.get_clip_location(idx) == (video_idx, clip_idx)
+                    frame_idxs, resampling_idx = video_clips._get_clip_frame_idxs(video_idx, clip_idx)
+                    assert_equal(video_pts[video_idx][frame_idxs], clips[clip_idx])
+                    if isinstance(idxs[clip_idx], slice):
+                        assert resampling_idx == idxs[clip_idx]
+                    else:
+                        assert_equal(resampling_idx, idxs[clip_idx] - idxs[clip_idx][0])
+                    idx += 1
+
+        restored = pickle.loads(pickle.dumps(video_clips))
+        assert restored.num_clips() == video_clips.num_clips()
+        for pts, expected_pts in zip(restored.video_pts, video_pts):
+            assert_equal(pts, expected_pts)
+
+        subset = video_clips.subset([3, 0])
+        assert subset.video_pts.data.data_ptr() == video_clips.video_pts.data.data_ptr()
+        assert_equal(subset.video_pts[0], video_pts[3])
+        assert subset.num_clips_per_video().tolist() == video_clips.num_clips_per_video()[[3, 0]].tolist()
+
+    def test_video_clips_legacy_state(self):
+        video_pts = [torch.arange(n) * 512 for n in [30, 0, 7]]
+        # the state pickled by VideoClips before it was versioned
+        state = {
+            "video_paths": ["0", "1", "2"],
+            "num_workers": 0,
+            "_video_width": 0,
+            "_video_height": 0,
+            "_video_min_dimension": 0,
+            "_video_max_dimension": 0,
+            "_audio_samples": 0,
+            "_audio_channels": 0,
+            "video_pts": video_pts,
+            "video_fps": [30, None, 25],
+            "num_frames": 5,
+            "step": 2,
+            "frame_rate": None,
+            "clips": [VideoClips.compute_clips_for_video(pts, 5, 2, None, None)[0] for pts in video_pts],
+            "resampling_idxs": [slice(None)] * 3,
+            "cumulative_sizes": [13, 13, 15],
+        }
+        video_clips = VideoClips.__new__(VideoClips)
+        video_clips.__setstate__(state)
+        assert video_clips.num_clips_per_video().tolist() == [13, 0, 2]
+        assert video_clips.num_clips() == 15
+        assert video_clips.get_clip_location(14) == (2, 1)
+        for pts, expected_pts in zip(video_clips.video_pts, video_pts):
+            assert_equal(pts, expected_pts)
+        assert video_clips.metadata_cache_dir is None
+        assert video_clips.decoder_cache_size == 0
+
     def test_compute_clips_for_video(self):
         video_pts = torch.arange(30)
         # case 1: single clip
@@ -2,6 +2,9 @@ import glob
 import io
 import os
 import sys
+import threading
+import time
+from itertools import chain
 from pathlib import Path
 
 import pytest
@@ -12,9 +15,11 @@ import torchvision.transforms.functional as F
 from common_utils import get_tmp_dir, needs_cuda, cpu_only
 from _assert_utils import assert_equal
 
+from torchvision.datasets.folder import ImageFolder, PrefetchDataset, RandomResizedCropLoader
 from torchvision.io.image import (
-    decode_png, decode_jpeg, encode_jpeg, write_jpeg, decode_image, read_file,
-    encode_png, write_png, write_file, ImageReadMode, read_image)
+    decode_png, decode_jpeg, decode_jpeg_crop, decode_jpeg_yuv420, encode_jpeg, write_jpeg, decode_image, read_file,
+    encode_png, write_png, write_file, ImageReadMode, read_image, decode_image_info, read_image_info,
+    ImageReader, ImageWriter)
 
 IMAGE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 FAKEDATA_DIR = os.path.join(IMAGE_ROOT, "fakedata")
@@ -86,6 +91,272 @@ def test_decode_jpeg(img_path, pil_mode, mode):
     assert abs_mean_diff < 2
 
 
+@pytest.mark.parametrize('mode', [ImageReadMode.UNCHANGED, ImageReadMode.GRAY, ImageReadMode.RGB])
+@pytest.mark.parametrize('scripted', (False, True))
+def test_decode_jpeg_batched(mode, scripted):
+    img_paths = [path for path in get_images(IMAGE_ROOT, ".jpg") if 'cmyk' not in path]
+    encoded = [read_file(path) for path in img_paths]
+    f = torch.jit.script(decode_jpeg) if scripted else decode_jpeg
+
+    decoded = f(encoded, mode=mode)
+    assert isinstance(decoded, list)
+    assert len(decoded) == len(encoded)
+    for data, img in zip(encoded, decoded):
+        assert_equal(img, decode_jpeg(data, mode=mode))
+
+
+def test_decode_image_batched():
+    img_paths = list(get_images(IMAGE_DIR, ".jpg")) + list(get_images(IMAGE_DIR, ".png"))
+    encoded = [read_file(path) for path in img_paths]
+
+    decoded = decode_image(encoded, mode=ImageReadMode.RGB)
+    assert len(decoded) == len(encoded)
+    for data, img in zip(encoded, decoded):
+        assert_equal(img, decode_image(data, mode=ImageReadMode.RGB))
+
+    assert decode_image([]) == []
+
+    with pytest.raises(RuntimeError, match="Not a JPEG file"):
+        decode_jpeg(encoded + [torch.empty((100,), dtype=torch.uint8)])
+
+
+@pytest.mark.parametrize('size, expected_scale', [
+    (None, 1),
+    ([1000, 1000], 1),
+    ([300, 200], 2),
+    ([150, 100], 4),
+    (100, 4),
+    ([1], 8),
+])
+@pytest.mark.parametrize('scripted', (False, True))
+def test_decode_jpeg_size(size, expected_scale, scripted):
+    img_path = os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg")
+    data = read_file(img_path)
+    if scripted:
+        if isinstance(size, int):
+            size = [size]
+        f = torch.jit.script(decode_jpeg)
+    else:
+        f = decode_jpeg
+
+    img = f(data, size=size)
+    height, width = 606, 517
+    assert img.shape == (3, -(-height // expected_scale), -(-width // expected_scale))
+
+    # PIL relies on the same libjpeg downscaling in draft mode
+    with Image.open(img_path) as pil_img:
+        pil_img.draft("RGB", (width // expected_scale, height // expected_scale))
+        img_pil = normalize_dimensions(torch.from_numpy(np.array(pil_img)))
+    assert img_pil.shape == img.shape
+    abs_mean_diff = (img.type(torch.float32) - img_pil).abs().mean().item()
+    assert abs_mean_diff < 2
+
+    assert_equal(decode_image(data, size=size), img)
+    assert_equal(read_image(img_path, size=size), img)
+    assert_equal(decode_jpeg([data, data], size=size)[1], img)
+
+
+def test_decode_jpeg_size_errors():
+    data = read_file(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    with pytest.raises(ValueError, match="size should be an int or a sequence of length 1 or 2"):
+        decode_jpeg(data, size=[1, 2, 3])
+
+
+@pytest.mark.parametrize('img_path', [
+    pytest.param(jpeg_path, id=_get_safe_image_name(jpeg_path))
+    for jpeg_path in get_images(IMAGE_ROOT, ".jpg")
+])
+@pytest.mark.parametrize('top, left, height, width', [
+    (0, 0, 1, 1),
+    (13, 7, 50, 41),
+    (20, 45, 16, 16),
+    (32, 48, 30, 20),
+    (16, 16, 16, 16),
+])
+def test_decode_jpeg_crop(img_path, top, left, height, width):
+    data = read_file(img_path)
+    img = decode_jpeg(data)
+    height = min(height, img.shape[1] - top)
+    width = min(width, img.shape[2] - left)
+
+    img_crop = decode_jpeg_crop(data, top, left, height, width)
+    assert_equal(img_crop, F.crop(img, top, left, height, width))
+
+    img_crop = decode_jpeg_crop(data, top, left, img.shape[1] - top, img.shape[2] - left)
+    assert_equal(img_crop, img[:, top:, left:])
+
+
+def test_decode_jpeg_crop_size():
+    data = read_file(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    top, left, height, width = 100, 50, 400, 300
+
+    img_crop = decode_jpeg_crop(data, top, left, height, width, size=[100, 75])
+    # The crop is decoded at a quarter of the resolution, rounded outwards
+    assert img_crop.shape == (3, 100, 76)
+    expected = F.crop(decode_jpeg(data, size=[100, 75]), top // 4, left // 4, 100, 76)
+    assert_equal(img_crop, expected)
+
+
+@pytest.mark.parametrize('mode, channels', [(ImageReadMode.RGB, 3), (ImageReadMode.GRAY, 1)])
+@pytest.mark.parametrize('channels_last', [False, True])
+@pytest.mark.parametrize('size', [None, [100]])
+def test_decode_jpeg_out(mode, channels, channels_last, size):
+    data = read_file(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    expected = decode_jpeg(data, mode=mode, size=size)
+    out = torch.zeros((2,) + expected.shape, dtype=torch.uint8)
+    if channels_last:
+        out = out.to(memory_format=torch.channels_last)
+
+    img = decode_jpeg(data, mode=mode, size=size, out=out[1])
+    assert img.data_ptr() == out[1].data_ptr()
+    assert_equal(out[1], expected)
+
+    out.zero_()
+    batch = decode_jpeg([data, data], mode=mode, size=size, out=out)
+    assert batch is out
+    assert_equal(out, torch.stack([expected, expected]))
+
+    out.zero_()
+    batch = decode_image([data, data], mode=mode, size=size, out=out)
+    assert_equal(out, torch.stack([expected, expected]))
+
+
+def test_decode_image_out_png():
+    paths = [os.path.join(FAKEDATA_DIR, "logos", "rgb_pytorch.png"),
+             os.path.join(FAKEDATA_DIR, "logos", "rgb_pytorch.jpg")]
+    data = [read_file(path) for path in paths]
+    expected = torch.stack(decode_image(data, mode=ImageReadMode.RGB))
+    out = torch.empty_like(expected)
+    decode_image(data, mode=ImageReadMode.RGB, out=out)
+    assert_equal(out, expected)
+    decode_image(data[0], mode=ImageReadMode.RGB, out=out[0])
+    assert_equal(out, expected)
+
+
+def test_decode_out_errors():
+    data = read_file(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    with pytest.raises(RuntimeError, match=r"Expected out to have shape \[3, 606, 517\], got \[3, 606, 516\]"):
+        decode_jpeg(data, out=torch.empty((3, 606, 516), dtype=torch.uint8))
+    with pytest.raises(RuntimeError, match="Expected out to be a CPU torch.uint8 tensor"):
+        decode_jpeg(data, out=torch.empty((3, 606, 517)))
+    with pytest.raises(RuntimeError, match="Expected out to be a 4-dimensional tensor with one image per input"):
+        decode_jpeg([data, data], out=torch.empty((1, 3, 606, 517), dtype=torch.uint8))
+    with pytest.raises(RuntimeError, match="Expected out to have shape"):
+        decode_image(read_file(os.path.join(FAKEDATA_DIR, "logos", "rgb_pytorch.png")),
+                     out=torch.empty((3, 10, 10), dtype=torch.uint8))
+    with pytest.raises(ValueError, match="Decoding into an out tensor is not supported on GPU"):
+        decode_jpeg(data, device="cuda", out=torch.empty((3, 606, 517), dtype=torch.uint8))
+
+
+def test_decode_jpeg_crop_errors():
+    data = read_file(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    with pytest.raises(RuntimeError, match="does not fit in the image of size 606x517"):
+        decode_jpeg_crop(data, 600, 0, 10, 10)
+    with pytest.raises(RuntimeError, match="does not fit in the image"):
+        decode_jpeg_crop(data, -1, 0, 10, 10)
+    with pytest.raises(RuntimeError, match="Expected the crop height and width to be positive"):
+        decode_jpeg_crop(data, 0, 0, 0, 10)
+
+
+@pytest.mark.parametrize('img_path', [
+    pytest.param(jpeg_path, id=_get_safe_image_name(jpeg_path))
+    for jpeg_path in get_images(IMAGE_ROOT, ".jpg")
+])
+def test_decode_jpeg_yuv420(img_path):
+    data = read_file(img_path)
+    pil_img = Image.open(img_path)
+    if pil_img.mode == "CMYK":
+        with pytest.raises(RuntimeError, match="Only grayscale and YCbCr JPEG images"):
+            decode_jpeg_yuv420(data)
+        return
+
+    y, u, v = decode_jpeg_yuv420(data)
+
+    _, height, width = decode_jpeg(data).shape
+    assert y.shape == (1, height, width)
+    assert u.shape == v.shape == (1, (height + 1) // 2, (width + 1) // 2)
+
+    # The luma plane doesn't depend on the chroma subsampling
+    assert_equal(y, decode_jpeg(data, mode=ImageReadMode.GRAY))
+
+    if pil_img.mode == "RGB":
+        # PIL upsamples the chroma planes with a smoothing filter, so downsampling them
+        # again only gives back an approximation of the planes stored in the file
+        pil_img.draft("YCbCr", pil_img.size)
+        ycbcr = torch.from_numpy(np.array(pil_img)).permute(2, 0, 1).float()
+        assert_equal(y[0].float(), ycbcr[0])
+        chroma = torch.nn.functional.avg_pool2d(ycbcr[1:], 2, ceil_mode=True)
+        assert (torch.cat([u, v]).float() - chroma).abs().mean() < 2
+
+
+@pytest.mark.parametrize('subsampling', [0, 1, 2])
+def test_decode_jpeg_yuv420_subsampling(subsampling):
+    img = Image.open(os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=95, subsampling=subsampling)
+
+    y, u, v = decode_jpeg_yuv420(buffer.getvalue())
+    assert y.shape == (1, 606, 517)
+    assert u.shape == v.shape == (1, 303, 259)
+
+    ycbcr = Image.open(buffer)
+    ycbcr.draft("YCbCr", ycbcr.size)
+    ycbcr = torch.from_numpy(np.array(ycbcr)).permute(2, 0, 1).float()
+    assert_equal(y[0].float(), ycbcr[0])
+    chroma = torch.nn.functional.avg_pool2d(ycbcr[1:], 2, ceil_mode=True)
+    assert (torch.cat([u, v]).float() - chroma).abs().mean() < 1
+
+    buffer = io.BytesIO()
+    img.convert("L").save(buffer, "JPEG")
+    y, u, v = decode_jpeg_yuv420(buffer.getvalue())
+    assert_equal(y, decode_jpeg(buffer.getvalue()))
+    assert (u == 128).all() and (v == 128).all()
+
+
+def test_decode_jpeg_yuv420_errors():
+    with pytest.raises(RuntimeError, match="Expected a non empty 1-dimensional tensor"):
+        decode_jpeg_yuv420(torch.empty((100, 1), dtype=torch.uint8))
+    with pytest.raises(RuntimeError, match="Expected a torch.uint8 tensor"):
+        decode_jpeg_yuv420(torch.empty((100,), dtype=torch.float16))
+
+
+@pytest.mark.parametrize('img_path', [
+    pytest.param(img_path, id=_get_safe_image_name(img_path))
+    for img_path in (os.path.join(FAKEDATA_DIR, "logos", "rgb_pytorch.jpg"),
+                     os.path.join(ENCODE_JPEG, "grace_hopper_517x606.jpg"),
+                     os.path.join(FAKEDATA_DIR, "logos", "rgb_pytorch.png"))
+])
+def test_random_resized_crop_loader(img_path):
+    loader = RandomResizedCropLoader(32, scale=(0.1, 0.5))
+    for _ in range(5):
+        img = loader(img_path)
+        assert img.dtype == torch.uint8
+        assert img.shape == (3, 32, 32)
+
+
+@pytest.mark.parametrize('img_path', [
+    pytest.param(img_path, id=_get_safe_image_name(img_path))
+    for img_path in chain(get_images(IMAGE_DIR, ".jpg"), get_images(IMAGE_DIR, ".png"))
+])
+@pytest.mark.parametrize('to_buffer', [bytes, bytearray, memoryview, lambda b: np.frombuffer(b, dtype=np.uint8)])
+def test_decode_buffer(img_path, to_buffer):
+    with open(img_path, 'rb') as f:
+        buffer = to_buffer(f.read())
+    expected = decode_image(read_file(img_path))
+
+    assert_equal(decode_image(buffer), expected)
+    assert_equal(decode_image([buffer, buffer])[1], expected)
+    assert decode_image_info(buffer) == decode_image_info(read_file(img_path))
+    if img_path.endswith(".jpg"):
+        assert_equal(decode_jpeg(buffer), expected)
+        assert_equal(decode_jpeg_crop(buffer, 0, 0, 5, 5), expected[:, :5, :5])
+    else:
+        assert_equal(decode_png(buffer), expected)
+
+    with pytest.raises(RuntimeError, match="Expected a non empty 1-dimensional tensor"):
+        decode_image(b"")
+
+
 def test_decode_jpeg_errors():
     with pytest.raises(RuntimeError, match="Expected a non empty 1-dimensional tensor"):
         decode_jpeg(torch.empty((100, 1), dtype=torch.uint8))
@@ -184,6 +455,142 @@ def test_encode_png_errors():
         encode_png(torch.empty((5, 100, 100), dtype=torch.uint8))
 
 
+@pytest.mark.parametrize('strategy', ["default", "filtered", "huffman_only", "rle", "fixed"])
+@pytest.mark.parametrize('filter', ["default", "none", "sub", "up", "avg", "paeth", "all"])
+def test_encode_png_strategy_filter(strategy, filter):
+    img = decode_image(read_file(next(get_images(IMAGE_DIR, ".png"))), mode=ImageReadMode.RGB)
+    png_buf = encode_png(img, compression_level=1, strategy=strategy, filter=filter)
+    assert_equal(decode_png(png_buf), img)
+
+
+def test_encode_png_strategy_filter_errors():
+    img = torch.zeros((3, 10, 10), dtype=torch.uint8)
+    with pytest.raises(RuntimeError, match="Unsupported compression strategy 'fast'"):
+        encode_png(img, strategy="fast")
+    with pytest.raises(RuntimeError, match="Unsupported filter 'best'"):
+        encode_png(img, filter="best")
+
+
+def test_encode_batched():
+    imgs = [decode_image(read_file(path), mode=ImageReadMode.RGB) for path in get_images(IMAGE_DIR, ".png")]
+
+    png_bufs = encode_png(imgs, compression_level=1)
+    assert len(png_bufs) == len(imgs)
+    for img, png_buf in zip(imgs, png_bufs):
+        assert_equal(png_buf, encode_png(img, compression_level=1))
+
+    jpeg_bufs = encode_jpeg(imgs, quality=90)
+    assert len(jpeg_bufs) == len(imgs)
+    for img, jpeg_buf in zip(imgs, jpeg_bufs):
+        assert_equal(jpeg_buf, encode_jpeg(img, quality=90))
+
+    with pytest.raises(RuntimeError, match="The number of channels should be 1 or 3, got: 5"):
+        encode_jpeg(imgs + [torch.empty((5, 100, 100), dtype=torch.uint8)])
+
+
+def test_image_writer():
+    imgs = [decode_image(read_file(path), mode=ImageReadMode.RGB) for path in get_images(IMAGE_DIR, ".png")]
+    with get_tmp_dir() as d:
+        filenames = [os.path.join(d, f"{i}.{ext}") for i in range(len(imgs)) for ext in ("png", "jpg")]
+        with ImageWriter(num_workers=2, max_queue_size=2, quality=90) as writer:
+            for filename in filenames:
+                writer.write(imgs[int(os.path.basename(filename)[0])], filename)
+
+        for filename in filenames:
+            img = imgs[int(os.path.basename(filename)[0])]
+            if filename.endswith(".png"):
+                assert_equal(read_image(filename), img)
+            else:
+                assert_equal(read_file(filename), encode_jpeg(img, quality=90))
+
+        with pytest.raises(RuntimeError, match="Cannot write images with a closed ImageWriter"):
+            writer.write(imgs[0], filenames[0])
+
+
+def test_image_writer_errors():
+    with get_tmp_dir() as d:
+        writer = ImageWriter()
+        with pytest.raises(ValueError, match="Unsupported image file extension '.bmp'"):
+            writer.write(torch.zeros((3, 10, 10), dtype=torch.uint8), os.path.join(d, "img.bmp"))
+
+        writer.write(torch.zeros((3, 10, 10), dtype=torch.float32), os.path.join(d, "img.png"))
+        with pytest.raises(RuntimeError, match="Input tensor dtype should be uint8"):
+            writer.close()
+
+    with pytest.raises(ValueError, match="max_queue_size should be a positive number"):
+        ImageWriter(max_queue_size=0)
+
+
+class _SlowLoader:
+    # Emulates a slow filesystem and records the number of concurrent reads
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(self, path):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return read_image(path)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_image_reader(ordered):
+    paths = list(get_images(IMAGE_DIR, ".png")) * 2
+    expected = [read_image(path) for path in paths]
+
+    loader = _SlowLoader()
+    reader = ImageReader(iter(paths), max_in_flight=4, ordered=ordered, loader=loader)
+    imgs = list(reader)
+    assert 1 < loader.max_in_flight <= 4
+
+    if not ordered:
+        assert sorted(index for index, _ in imgs) == list(range(len(paths)))
+        imgs = [img for _, img in sorted(imgs, key=lambda item: item[0])]
+    assert len(imgs) == len(expected)
+    for img, expected_img in zip(imgs, expected):
+        assert_equal(img, expected_img)
+
+    reader = ImageReader(paths, num_workers=2, ordered=ordered, mode=ImageReadMode.GRAY, size=[8])
+    imgs = [item if ordered else item[1] for item in reader]
+    assert len(imgs) == len(paths)
+    assert all(img.shape[0] == 1 for img in imgs)
+
+
+def test_image_reader_errors():
+    paths = list(get_images(IMAGE_DIR, ".png"))
+    reader = ImageReader(paths[:1] + ["does_not_exist.png"] + paths)
+    it = iter(reader)
+    assert_equal(next(it), read_image(paths[0]))
+    with pytest.raises(RuntimeError, match="No such file or directory"):
+        next(it)
+
+    with pytest.raises(ValueError, match="max_in_flight should be a positive number"):
+        ImageReader(paths, max_in_flight=0)
+
+
+def test_prefetch_dataset():
+    dataset = ImageFolder(IMAGE_DIR, loader=read_image, transform=lambda img: img.float(),
+                          target_transform=lambda target: -target)
+    prefetch = PrefetchDataset(dataset, max_in_flight=2)
+    assert len(prefetch) == len(dataset)
+
+    samples = list(prefetch)
+    assert len(samples) == len(dataset)
+    for (img, target), (expected_img, expected_target) in zip(samples, dataset):
+        assert_equal(img, expected_img)
+        assert target == expected_target
+
+    loader = torch.utils.data.DataLoader(prefetch, batch_size=None, num_workers=2)
+    targets = sorted(target for _, target in loader)
+    assert targets == sorted(-target for target in dataset.targets)
+
+
 @pytest.mark.parametrize('img_path', [
     pytest.param(png_path, id=_get_safe_image_name(png_path))
     for png_path in get_images(IMAGE_DIR, ".png")
@@ -203,17 +610,52 @@ def test_write_png(img_path):
         assert_equal(img_pil, saved_image)
 
 
-def test_read_file():
+@pytest.mark.parametrize('img_path', [
+    pytest.param(img_path, id=_get_safe_image_name(img_path))
+    for img_path in chain(get_images(IMAGE_ROOT, ".jpg"), get_images(FAKEDATA_DIR, ".png"))
+])
+def test_decode_image_info(img_path):
+    data = read_file(img_path)
+    img = decode_image(data)
+    expected = (img.shape[1], img.shape[2], img.shape[0], "png" if img_path.endswith(".png") else "jpeg")
+
+    info = decode_image_info(data)
+    assert info == expected
+    assert (info.height, info.width, info.channels, info.format) == expected
+    assert read_image_info(img_path) == expected
+
+
+def test_read_image_info_batched():
+    img_paths = list(get_images(IMAGE_ROOT, ".jpg")) + list(get_images(FAKEDATA_DIR, ".png"))
+    infos = read_image_info(img_paths)
+    assert infos == [read_image_info(path) for path in img_paths]
+    assert read_image_info([]) == []
+
+
+def test_image_info_errors():
+    with pytest.raises(RuntimeError, match="Unsupported image file"):
+        decode_image_info(torch.randint(3, 5, (300,), dtype=torch.uint8))
+    with pytest.raises(RuntimeError, match="Image is incomplete or truncated"):
+        decode_image_info(read_file(next(get_images(IMAGE_ROOT, ".jpg")))[:20])
+    with pytest.raises(RuntimeError, match="No such file or directory: 'tst'"):
+        read_image_info('tst')
+    with pytest.raises(RuntimeError, match="No such file or directory: 'tst'"):
+        read_image_info([next(get_images(IMAGE_ROOT, ".jpg")), 'tst'])
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_read_file(mmap):
     with get_tmp_dir() as d:
         fname, content = 'test1.bin', b'TorchVision\211\n'
         fpath = os.path.join(d, fname)
         with open(fpath, 'wb') as f:
             f.write(content)
 
-        data = read_file(fpath)
+        data = read_file(fpath, mmap=mmap)
         expected = torch.tensor(list(content), dtype=torch.uint8)
-        os.unlink(fpath)
         assert_equal(data, expected)
+        del data
+        os.unlink(fpath)
 
     with pytest.raises(RuntimeError, match="No such file or directory: 'tst'"):
         read_file('tst')
@@ -148,6 +148,56 @@ class TestVideo:
                 assert len(lv) == 3
                 assert_equal(data[5:8], lv, rtol=0.0, atol=self.TOLERANCE)
 
+    @pytest.mark.skipif(get_video_backend() != "pyav", reason="keyframe index is only used by the pyav backend")
+    @pytest.mark.parametrize('name', ["v_SoccerJuggling_g23_c01.avi", "R6llTwEh07w.mp4"])
+    def test_read_video_keyframe_index(self, name):
+        f_name = os.path.join(VIDEO_DIR, name)
+        pts, _ = io.read_video_timestamps(f_name)
+        with get_tmp_dir() as tmp_dir:
+            index = io.read_keyframe_index(f_name, cache_dir=tmp_dir)
+            assert index.pts.tolist() == pts
+            assert index.keyframes[0]
+            # the second call loads the cached index
+            cached = io.read_keyframe_index(f_name, cache_dir=tmp_dir)
+            assert len(os.listdir(tmp_dir)) == 1
+            assert_equal(cached.pts, index.pts)
+            assert_equal(cached.keyframes, index.keyframes)
+            assert cached.time_base == index.time_base
+
+        for start in [0, len(pts) // 3, len(pts) // 2]:
+            end = min(start + 7, len(pts) - 1)
+            expected, _, _ = io.read_video(f_name, pts[start], pts[end])
+            lv, _, _ = io.read_video(f_name, pts[start], pts[end], keyframe_index=index)
+            assert_equal(lv, expected)
+
+            expected, _, _ = io.read_video(f_name, pts[start] + 1, pts[end])
+            lv, _, _ = io.read_video(f_name, pts[start] + 1, pts[end], keyframe_index=index)
+            assert_equal(lv, expected)
+
+        keyframe_pts = index.pts[index.keyframes]
+        assert index.keyframe_before(pts[-1]) == keyframe_pts[-1]
+        assert index.keyframe_before(int(keyframe_pts[-1]) - 1) == keyframe_pts[-2]
+
+    @pytest.mark.parametrize('name', ["v_SoccerJuggling_g23_c01.avi", "R6llTwEh07w.mp4"])
+    @pytest.mark.parametrize('use_index', [False, True])
+    def test_read_video_clips(self, name, use_index):
+        f_name = os.path.join(VIDEO_DIR, name)
+        pts, _ = io.read_video_timestamps(f_name)
+        keyframe_index = io.KeyframeIndex.build(f_name) if use_index else None
+        num_frames = len(pts)
+        # unsorted, overlapping and close together as well as far apart clips
+        clips = [(pts[i], pts[i + 7]) for i in range(0, num_frames - 8, num_frames // 10)][::-1]
+        clips += [(pts[3] + 1, pts[9]), (pts[2], pts[20]), (pts[-1], pts[-1])]
+
+        lvs = io.read_video_clips(f_name, clips, keyframe_index=keyframe_index)
+        assert len(lvs) == len(clips)
+        for (start, end), lv in zip(clips, lvs):
+            expected, _, _ = io.read_video(f_name, start, end)
+            assert_equal(lv, expected)
+
+        with pytest.raises(ValueError, match="end_pts should be larger than start_pts"):
+            io.read_video_clips(f_name, [(pts[2], pts[1])])
+
     def test_read_packed_b_frames_divx_file(self):
         name = "hmdb51_Turnk_r_Pippi_Michel_cartwheel_f_cm_np2_le_med_6.avi"
         f_name = os.path.join(VIDEO_DIR, name)
@@ -156,6 +206,58 @@ class TestVideo:
         assert pts == sorted(pts)
         assert fps == 30
 
+    @pytest.mark.skipif(get_video_backend() != "pyav", reason="compares against decoding with pyav")
+    @pytest.mark.parametrize('name', ["hmdb51_Turnk_r_Pippi_Michel_cartwheel_f_cm_np2_le_med_6.avi", "R6llTwEh07w.mp4"])
+    def test_read_video_matches_decoded_frames(self, name):
+        f_name = os.path.join(VIDEO_DIR, name)
+        with av.open(f_name, metadata_errors="ignore") as container:
+            frames = {frame.pts: frame.to_rgb().to_ndarray() for frame in container.decode(video=0)}
+        pts = sorted(frames)
+        expected = torch.stack([torch.from_numpy(frames[p]) for p in pts])
+
+        lv, _, _ = io.read_video(f_name)
+        assert_equal(lv, expected)
+
+        lv, _, _ = io.read_video(f_name, pts[10], pts[20])
+        assert_equal(lv, expected[10:21])
+
+    @pytest.mark.parametrize('as_tensor', [False, True])
+    def test_read_video_from_memory(self, as_tensor):
+        f_name = os.path.join(VIDEO_DIR, "R6llTwEh07w.mp4")
+        with open(f_name, "rb") as f:
+            video_data = f.read()
+        if as_tensor:
+            video_data = torch.frombuffer(bytearray(video_data), dtype=torch.uint8)
+
+        expected = io.read_video(f_name, 1, 2, pts_unit="sec")
+        lv, la, info = io.read_video(video_data, 1, 2, pts_unit="sec")
+        assert_equal(lv, expected[0])
+        assert_equal(la, expected[1])
+        assert info == expected[2]
+
+    @pytest.mark.parametrize('name', ["v_SoccerJuggling_g23_c01.avi", "SOX5yA1l24A.mp4"])
+    def test_read_keyframes(self, name):
+        f_name = os.path.join(VIDEO_DIR, name)
+        with av.open(f_name) as container:
+            keyframes = [frame for frame in container.decode(video=0) if frame.key_frame]
+        expected = torch.stack([torch.from_numpy(frame.to_rgb().to_ndarray()) for frame in keyframes])
+        expected_pts = [frame.pts for frame in keyframes]
+
+        frames, pts = io.read_keyframes(f_name)
+        assert_equal(frames, expected)
+        assert pts == expected_pts
+
+        frames, pts = io.read_keyframes(f_name, max_frames=2, size=(32, 48))
+        assert frames.shape == (2, 32, 48, 3)
+        assert pts == [expected_pts[0], expected_pts[-1]]
+
+        frames, _ = io.read_keyframes(f_name, max_frames=1, size=32)
+        assert frames.shape[1] == 32
+        assert frames.shape[2] == round(expected.shape[2] * 32 / expected.shape[1])
+
+        with pytest.raises(ValueError, match="max_frames should be positive"):
+            io.read_keyframes(f_name, max_frames=0)
+
     def test_read_timestamps_from_packet(self):
         with temp_video(10, 300, 300, 5, video_codec='mpeg4') as (f_name, data):
             pts, _ = io.read_video_timestamps(f_name)
@@ -288,6 +390,47 @@ class TestVideo:
             assert pytest.approx(out_audio_stream.frames, rel=0.0, abs=1) == audio_stream.frames
             assert audio_stream.frame_size == out_audio_stream.frame_size
 
+    def test_video_writer(self):
+        data = _create_video_frames(20, 64, 80)
+        audio = torch.sin(torch.arange(8000, dtype=torch.float32) / 5).unsqueeze(0)
+        with get_tmp_dir() as tmpdir:
+            f_name = os.path.join(tmpdir, "testing.mp4")
+            with io.VideoWriter(f_name, fps=5, video_codec="libx264rgb", options={'crf': '0'}, audio_fps=8000,
+                                audio_codec="aac", audio_channels=1, max_queue_size=2) as writer:
+                # single frames and batches of frames, interleaved with audio
+                writer.write(data[0])
+                writer.write(data[1:10])
+                writer.write_audio(audio[:, :4000])
+                writer.write(data[10:])
+                writer.write_audio(audio[:, 4000:])
+
+            lv, la, info = io.read_video(f_name, pts_unit="sec")
+            assert_equal(lv, data)
+            assert info["video_fps"] == 5
+            assert info["audio_fps"] == 8000
+            assert la.shape[0] == 1
+
+    def test_video_writer_errors(self):
+        with get_tmp_dir() as tmpdir:
+            f_name = os.path.join(tmpdir, "testing.mp4")
+            with pytest.raises(ValueError, match="should be given together"):
+                io.VideoWriter(f_name, fps=5, audio_codec="aac")
+
+            writer = io.VideoWriter(f_name, fps=5)
+            with pytest.raises(ValueError, match=r"Expected frames of shape \[H, W, 3\]"):
+                writer.write(torch.zeros(2, 3, 4))
+            with pytest.raises(RuntimeError, match="without audio_codec"):
+                writer.write_audio(torch.zeros(2, 100))
+            writer.close()
+            with pytest.raises(RuntimeError, match="closed VideoWriter"):
+                writer.write(torch.zeros(8, 8, 3))
+
+            # encoding errors are raised by the next call
+            writer = io.VideoWriter(f_name, fps=5, video_codec="not_a_codec")
+            writer.write(torch.zeros(8, 8, 3))
+            with pytest.raises(Exception):
+                writer.close()
+
     # TODO add tests for audio
 
 
@@ -222,6 +222,33 @@ def test_to_tensor(channels):
     torch.testing.assert_close(input_data, output, check_dtype=False, check_stride=False)
 
 
+@pytest.mark.parametrize('channels', [1, 3, 4])
+def test_to_tensor_channels_last(channels):
+    height, width = 5, 7
+    trans = transforms.ToTensor(channels_last=True)
+
+    ndarray = np.random.randint(low=0, high=255, size=(height, width, channels)).astype(np.uint8)
+    pil_img = Image.fromarray(ndarray.squeeze(-1) if channels == 1 else ndarray)
+    expected_output = transforms.ToTensor()(ndarray)
+    for pic in (ndarray, pil_img):
+        output = trans(pic)
+        torch.testing.assert_close(output, expected_output, check_stride=False)
+        assert output.permute(1, 2, 0).is_contiguous()
+
+    # channels last tensors are converted back to PIL images without being transposed
+    assert_equal(np.asarray(transforms.ToPILImage()(transforms.PILToTensor()(pil_img))), np.asarray(pil_img))
+    assert_equal(np.asarray(transforms.ToPILImage()(trans(pil_img))), np.asarray(pil_img))
+
+    ndarray = np.random.rand(height, width, channels).astype(np.float32)
+    output = trans(ndarray)
+    torch.testing.assert_close(output, transforms.ToTensor()(ndarray), check_stride=False)
+    # tensors which don't need a conversion share the memory of the array
+    assert output.data_ptr() == ndarray.ctypes.data
+
+    assert repr(trans) == "ToTensor(channels_last=True)"
+    assert repr(transforms.ToTensor()) == "ToTensor()"
+
+
 def test_to_tensor_errors():
     height, width = 4, 4
     trans = transforms.ToTensor()
@@ -526,6 +526,55 @@ class TestVideoReader(unittest.TestCase):
                 self.assertEqual(atimebase.numel() > 0, expect_audio_data)
                 self.assertEqual(asample_rate.numel() > 0, expect_audio_data)
 
+    def test_read_video_from_file_threads(self):
+        """
+        Test the case when the video stream is decoded with multiple threads, which
+        must give the same frames as single-threaded decoding
+        """
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            expected_vframes, expected_aframes, _ = io._read_video_from_file(full_path, seek_frame_margin)
+
+            for num_threads, thread_type in [(0, "auto"), (2, "frame"), (2, "slice")]:
+                vframes, aframes, _ = io._read_video_from_file(
+                    full_path, seek_frame_margin, num_threads=num_threads, thread_type=thread_type
+                )
+                assert_equal(vframes, expected_vframes)
+                assert_equal(aframes, expected_aframes)
+
+        with self.assertRaisesRegex(RuntimeError, "Expected thread_type to be one of"):
+            io._read_video_from_file(full_path, num_threads=2, thread_type="any")
+
+    def test_read_video_timestamps_from_packets(self):
+        """
+        Test the case when only the timestamps of the video frames are read, which
+        are taken from the packets unless they can't give the presentation timestamps
+        """
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            # the timestamps of the decoded frames
+            tv_result = torch.ops.video_reader.read_video_from_file(
+                full_path,
+                seek_frame_margin,
+                0,  # getPtsOnly
+                1,  # readVideoStream
+                0, 0, 0, 0,  # width, height, min_dimension, max_dimension
+                0, -1,  # video_start_pts, video_end_pts
+                0, 1,  # video_timebase_num, video_timebase_den
+                0,  # readAudioStream
+                0, 0,  # samples, channels
+                0, -1,  # audio_start_pts, audio_end_pts
+                0, 1,  # audio_timebase_num, audio_timebase_den
+            )
+            expected_pts = sorted(tv_result[1].tolist())
+
+            vframe_pts, _, _ = io._read_video_timestamps_from_file(full_path)
+            self.assertEqual(vframe_pts, expected_pts)
+
+            with open(full_path, "rb") as f:
+                vframe_pts, _, _ = io._read_video_timestamps_from_memory(f.read())
+            self.assertEqual(vframe_pts, expected_pts)
+
     def test_read_video_from_file_rescale_min_dimension(self):
         """
         Test the case when decoder starts with a video file to decode frames, and
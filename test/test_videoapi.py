@@ -187,6 +187,159 @@ class TestVideoApi(unittest.TestCase):
                 ub = duration / 2 + 1 / md[stream]["fps"][0]
                 self.assertTrue((lb <= frame["pts"]) & (ub >= frame["pts"]))
 
+    def test_read_frames(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+
+            expected = [frame for frame in VideoReader(full_path, "video")]
+            expected_data = torch.stack([frame["data"] for frame in expected])
+            expected_pts = torch.tensor([frame["pts"] for frame in expected], dtype=torch.float64)
+
+            video_reader = VideoReader(full_path, "video")
+            clip = video_reader.read_frames(10)
+            self.assertEqual(clip["data"].shape, (10,) + expected_data.shape[1:])
+            self.assertTrue(clip["data"].equal(expected_data[:10]))
+            self.assertTrue(clip["pts"].equal(expected_pts[:10]))
+
+            # the batched reads interleave with the iteration
+            self.assertTrue(next(video_reader)["data"].equal(expected_data[10]))
+            clip = video_reader.read_frames(len(expected))
+            self.assertTrue(clip["data"].equal(expected_data[11:]))
+            self.assertEqual(video_reader.read_frames(5)["data"].shape[0], 0)
+
+    def test_read_until(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+
+            expected = [frame for frame in VideoReader(full_path, "video")]
+            expected_data = torch.stack([frame["data"] for frame in expected])
+            expected_pts = torch.tensor([frame["pts"] for frame in expected], dtype=torch.float64)
+
+            video_reader = VideoReader(full_path, "video")
+            end_pts = expected_pts[len(expected) // 2].item()
+            clip = video_reader.read_until(end_pts)
+            num_frames = int((expected_pts <= end_pts).sum())
+            self.assertTrue(clip["data"].equal(expected_data[:num_frames]))
+            self.assertTrue(clip["pts"].equal(expected_pts[:num_frames]))
+
+            # the first frame after end_pts is returned by the next read
+            clip = video_reader.read_until(float("inf"))
+            self.assertTrue(clip["data"].equal(expected_data[num_frames:]))
+
+            # seeking drops the frame kept by read_until
+            video_reader.seek(0)
+            video_reader.read_until(end_pts)
+            video_reader.seek(0)
+            self.assertTrue(video_reader.read_frames(1)["data"].equal(expected_data[:1]))
+
+    def test_read_at(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+
+            expected = [frame for frame in VideoReader(full_path, "video")]
+            expected_pts = [frame["pts"] for frame in expected]
+            num_frames = len(expected)
+            # unsorted, repeated, close together and far apart frames as well as a
+            # timestamp in between two frames
+            indices = [num_frames - 1, 0, 5, 6, 5, num_frames // 2]
+            pts_list = [expected_pts[i] for i in indices] + [(expected_pts[8] + expected_pts[9]) / 2]
+            indices.append(9)
+
+            frames = VideoReader(full_path, "video").read_at(pts_list)
+            self.assertTrue(frames["data"].equal(torch.stack([expected[i]["data"] for i in indices])))
+            self.assertEqual(frames["pts"].tolist(), [expected_pts[i] for i in indices])
+
+            # timestamps past the end are skipped
+            frames = VideoReader(full_path, "video").read_at([expected_pts[1], config.duration + 10])
+            self.assertEqual(frames["pts"].tolist(), [expected_pts[1]])
+
+    @unittest.skipIf(av is None, "PyAV unavailable")
+    def test_seek_keyframe_index(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            index = torchvision.io.KeyframeIndex.build(full_path)
+            keyframes_s = [index.to_sec(pts) for pts in index.pts[index.keyframes].tolist()]
+            frames_s = [index.to_sec(pts) for pts in index.pts.tolist()]
+
+            video_reader = VideoReader(full_path, "video")
+            indexed_reader = VideoReader(full_path, "video", keyframe_index=index)
+            for time_s in [frames_s[len(frames_s) // 2], keyframes_s[-1], config.duration / 3]:
+                # a plain seek can miss the frame right at time_s in videos with B-frames,
+                # so compare against the frames decoded from the start instead
+                expected = next(f for f in VideoReader(full_path, "video") if f["pts"] >= time_s - 1e-6)
+                frame = next(indexed_reader.seek(time_s))
+                self.assertTrue(frame["data"].equal(expected["data"]))
+                self.assertEqual(frame["pts"], expected["pts"])
+
+                # keyframes only seeking returns the preceding keyframe
+                keyframe = next(indexed_reader.seek(time_s, keyframes_only=True))
+                expected_s = max(s for s in keyframes_s if s <= time_s)
+                self.assertAlmostEqual(keyframe["pts"], expected_s, delta=1e-3)
+
+            with self.assertRaisesRegex(ValueError, "requires the VideoReader to have a keyframe_index"):
+                video_reader.seek(1, keyframes_only=True)
+
+    def test_output_format(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            frame = next(VideoReader(full_path, "video"))["data"]
+            _, height, width = frame.shape
+
+            frame = next(VideoReader(full_path, "video", width=64, height=48))["data"]
+            self.assertEqual(frame.shape, (3, 48, 64))
+
+            frame = next(VideoReader(full_path, "video", min_dimension=32, interpolation="bilinear"))["data"]
+            self.assertEqual(min(frame.shape[1:]), 32)
+            self.assertAlmostEqual(frame.shape[2] / frame.shape[1], width / height, delta=0.1)
+
+            clip = VideoReader(full_path, "video", pixel_format="gray").read_frames(4)["data"]
+            self.assertEqual(clip.shape, (4, 1, height, width))
+
+            clip = VideoReader(full_path, "video", max_dimension=40, pixel_format="yuv").read_frames(4)["data"]
+            self.assertEqual(clip.shape[:2], (4, 3))
+            self.assertEqual(max(clip.shape[2:]), 40)
+            self.assertTrue(clip.is_contiguous())
+
+        with self.assertRaisesRegex(RuntimeError, "Expected pixel format to be one of"):
+            VideoReader(full_path, "video", pixel_format="bgr")
+        with self.assertRaisesRegex(RuntimeError, "Expected interpolation to be one of"):
+            VideoReader(full_path, "video", width=10, interpolation="linear")
+
+    def test_threads(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            expected = VideoReader(full_path, "video").read_frames(8)
+
+            for num_threads, thread_type in [(0, "auto"), (2, "frame"), (2, "slice")]:
+                reader = VideoReader(full_path, "video", num_threads=num_threads, thread_type=thread_type)
+                clip = reader.read_frames(8)
+                self.assertTrue(clip["data"].equal(expected["data"]))
+                self.assertTrue(clip["pts"].equal(expected["pts"]))
+
+        with self.assertRaisesRegex(RuntimeError, "Expected thread_type to be one of"):
+            VideoReader(full_path, "video", num_threads=2, thread_type="auto_frame")
+        with self.assertRaisesRegex(RuntimeError, "Expected num_threads to be non-negative"):
+            VideoReader(full_path, "video", num_threads=-1)
+
+    def test_read_from_memory(self):
+        for test_video, config in test_videos.items():
+            full_path = os.path.join(VIDEO_DIR, test_video)
+            with open(full_path, "rb") as f:
+                video_data = f.read()
+
+            video_reader = VideoReader(full_path, "video")
+            for data in [video_data, torch.frombuffer(bytearray(video_data), dtype=torch.uint8)]:
+                memory_reader = VideoReader(data, "video")
+                self.assertEqual(memory_reader.get_metadata(), video_reader.get_metadata())
+                for time_s in [0, config.duration / 2, config.duration / 3]:
+                    expected = video_reader.seek(time_s).read_frames(4)
+                    clip = memory_reader.seek(time_s).read_frames(4)
+                    self.assertTrue(clip["data"].equal(expected["data"]))
+                    self.assertTrue(clip["pts"].equal(expected["pts"]))
+
+        with self.assertRaisesRegex(RuntimeError, "Expected non-empty video data"):
+            VideoReader(b"", "video")
+
     def test_fate_suite(self):
         video_path = fate("sub/MovText_capability_tester.mp4", VIDEO_DIR)
         vr = VideoReader(video_path)
@@ -1,8 +1,10 @@
 #include "decoder.h"
+#include <c10/util/Exception.h>
 #include <c10/util/Logging.h>
 #include <libavutil/avutil.h>
 #include <future>
 #include <iostream>
+#include <map>
 #include <mutex>
 #include "audio_stream.h"
 #include "cc_stream.h"
@@ -17,6 +19,10 @@ namespace {
 constexpr size_t kIoBufferSize = 96 * 1024;
 constexpr size_t kIoPaddingSize = AV_INPUT_BUFFER_PADDING_SIZE;
 constexpr size_t kLogBufferSize = 1024;
+// packets kept while looking for out-of-order timestamps, see processPacketPts.
+// Reordered frames show well within this, if the timestamps are still in order
+// they are taken as decoding timestamps.
+constexpr size_t kMaxPendingPackets = 32;
 
 int ffmpeg_lock(void** mutex, enum AVLockOp op) {
   std::mutex** handle = (std::mutex**)mutex;
@@ -88,6 +94,20 @@ std::unique_ptr<Stream> createStream(
 
 } // Namespace
 
+int parseThreadType(const std::string& threadType) {
+  static const std::map<std::string, int> types = {
+      {"auto", 0},
+      {"frame", FF_THREAD_FRAME},
+      {"slice", FF_THREAD_SLICE},
+  };
+  auto type = types.find(threadType);
+  TORCH_CHECK(
+      type != types.end(),
+      "Expected thread_type to be one of [auto, frame, slice], got ",
+      threadType);
+  return type->second;
+}
+
 /* static */
 void Decoder::logFunction(void* avcl, int level, const char* cfmt, va_list vl) {
   if (!avcl) {
@@ -391,6 +411,9 @@ bool Decoder::init(
     auto offset = params.startOffset <= params.seekAccuracy
         ? 0
         : params.startOffset - params.seekAccuracy;
+    if (params.seekOffset >= 0) {
+      offset = params.seekOffset;
+    }
 
     av_seek_frame(inputCtx_, -1, offset, AVSEEK_FLAG_BACKWARD);
   }
@@ -411,7 +434,8 @@ bool Decoder::openStreams(std::vector<DecoderMetadata>* metadata) {
     if (!mapFfmpegType(media, &format.type)) {
       VLOG(1) << "Stream media: " << media << " at index " << i
               << " gets ignored, unknown type";
-
+      // don't let the demuxer hand us packets we are going to drop anyway
+      inputCtx_->streams[i]->discard = AVDISCARD_ALL;
       continue; // unsupported type
     }
 
@@ -420,6 +444,7 @@ bool Decoder::openStreams(std::vector<DecoderMetadata>* metadata) {
     if (it == params_.formats.end()) {
       VLOG(1) << "Stream type: " << format.type << " at index: " << i
               << " gets ignored, caller is not interested";
+      inputCtx_->streams[i]->discard = AVDISCARD_ALL;
       continue; // clients don't care about this media format
     }
 
@@ -439,13 +464,18 @@ bool Decoder::openStreams(std::vector<DecoderMetadata>* metadata) {
           it->format,
           params_.loggingUuid);
       CHECK(stream);
-      if (stream->openCodec(metadata) < 0) {
+      if (stream->openCodec(metadata, params_.numThreads, params_.threadType) <
+          0) {
         LOG(ERROR) << "uuid=" << params_.loggingUuid
                    << " open codec failed, stream_idx=" << i;
         return false;
       }
       streams_.emplace(i, std::move(stream));
       inRange_.set(i, true);
+    } else {
+      VLOG(1) << "Stream type: " << format.type << " at index: " << i
+              << " gets ignored, stream of this type already selected";
+      inputCtx_->streams[i]->discard = AVDISCARD_ALL;
     }
   }
 
@@ -481,6 +511,13 @@ void Decoder::cleanUp() {
     av_freep(&avioCtx_);
   }
 
+  for (auto& packet : pendingPackets_) {
+    av_packet_free(&packet);
+  }
+  pendingPackets_.clear();
+  packetPts_ = PacketPts::kUnknown;
+  maxPacketPts_ = AV_NOPTS_VALUE;
+
   // reset callback
   seekableBuffer_.shutdown();
 }
@@ -620,6 +657,12 @@ int Decoder::processPacket(
     AVPacket* packet,
     bool* gotFrame,
     bool* hasMsg) {
+  if (params_.headerOnly && params_.ptsFromPackets && params_.endOffset <= 0 &&
+      packetPts_ != PacketPts::kDecode &&
+      stream->getMediaFormat().type == TYPE_VIDEO) {
+    return processPacketPts(stream, packet, gotFrame, hasMsg);
+  }
+
   // decode package
   int result;
   DecoderOutputMessage msg;
@@ -640,8 +683,104 @@ int Decoder::processPacket(
   return result;
 }
 
+int Decoder::processPacketPts(
+    Stream* stream,
+    AVPacket* packet,
+    bool* gotFrame,
+    bool* hasMsg) {
+  // the packets carry the timestamps of the frames, unless the codec reorders
+  // frames and the container stores the timestamps in decoding order, like
+  // B-frames in avi files. Stored presentation timestamps show by being out of
+  // order, so until then the packets are kept to be decoded
+  *gotFrame = true;
+  *hasMsg = false;
+  if (packetPts_ == PacketPts::kUnknown && !stream->hasBFrames()) {
+    packetPts_ = PacketPts::kResolved;
+  }
+
+  if (packetPts_ == PacketPts::kResolved) {
+    if (packet->pts != AV_NOPTS_VALUE) {
+      *hasMsg = pushPacketPts(stream, packet);
+    }
+    return packet->size;
+  }
+
+  if (packet->pts == AV_NOPTS_VALUE) {
+    // can't tell, decode the packets
+    packetPts_ = PacketPts::kDecode;
+    bool pendingMsg = false;
+    decodePendingPackets(&pendingMsg);
+    int result = processPacket(stream, packet, gotFrame, hasMsg);
+    *hasMsg |= pendingMsg;
+    return result;
+  }
+
+  AVPacket* pending = av_packet_clone(packet);
+  if (pending == nullptr) {
+    return AVERROR(ENOMEM);
+  }
+  pendingPackets_.push_back(pending);
+
+  if (maxPacketPts_ != AV_NOPTS_VALUE && packet->pts < maxPacketPts_) {
+    packetPts_ = PacketPts::kResolved;
+    for (auto& pendingPacket : pendingPackets_) {
+      *hasMsg |= pushPacketPts(stream, pendingPacket);
+      av_packet_free(&pendingPacket);
+    }
+    pendingPackets_.clear();
+  } else if (pendingPackets_.size() >= kMaxPendingPackets) {
+    // the timestamps are in order past any reordering, decode the packets
+    packetPts_ = PacketPts::kDecode;
+    decodePendingPackets(hasMsg);
+  } else {
+    maxPacketPts_ = packet->pts;
+  }
+  return packet->size;
+}
+
+bool Decoder::pushPacketPts(Stream* stream, const AVPacket* packet) {
+  DecoderOutputMessage msg;
+  stream->setPacketHeader(&msg.header, packet);
+  if (msg.header.pts < params_.startOffset) {
+    return false;
+  }
+  push(std::move(msg));
+  return true;
+}
+
+void Decoder::decodePendingPackets(bool* hasMsg) {
+  *hasMsg = false;
+  for (auto& packet : pendingPackets_) {
+    auto stream = findByIndex(packet->stream_index);
+    if (stream == nullptr) {
+      continue;
+    }
+    int result;
+    bool gotFrame = false;
+    do {
+      bool packetMsg = false;
+      result = processPacket(stream, packet, &gotFrame, &packetMsg);
+      *hasMsg |= packetMsg;
+    } while (result == 0 && gotFrame);
+    if (result < 0) {
+      LOG(ERROR) << "uuid=" << params_.loggingUuid
+                 << " processPacket failed with code=" << result;
+    }
+  }
+  for (auto& packet : pendingPackets_) {
+    av_packet_free(&packet);
+  }
+  pendingPackets_.clear();
+}
+
 void Decoder::flushStreams() {
   VLOG(1) << "Flushing streams...";
+  if (!pendingPackets_.empty()) {
+    // the timestamps of the packets have always been in order
+    packetPts_ = PacketPts::kDecode;
+    bool hasMsg;
+    decodePendingPackets(&hasMsg);
+  }
   for (auto& stream : streams_) {
     DecoderOutputMessage msg;
     while (msg.payload = (params_.headerOnly ? nullptr : createByteStorage(0)),
@@ -73,6 +73,13 @@ class Decoder : public MediaDecoder {
       AVPacket* packet,
       bool* gotFrame,
       bool* hasMsg);
+  int processPacketPts(
+      Stream* stream,
+      AVPacket* packet,
+      bool* gotFrame,
+      bool* hasMsg);
+  bool pushPacketPts(Stream* stream, const AVPacket* packet);
+  void decodePendingPackets(bool* hasMsg);
   void flushStreams();
   void cleanUp();
 
@@ -88,5 +95,12 @@ class Decoder : public MediaDecoder {
   AVIOContext* avioCtx_{nullptr};
   std::unordered_map<ssize_t, std::unique_ptr<Stream>> streams_;
   std::bitset<64> inRange_;
+
+  // whether the timestamps of the video packets are presentation timestamps,
+  // when reading timestamps from packets, see processPacketPts
+  enum class PacketPts { kUnknown, kResolved, kDecode };
+  PacketPts packetPts_{PacketPts::kUnknown};
+  int64_t maxPacketPts_{AV_NOPTS_VALUE};
+  std::vector<AVPacket*> pendingPackets_;
 };
 } // namespace ffmpeg
@@ -77,7 +77,8 @@ struct VideoFormat {
   size_t minDimension{0}; // choose min dimension and rescale accordingly
   size_t maxDimension{0}; // choose max dimension and rescale accordingly
   size_t cropImage{0}; // request image crop
-  // -- alignment 40 bytes
+  int swsFlags{SWS_AREA}; // swscale interpolation used to resize the frames
+  // -- alignment 56 bytes
 };
 
 // subtitle/cc
@@ -95,7 +96,7 @@ union FormatUnion {
   AudioFormat audio;
   VideoFormat video;
   SubtitleFormat subtitle;
-  // -- alignment 40 bytes
+  // -- alignment 56 bytes
 };
 
 /*
@@ -190,10 +191,20 @@ struct DecoderParameters {
   bool listen{false};
   // don't copy frame body, only header
   bool headerOnly{false};
+  // with headerOnly, take the video timestamps from the packets without
+  // decoding them, unless they turn out to be in decoding order
+  bool ptsFromPackets{false};
   // interrupt init method on timeout
   bool preventStaleness{true};
   // seek tolerated accuracy (us)
   double seekAccuracy{1000000.0};
+  // position (us) the demuxer seeks to before decoding up to startOffset,
+  // e.g. a keyframe known in advance, -1 means startOffset - seekAccuracy
+  long seekOffset{-1};
+  // number of codec threads, 0 lets ffmpeg pick based on the cpu count
+  size_t numThreads{1};
+  // FF_THREAD_FRAME and/or FF_THREAD_SLICE mask, 0 keeps the codec default
+  int threadType{0};
   // what media types should be processed, default none
   std::set<MediaFormat> formats;
 
@@ -207,6 +218,10 @@ struct DecoderParameters {
   std::string tlsKeyFile;
 };
 
+// Maps "auto", "frame" or "slice" to the DecoderParameters::threadType mask,
+// throws on any other value
+int parseThreadType(const std::string& threadType);
+
 struct DecoderHeader {
   // message id, from 0 till ...
   size_t seqno{0};
@@ -28,7 +28,10 @@ AVCodec* Stream::findCodec(AVCodecParameters* params) {
   return avcodec_find_decoder(params->codec_id);
 }
 
-int Stream::openCodec(std::vector<DecoderMetadata>* metadata) {
+int Stream::openCodec(
+    std::vector<DecoderMetadata>* metadata,
+    size_t numThreads,
+    int threadType) {
   AVStream* steam = inputCtx_->streams[format_.stream];
 
   AVCodec* codec = findCodec(steam->codecpar);
@@ -53,6 +56,12 @@ int Stream::openCodec(std::vector<DecoderMetadata>* metadata) {
     return ret;
   }
 
+  // threading has to be configured before the codec gets opened
+  codecCtx_->thread_count = numThreads;
+  if (threadType != 0) {
+    codecCtx_->thread_type = threadType;
+  }
+
   // after avcodec_open2, value of codecCtx_->time_base is NOT meaningful
   if ((ret = avcodec_open2(codecCtx_, codec, nullptr)) < 0) {
     LOG(ERROR) << "LoggingUuid #" << loggingUuid_
@@ -228,6 +237,20 @@ void Stream::setHeader(DecoderHeader* header, bool flush) {
   header->fps = std::numeric_limits<double>::quiet_NaN();
 }
 
+void Stream::setPacketHeader(DecoderHeader* header, const AVPacket* packet) {
+  header->seqno = numGenerator_++;
+  header->pts = av_rescale_q(
+      packet->pts, inputCtx_->streams[format_.stream]->time_base, timeBaseQ);
+
+  if (convertPtsToWallTime_) {
+    keeper_.adjust(header->pts);
+  }
+
+  header->format = format_;
+  header->keyFrame = (packet->flags & AV_PKT_FLAG_KEY) != 0;
+  header->fps = std::numeric_limits<double>::quiet_NaN();
+}
+
 void Stream::setFramePts(DecoderHeader* header, bool flush) {
   if (flush) {
     header->pts = nextPts_; // already in us
@@ -20,7 +20,10 @@ class Stream {
   virtual ~Stream();
 
   // returns 0 - on success or negative error
-  int openCodec(std::vector<DecoderMetadata>* metadata);
+  int openCodec(
+      std::vector<DecoderMetadata>* metadata,
+      size_t numThreads = 1,
+      int threadType = 0);
   // returns 1 - if packet got consumed, 0 - if it's not, and < 0 on error
   int decodePacket(
       const AVPacket* packet,
@@ -37,6 +40,13 @@ class Stream {
   MediaFormat getMediaFormat() const {
     return format_;
   }
+  // returns true if the codec may output frames in another order than their
+  // packets, e.g. with B-frames
+  bool hasBFrames() const {
+    return codecCtx_ != nullptr && codecCtx_->has_b_frames > 0;
+  }
+  // sets the header of a message from a packet, without decoding it
+  void setPacketHeader(DecoderHeader* header, const AVPacket* packet);
 
  protected:
   virtual int initFormat() = 0;
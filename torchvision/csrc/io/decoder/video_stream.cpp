@@ -84,7 +84,8 @@ int VideoStream::initFormat() {
 
 int VideoStream::copyFrameBytes(ByteStorage* out, bool flush) {
   if (!sampler_) {
-    sampler_ = std::make_unique<VideoSampler>(SWS_AREA, loggingUuid_);
+    sampler_ = std::make_unique<VideoSampler>(
+        format_.format.video.swsFlags, loggingUuid_);
   }
 
   // check if input format gets changed
@@ -3,4 +3,5 @@
 #if PNG_FOUND
 #include <png.h>
 #include <setjmp.h>
+#include <zlib.h>
 #endif
@@ -3,10 +3,15 @@
 #include "decode_jpeg.h"
 #include "decode_png.h"
 
+#include <ATen/Parallel.h>
+
 namespace vision {
 namespace image {
 
-torch::Tensor decode_image(const torch::Tensor& data, ImageReadMode mode) {
+torch::Tensor decode_image(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
   // Check that the input tensor dtype is uint8
   TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
   // Check that the input tensor is 1-dimensional
@@ -20,7 +25,7 @@ torch::Tensor decode_image(const torch::Tensor& data, ImageReadMode mode) {
   const uint8_t png_signature[4] = {137, 80, 78, 71}; // == "\211PNG"
 
   if (memcmp(jpeg_signature, datap, 3) == 0) {
-    return decode_jpeg(data, mode);
+    return decode_jpeg(data, mode, size);
   } else if (memcmp(png_signature, datap, 4) == 0) {
     return decode_png(data, mode);
   } else {
@@ -31,5 +36,63 @@ torch::Tensor decode_image(const torch::Tensor& data, ImageReadMode mode) {
   }
 }
 
+std::vector<torch::Tensor> decode_images(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  std::vector<torch::Tensor> output(data.size());
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      output[i] = decode_image(data[i], mode, size);
+    }
+  });
+  return output;
+}
+
+torch::Tensor decode_image_out(
+    const torch::Tensor& data,
+    torch::Tensor out,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
+  TORCH_CHECK(
+      data.dim() == 1 && data.numel() > 0,
+      "Expected a non empty 1-dimensional tensor");
+  TORCH_CHECK(
+      out.dtype() == torch::kU8 && out.device().is_cpu(),
+      "Expected out to be a CPU torch.uint8 tensor");
+
+  const uint8_t jpeg_signature[3] = {255, 216, 255}; // == "\xFF\xD8\xFF"
+  if (memcmp(jpeg_signature, data.data_ptr<uint8_t>(), 3) == 0) {
+    return decode_jpeg_out(data, out, mode, size);
+  }
+
+  auto image = decode_image(data, mode, size);
+  TORCH_CHECK(
+      out.sizes() == image.sizes(),
+      "Expected out to have shape ",
+      image.sizes(),
+      ", got ",
+      out.sizes());
+  return out.copy_(image);
+}
+
+torch::Tensor decode_images_out(
+    const std::vector<torch::Tensor>& data,
+    torch::Tensor out,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      out.dim() == 4 && out.size(0) == int64_t(data.size()),
+      "Expected out to be a 4-dimensional tensor with one image per input, got ",
+      out.sizes());
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      decode_image_out(data[i], out[i], mode, size);
+    }
+  });
+  return out;
+}
+
 } // namespace image
 } // namespace vision
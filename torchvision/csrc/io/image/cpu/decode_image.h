@@ -8,7 +8,25 @@ namespace image {
 
 C10_EXPORT torch::Tensor decode_image(
     const torch::Tensor& data,
-    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED);
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT std::vector<torch::Tensor> decode_images(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT torch::Tensor decode_image_out(
+    const torch::Tensor& data,
+    torch::Tensor out,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT torch::Tensor decode_images_out(
+    const std::vector<torch::Tensor>& data,
+    torch::Tensor out,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
 
 } // namespace image
 } // namespace vision
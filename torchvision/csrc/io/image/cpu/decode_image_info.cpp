@@ -0,0 +1,214 @@
+#include "decode_image_info.h"
+#include "read_write_file.h"
+
+#include <ATen/Parallel.h>
+
+namespace vision {
+namespace image {
+
+namespace {
+
+// The headers are parsed without libjpeg or libpng: only the bytes needed to
+// reach the JPEG SOF segment or the PNG IHDR chunk are read, everything else
+// (e.g. EXIF data) is skipped.
+class ByteSource {
+ public:
+  virtual ~ByteSource() = default;
+  virtual bool read(uint8_t* dst, size_t n) = 0;
+  virtual bool skip(size_t n) = 0;
+};
+
+class MemorySource : public ByteSource {
+ public:
+  MemorySource(const uint8_t* data, size_t size) : data_(data), size_(size) {}
+
+  bool read(uint8_t* dst, size_t n) override {
+    if (n > size_ - pos_) {
+      return false;
+    }
+    std::memcpy(dst, data_ + pos_, n);
+    pos_ += n;
+    return true;
+  }
+
+  bool skip(size_t n) override {
+    if (n > size_ - pos_) {
+      return false;
+    }
+    pos_ += n;
+    return true;
+  }
+
+ private:
+  const uint8_t* data_;
+  size_t size_;
+  size_t pos_ = 0;
+};
+
+class FileSource : public ByteSource {
+ public:
+  explicit FileSource(FILE* file) : file_(file) {}
+
+  bool read(uint8_t* dst, size_t n) override {
+    return fread(dst, 1, n, file_) == n;
+  }
+
+  bool skip(size_t n) override {
+    return fseek(file_, n, SEEK_CUR) == 0;
+  }
+
+ private:
+  FILE* file_;
+};
+
+int64_t read_be(const uint8_t* p, int n) {
+  int64_t value = 0;
+  for (int i = 0; i < n; ++i) {
+    value = (value << 8) | p[i];
+  }
+  return value;
+}
+
+bool is_sof_marker(uint8_t marker) {
+  // SOF0-SOF15, except DHT (0xC4), JPG (0xC8) and DAC (0xCC)
+  return marker >= 0xC0 && marker <= 0xCF && marker != 0xC4 && marker != 0xC8 &&
+      marker != 0xCC;
+}
+
+ImageInfo parse_jpeg_info(ByteSource& src) {
+  uint8_t buf[8];
+  while (true) {
+    // Markers may be preceded by any number of fill bytes
+    TORCH_CHECK(src.read(buf, 1), "Image is incomplete or truncated");
+    if (buf[0] != 0xFF) {
+      continue;
+    }
+    uint8_t marker = 0xFF;
+    while (marker == 0xFF) {
+      TORCH_CHECK(src.read(&marker, 1), "Image is incomplete or truncated");
+    }
+    // Standalone markers (TEM, RSTn, SOI) don't have a payload
+    if (marker == 0x01 || (marker >= 0xD0 && marker <= 0xD8)) {
+      continue;
+    }
+    TORCH_CHECK(
+        marker != 0xD9 && marker != 0xDA, "No SOF marker found in JPEG file");
+
+    TORCH_CHECK(src.read(buf, 2), "Image is incomplete or truncated");
+    int64_t length = read_be(buf, 2);
+    TORCH_CHECK(length >= 2, "Invalid JPEG segment length");
+    if (is_sof_marker(marker)) {
+      TORCH_CHECK(length >= 8, "Invalid JPEG SOF segment");
+      // precision (1 byte), height (2), width (2), number of components (1)
+      TORCH_CHECK(src.read(buf, 6), "Image is incomplete or truncated");
+      int64_t height = read_be(buf + 1, 2);
+      int64_t width = read_be(buf + 3, 2);
+      TORCH_CHECK(
+          height > 0 && width > 0,
+          "Unsupported JPEG file: the image size is not defined in the SOF segment");
+      return ImageInfo(height, width, buf[5], "jpeg");
+    }
+    TORCH_CHECK(src.skip(length - 2), "Image is incomplete or truncated");
+  }
+}
+
+ImageInfo parse_png_info(ByteSource& src) {
+  // length (4 bytes), chunk type (4), width (4), height (4), bit depth (1),
+  // color type (1)
+  uint8_t buf[18];
+  TORCH_CHECK(src.read(buf, 18), "Image is incomplete or truncated");
+  TORCH_CHECK(
+      std::memcmp(buf + 4, "IHDR", 4) == 0, "Invalid PNG file: missing IHDR");
+  int64_t width = read_be(buf + 8, 4);
+  int64_t height = read_be(buf + 12, 4);
+  int64_t channels;
+  switch (buf[17]) {
+    case 0: // gray
+    case 3: // palette
+      channels = 1;
+      break;
+    case 2: // rgb
+      channels = 3;
+      break;
+    case 4: // gray + alpha
+      channels = 2;
+      break;
+    case 6: // rgb + alpha
+      channels = 4;
+      break;
+    default:
+      TORCH_CHECK(false, "Invalid PNG color type ", int(buf[17]));
+  }
+  return ImageInfo(height, width, channels, "png");
+}
+
+ImageInfo parse_image_info(ByteSource& src) {
+  const uint8_t jpeg_signature[3] = {255, 216, 255}; // == "\xFF\xD8\xFF"
+  const uint8_t png_signature[8] = {137, 80, 78, 71, 13, 10, 26, 10};
+
+  uint8_t signature[8];
+  TORCH_CHECK(src.read(signature, 2), "Image is incomplete or truncated");
+  if (std::memcmp(jpeg_signature, signature, 2) == 0) {
+    return parse_jpeg_info(src);
+  }
+  TORCH_CHECK(src.read(signature + 2, 6), "Image is incomplete or truncated");
+  TORCH_CHECK(
+      std::memcmp(png_signature, signature, 8) == 0,
+      "Unsupported image file. Only jpeg and png ",
+      "are currently supported.");
+  return parse_png_info(src);
+}
+
+} // namespace
+
+ImageInfo decode_image_info(const torch::Tensor& data) {
+  // Check that the input tensor dtype is uint8
+  TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
+  // Check that the input tensor is 1-dimensional
+  TORCH_CHECK(
+      data.dim() == 1 && data.numel() > 0,
+      "Expected a non empty 1-dimensional tensor");
+
+  auto contiguous = data.contiguous();
+  MemorySource src(contiguous.data_ptr<uint8_t>(), contiguous.numel());
+  return parse_image_info(src);
+}
+
+ImageInfo read_image_info(const std::string& filename) {
+  FILE* infile = detail::open_file(filename, "rb");
+  TORCH_CHECK(
+      infile != nullptr,
+      "[Errno ",
+      errno,
+      "] ",
+      strerror(errno),
+      ": '",
+      filename,
+      "'");
+
+  FileSource src(infile);
+  try {
+    auto info = parse_image_info(src);
+    fclose(infile);
+    return info;
+  } catch (...) {
+    fclose(infile);
+    throw;
+  }
+}
+
+std::vector<ImageInfo> read_image_infos(
+    const std::vector<std::string>& filenames) {
+  std::vector<ImageInfo> output(filenames.size());
+  // Reading the headers is dominated by file system latency, so the files are
+  // opened concurrently on the intra-op thread pool.
+  at::parallel_for(0, filenames.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      output[i] = read_image_info(filenames[i]);
+    }
+  });
+  return output;
+}
+
+} // namespace image
+} // namespace vision
@@ -0,0 +1,20 @@
+#pragma once
+
+#include <torch/types.h>
+
+namespace vision {
+namespace image {
+
+// (height, width, channels, format) of an image, where format is either
+// "jpeg" or "png".
+using ImageInfo = std::tuple<int64_t, int64_t, int64_t, std::string>;
+
+C10_EXPORT ImageInfo decode_image_info(const torch::Tensor& data);
+
+C10_EXPORT ImageInfo read_image_info(const std::string& filename);
+
+C10_EXPORT std::vector<ImageInfo> read_image_infos(
+    const std::vector<std::string>& filenames);
+
+} // namespace image
+} // namespace vision
@@ -1,14 +1,47 @@
 #include "decode_jpeg.h"
 #include "common_jpeg.h"
 
+#include <ATen/Parallel.h>
+
 namespace vision {
 namespace image {
 
 #if !JPEG_FOUND
-torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
+torch::Tensor decode_jpeg(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
   TORCH_CHECK(
       false, "decode_jpeg: torchvision not compiled with libjpeg support");
 }
+
+torch::Tensor decode_jpeg_crop(
+    const torch::Tensor& data,
+    int64_t top,
+    int64_t left,
+    int64_t height,
+    int64_t width,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      false, "decode_jpeg_crop: torchvision not compiled with libjpeg support");
+}
+
+torch::Tensor decode_jpeg_out(
+    const torch::Tensor& data,
+    torch::Tensor out,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      false, "decode_jpeg_out: torchvision not compiled with libjpeg support");
+}
+
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor> decode_jpeg_yuv420(
+    const torch::Tensor& data) {
+  TORCH_CHECK(
+      false,
+      "decode_jpeg_yuv420: torchvision not compiled with libjpeg support");
+}
 #else
 
 using namespace detail;
@@ -67,15 +100,56 @@ static void torch_jpeg_set_source_mgr(
   src->pub.next_input_byte = src->data;
 }
 
-} // namespace
+// Returns the largest power-of-two denominator (up to 8) by which the image
+// can be downscaled in the DCT domain while staying at least as large as the
+// requested size. A size with one element is matched against the smaller
+// edge, a size with two elements against (height, width).
+unsigned int get_scale_denom(
+    JDIMENSION height,
+    JDIMENSION width,
+    at::IntArrayRef size) {
+  if (size.empty()) {
+    return 1;
+  }
+  for (unsigned int denom = 8; denom > 1; denom /= 2) {
+    // libjpeg rounds the scaled dimensions up
+    int64_t scaled_height = (height + denom - 1) / denom;
+    int64_t scaled_width = (width + denom - 1) / denom;
+    bool large_enough = size.size() == 1
+        ? std::min(scaled_height, scaled_width) >= size[0]
+        : scaled_height >= size[0] && scaled_width >= size[1];
+    if (large_enough) {
+      return denom;
+    }
+  }
+  return 1;
+}
+
+// Region of the full resolution image which should be decoded. A negative
+// height means that the whole image is decoded.
+struct CropRegion {
+  int64_t top = 0;
+  int64_t left = 0;
+  int64_t height = -1;
+  int64_t width = -1;
+};
 
-torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
+// Decodes the image into ``out`` if it is defined, or into a new tensor
+// otherwise. ``out`` is only supported when decoding the whole image.
+torch::Tensor decode_jpeg_impl(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size,
+    const CropRegion& region,
+    const torch::Tensor& out = torch::Tensor()) {
   // Check that the input tensor dtype is uint8
   TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
   // Check that the input tensor is 1-dimensional
   TORCH_CHECK(
       data.dim() == 1 && data.numel() > 0,
       "Expected a non empty 1-dimensional tensor");
+  TORCH_CHECK(
+      size.size() <= 2, "Expected size to have 1 or 2 elements, got ", size);
 
   struct jpeg_decompress_struct cinfo;
   struct torch_jpeg_error_mgr jerr;
@@ -99,6 +173,40 @@ torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
   // read info from header.
   jpeg_read_header(&cinfo, TRUE);
 
+  bool crop = region.height >= 0;
+  int64_t region_height = cinfo.image_height;
+  int64_t region_width = cinfo.image_width;
+  if (crop) {
+    bool valid_region = region.top >= 0 && region.left >= 0 &&
+        region.height > 0 && region.width > 0 &&
+        region.top + region.height <= region_height &&
+        region.left + region.width <= region_width;
+    if (!valid_region) {
+      jpeg_destroy_decompress(&cinfo);
+      TORCH_CHECK(
+          false,
+          "The crop region (top=",
+          region.top,
+          ", left=",
+          region.left,
+          ", height=",
+          region.height,
+          ", width=",
+          region.width,
+          ") does not fit in the image of size ",
+          region_height,
+          "x",
+          region_width);
+    }
+    region_height = region.height;
+    region_width = region.width;
+  }
+
+  // Let libjpeg downscale in the DCT domain, which is much cheaper than
+  // decoding the full image and resizing it afterwards.
+  cinfo.scale_num = 1;
+  cinfo.scale_denom = get_scale_denom(region_height, region_width, size);
+
   int channels = cinfo.num_components;
 
   if (mode != IMAGE_READ_MODE_UNCHANGED) {
@@ -130,28 +238,304 @@ torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
 
   jpeg_start_decompress(&cinfo);
 
-  int height = cinfo.output_height;
-  int width = cinfo.output_width;
+  if (!crop) {
+    int64_t height = cinfo.output_height;
+    int64_t width = cinfo.output_width;
+
+    torch::Tensor output;
+    if (out.defined()) {
+      bool valid_out = out.dim() == 3 && out.size(0) == channels &&
+          out.size(1) == height && out.size(2) == width;
+      if (!valid_out) {
+        jpeg_destroy_decompress(&cinfo);
+        TORCH_CHECK(
+            false,
+            "Expected out to have shape [",
+            channels,
+            ", ",
+            height,
+            ", ",
+            width,
+            "], got ",
+            out.sizes());
+      }
+      output = out.permute({1, 2, 0});
+    } else {
+      output = torch::empty({height, width, channels}, torch::kU8);
+    }
+
+    // The scanlines are written directly into the output when the pixels of
+    // a row are contiguous, which is the case for channels last and single
+    // channel tensors. Otherwise the image is decoded into a temporary tensor
+    // and copied.
+    bool direct = output.stride(1) == channels &&
+        (channels == 1 || output.stride(2) == 1);
+    auto tensor =
+        direct ? output : torch::empty({height, width, channels}, torch::kU8);
+    int64_t stride = tensor.stride(0);
+    auto ptr = tensor.data_ptr<uint8_t>();
+    while (cinfo.output_scanline < cinfo.output_height) {
+      /* jpeg_read_scanlines expects an array of pointers to scanlines.
+       * Here the array is only one element long, but you could ask for
+       * more than one scanline at a time if that's more convenient.
+       */
+      jpeg_read_scanlines(&cinfo, &ptr, 1);
+      ptr += stride;
+    }
+
+    jpeg_finish_decompress(&cinfo);
+    jpeg_destroy_decompress(&cinfo);
+    if (!direct) {
+      output.copy_(tensor);
+    }
+    return output.permute({2, 0, 1});
+  }
+
+  // Coordinates of the crop in the (possibly downscaled) output image,
+  // rounded outwards.
+  JDIMENSION denom = cinfo.scale_denom;
+  JDIMENSION top = region.top / denom;
+  JDIMENSION left = region.left / denom;
+  JDIMENSION bottom = std::min<JDIMENSION>(
+      (region.top + region.height + denom - 1) / denom, cinfo.output_height);
+  JDIMENSION right = std::min<JDIMENSION>(
+      (region.left + region.width + denom - 1) / denom, cinfo.output_width);
+
+#ifdef LIBJPEG_TURBO_VERSION
+  // Only decode the iMCU columns and rows covering the crop. libjpeg-turbo
+  // aligns the horizontal offset on an iMCU boundary and widens the decoded
+  // region accordingly, the extra columns are sliced away below. The region
+  // is padded so that the chroma upsampling at the edges of the crop sees the
+  // same neighbours as when decoding the whole image.
+  const JDIMENSION padding = 4;
+  JDIMENSION xoffset = left > padding ? left - padding : 0;
+  JDIMENSION width = std::min(right + padding, cinfo.output_width) - xoffset;
+  jpeg_crop_scanline(&cinfo, &xoffset, &width);
+  jpeg_skip_scanlines(&cinfo, top);
+#else
+  JDIMENSION xoffset = 0;
+  JDIMENSION width = cinfo.output_width;
+  std::vector<uint8_t> skipped_row(width * channels);
+  auto skipped_ptr = skipped_row.data();
+  while (cinfo.output_scanline < top) {
+    jpeg_read_scanlines(&cinfo, &skipped_ptr, 1);
+  }
+#endif
 
   int stride = width * channels;
-  auto tensor =
-      torch::empty({int64_t(height), int64_t(width), channels}, torch::kU8);
+  auto tensor = torch::empty(
+      {int64_t(bottom - top), int64_t(width), channels}, torch::kU8);
   auto ptr = tensor.data_ptr<uint8_t>();
-  while (cinfo.output_scanline < cinfo.output_height) {
-    /* jpeg_read_scanlines expects an array of pointers to scanlines.
-     * Here the array is only one element long, but you could ask for
-     * more than one scanline at a time if that's more convenient.
+  while (cinfo.output_scanline < bottom) {
+    jpeg_read_scanlines(&cinfo, &ptr, 1);
+    ptr += stride;
+  }
+
+  // The remaining scanlines are not needed, so the decompression is aborted
+  // rather than finished.
+  jpeg_destroy_decompress(&cinfo);
+  return tensor.narrow(1, left - xoffset, right - left).permute({2, 0, 1});
+}
+
+} // namespace
+
+torch::Tensor decode_jpeg(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  return decode_jpeg_impl(data, mode, size, CropRegion());
+}
+
+torch::Tensor decode_jpeg_crop(
+    const torch::Tensor& data,
+    int64_t top,
+    int64_t left,
+    int64_t height,
+    int64_t width,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      height > 0 && width > 0,
+      "Expected the crop height and width to be positive, got ",
+      height,
+      " and ",
+      width);
+  CropRegion region;
+  region.top = top;
+  region.left = left;
+  region.height = height;
+  region.width = width;
+  return decode_jpeg_impl(data, mode, size, region);
+}
+
+torch::Tensor decode_jpeg_out(
+    const torch::Tensor& data,
+    torch::Tensor out,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      out.dtype() == torch::kU8 && out.device().is_cpu(),
+      "Expected out to be a CPU torch.uint8 tensor");
+  return decode_jpeg_impl(data, mode, size, CropRegion(), out);
+}
+
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor> decode_jpeg_yuv420(
+    const torch::Tensor& data) {
+  // Check that the input tensor dtype is uint8
+  TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
+  // Check that the input tensor is 1-dimensional
+  TORCH_CHECK(
+      data.dim() == 1 && data.numel() > 0,
+      "Expected a non empty 1-dimensional tensor");
+
+  struct jpeg_decompress_struct cinfo;
+  struct torch_jpeg_error_mgr jerr;
+
+  auto datap = data.data_ptr<uint8_t>();
+  // Setup decompression structure
+  cinfo.err = jpeg_std_error(&jerr.pub);
+  jerr.pub.error_exit = torch_jpeg_error_exit;
+  /* Establish the setjmp return context for my_error_exit to use. */
+  if (setjmp(jerr.setjmp_buffer)) {
+    /* If we get here, the JPEG code has signaled an error.
+     * We need to clean up the JPEG object.
      */
+    jpeg_destroy_decompress(&cinfo);
+    TORCH_CHECK(false, jerr.jpegLastErrorMsg);
+  }
+
+  jpeg_create_decompress(&cinfo);
+  torch_jpeg_set_source_mgr(&cinfo, datap, data.numel());
+
+  // read info from header.
+  jpeg_read_header(&cinfo, TRUE);
+
+  int64_t height = cinfo.image_height;
+  int64_t width = cinfo.image_width;
+  int64_t chroma_height = (height + 1) / 2;
+  int64_t chroma_width = (width + 1) / 2;
+
+  auto comp = cinfo.comp_info;
+  bool is_yuv420 = cinfo.jpeg_color_space == JCS_YCbCr &&
+      cinfo.num_components == 3 && comp[0].h_samp_factor == 2 &&
+      comp[0].v_samp_factor == 2 && comp[1].h_samp_factor == 1 &&
+      comp[1].v_samp_factor == 1 && comp[2].h_samp_factor == 1 &&
+      comp[2].v_samp_factor == 1;
+
+  if (is_yuv420) {
+    // The planes are stored as they are in the file: no upsampling nor color
+    // conversion is performed by libjpeg.
+    cinfo.raw_data_out = TRUE;
+    jpeg_start_decompress(&cinfo);
+
+    // libjpeg outputs whole iMCU rows (16 luma rows) of whole DCT blocks, so
+    // the planes are padded accordingly and cropped afterwards.
+    int64_t rows = (height + 15) / 16 * 16;
+    auto y = torch::empty(
+        {rows, int64_t(comp[0].width_in_blocks) * DCTSIZE}, torch::kU8);
+    auto u = torch::empty(
+        {rows / 2, int64_t(comp[1].width_in_blocks) * DCTSIZE}, torch::kU8);
+    auto v = torch::empty(
+        {rows / 2, int64_t(comp[2].width_in_blocks) * DCTSIZE}, torch::kU8);
+
+    JSAMPROW y_rows[16];
+    JSAMPROW u_rows[8];
+    JSAMPROW v_rows[8];
+    JSAMPARRAY planes[3] = {y_rows, u_rows, v_rows};
+    while (cinfo.output_scanline < cinfo.output_height) {
+      int64_t row = cinfo.output_scanline;
+      for (int i = 0; i < 16; ++i) {
+        y_rows[i] = y[row + i].data_ptr<uint8_t>();
+      }
+      for (int i = 0; i < 8; ++i) {
+        u_rows[i] = u[row / 2 + i].data_ptr<uint8_t>();
+        v_rows[i] = v[row / 2 + i].data_ptr<uint8_t>();
+      }
+      jpeg_read_raw_data(&cinfo, planes, 16);
+    }
+
+    jpeg_finish_decompress(&cinfo);
+    jpeg_destroy_decompress(&cinfo);
+    return std::make_tuple(
+        y.narrow(0, 0, height).narrow(1, 0, width).unsqueeze(0),
+        u.narrow(0, 0, chroma_height).narrow(1, 0, chroma_width).unsqueeze(0),
+        v.narrow(0, 0, chroma_height).narrow(1, 0, chroma_width).unsqueeze(0));
+  }
+
+  // Other subsamplings are decoded to full resolution YCbCr without color
+  // conversion, and the chroma planes are then averaged over 2x2 blocks.
+  bool is_gray = cinfo.jpeg_color_space == JCS_GRAYSCALE;
+  if (!is_gray && cinfo.jpeg_color_space != JCS_YCbCr) {
+    jpeg_destroy_decompress(&cinfo);
+    TORCH_CHECK(
+        false, "Only grayscale and YCbCr JPEG images can be decoded to YUV420");
+  }
+  cinfo.out_color_space = is_gray ? JCS_GRAYSCALE : JCS_YCbCr;
+  int channels = is_gray ? 1 : 3;
+  jpeg_start_decompress(&cinfo);
+
+  int stride = width * channels;
+  auto tensor = torch::empty({height, width, channels}, torch::kU8);
+  auto ptr = tensor.data_ptr<uint8_t>();
+  while (cinfo.output_scanline < cinfo.output_height) {
     jpeg_read_scanlines(&cinfo, &ptr, 1);
     ptr += stride;
   }
 
   jpeg_finish_decompress(&cinfo);
   jpeg_destroy_decompress(&cinfo);
-  return tensor.permute({2, 0, 1});
+
+  auto planes = tensor.permute({2, 0, 1});
+  auto y = planes.narrow(0, 0, 1);
+  if (is_gray) {
+    auto chroma =
+        torch::full({1, chroma_height, chroma_width}, 128, torch::kU8);
+    return std::make_tuple(y, chroma, chroma.clone());
+  }
+  auto chroma = at::avg_pool2d(
+                    planes.narrow(0, 1, 2).to(torch::kFloat),
+                    /*kernel_size=*/{2, 2},
+                    /*stride=*/{2, 2},
+                    /*padding=*/{0, 0},
+                    /*ceil_mode=*/true)
+                    .round_()
+                    .to(torch::kU8);
+  return std::make_tuple(y, chroma.narrow(0, 0, 1), chroma.narrow(0, 1, 1));
 }
 
 #endif
 
+std::vector<torch::Tensor> decode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  std::vector<torch::Tensor> output(data.size());
+  // Every image gets its own decompression context, so the images can be
+  // decoded independently on the intra-op thread pool.
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      output[i] = decode_jpeg(data[i], mode, size);
+    }
+  });
+  return output;
+}
+
+torch::Tensor decode_jpegs_out(
+    const std::vector<torch::Tensor>& data,
+    torch::Tensor out,
+    ImageReadMode mode,
+    at::IntArrayRef size) {
+  TORCH_CHECK(
+      out.dim() == 4 && out.size(0) == int64_t(data.size()),
+      "Expected out to be a 4-dimensional tensor with one image per input, got ",
+      out.sizes());
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      decode_jpeg_out(data[i], out[i], mode, size);
+    }
+  });
+  return out;
+}
+
 } // namespace image
 } // namespace vision
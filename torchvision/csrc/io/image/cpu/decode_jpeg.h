@@ -8,7 +8,37 @@ namespace image {
 
 C10_EXPORT torch::Tensor decode_jpeg(
     const torch::Tensor& data,
-    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED);
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT torch::Tensor decode_jpeg_out(
+    const torch::Tensor& data,
+    torch::Tensor out,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT torch::Tensor decode_jpeg_crop(
+    const torch::Tensor& data,
+    int64_t top,
+    int64_t left,
+    int64_t height,
+    int64_t width,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT std::tuple<torch::Tensor, torch::Tensor, torch::Tensor>
+decode_jpeg_yuv420(const torch::Tensor& data);
+
+C10_EXPORT std::vector<torch::Tensor> decode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
+
+C10_EXPORT torch::Tensor decode_jpegs_out(
+    const std::vector<torch::Tensor>& data,
+    torch::Tensor out,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size = {});
 
 } // namespace image
 } // namespace vision
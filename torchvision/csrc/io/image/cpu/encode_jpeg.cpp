@@ -2,6 +2,8 @@
 
 #include "common_jpeg.h"
 
+#include <ATen/Parallel.h>
+
 namespace vision {
 namespace image {
 
@@ -105,5 +107,17 @@ torch::Tensor encode_jpeg(const torch::Tensor& data, int64_t quality) {
 }
 #endif
 
+std::vector<torch::Tensor> encode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    int64_t quality) {
+  std::vector<torch::Tensor> output(data.size());
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      output[i] = encode_jpeg(data[i], quality);
+    }
+  });
+  return output;
+}
+
 } // namespace image
 } // namespace vision
@@ -9,5 +9,9 @@ C10_EXPORT torch::Tensor encode_jpeg(
     const torch::Tensor& data,
     int64_t quality);
 
+C10_EXPORT std::vector<torch::Tensor> encode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    int64_t quality);
+
 } // namespace image
 } // namespace vision
@@ -1,13 +1,19 @@
-#include "encode_jpeg.h"
+#include "encode_png.h"
 
 #include "common_png.h"
 
+#include <ATen/Parallel.h>
+
 namespace vision {
 namespace image {
 
 #if !PNG_FOUND
 
-torch::Tensor encode_png(const torch::Tensor& data, int64_t compression_level) {
+torch::Tensor encode_png(
+    const torch::Tensor& data,
+    int64_t compression_level,
+    const std::string& strategy,
+    const std::string& filter) {
   TORCH_CHECK(
       false, "encode_png: torchvision not compiled with libpng support");
 }
@@ -60,9 +66,56 @@ void torch_png_write_data(
   p->size += length;
 }
 
+int get_compression_strategy(const std::string& strategy) {
+  if (strategy == "default") {
+    return Z_DEFAULT_STRATEGY;
+  } else if (strategy == "filtered") {
+    return Z_FILTERED;
+  } else if (strategy == "huffman_only") {
+    return Z_HUFFMAN_ONLY;
+  } else if (strategy == "rle") {
+    return Z_RLE;
+  } else if (strategy == "fixed") {
+    return Z_FIXED;
+  }
+  TORCH_CHECK(
+      false,
+      "Unsupported compression strategy '",
+      strategy,
+      "', expected one of 'default', 'filtered', 'huffman_only', 'rle' or 'fixed'");
+}
+
+// Returns -1 to keep the filters chosen by libpng
+int get_filters(const std::string& filter) {
+  if (filter == "default") {
+    return -1;
+  } else if (filter == "none") {
+    return PNG_FILTER_NONE;
+  } else if (filter == "sub") {
+    return PNG_FILTER_SUB;
+  } else if (filter == "up") {
+    return PNG_FILTER_UP;
+  } else if (filter == "avg") {
+    return PNG_FILTER_AVG;
+  } else if (filter == "paeth") {
+    return PNG_FILTER_PAETH;
+  } else if (filter == "all") {
+    return PNG_ALL_FILTERS;
+  }
+  TORCH_CHECK(
+      false,
+      "Unsupported filter '",
+      filter,
+      "', expected one of 'default', 'none', 'sub', 'up', 'avg', 'paeth' or 'all'");
+}
+
 } // namespace
 
-torch::Tensor encode_png(const torch::Tensor& data, int64_t compression_level) {
+torch::Tensor encode_png(
+    const torch::Tensor& data,
+    int64_t compression_level,
+    const std::string& strategy,
+    const std::string& filter) {
   // Define compression structures and error handling
   png_structp png_write;
   png_infop info_ptr;
@@ -98,6 +151,9 @@ torch::Tensor encode_png(const torch::Tensor& data, int64_t compression_level) {
       compression_level >= 0 && compression_level <= 9,
       "Compression level should be between 0 and 9");
 
+  int compression_strategy = get_compression_strategy(strategy);
+  int filters = get_filters(filter);
+
   // Check that the input tensor is on CPU
   TORCH_CHECK(data.device() == torch::kCPU, "Input tensor should be on CPU");
 
@@ -142,6 +198,10 @@ torch::Tensor encode_png(const torch::Tensor& data, int64_t compression_level) {
 
   // Set image compression level
   png_set_compression_level(png_write, compression_level);
+  png_set_compression_strategy(png_write, compression_strategy);
+  if (filters >= 0) {
+    png_set_filter(png_write, PNG_FILTER_TYPE_BASE, filters);
+  }
 
   // Write file header
   png_write_info(png_write, info_ptr);
@@ -175,5 +235,19 @@ torch::Tensor encode_png(const torch::Tensor& data, int64_t compression_level) {
 
 #endif
 
+std::vector<torch::Tensor> encode_pngs(
+    const std::vector<torch::Tensor>& data,
+    int64_t compression_level,
+    const std::string& strategy,
+    const std::string& filter) {
+  std::vector<torch::Tensor> output(data.size());
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; ++i) {
+      output[i] = encode_png(data[i], compression_level, strategy, filter);
+    }
+  });
+  return output;
+}
+
 } // namespace image
 } // namespace vision
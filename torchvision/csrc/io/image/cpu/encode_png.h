@@ -7,7 +7,15 @@ namespace image {
 
 C10_EXPORT torch::Tensor encode_png(
     const torch::Tensor& data,
-    int64_t compression_level);
+    int64_t compression_level,
+    const std::string& strategy = "default",
+    const std::string& filter = "default");
+
+C10_EXPORT std::vector<torch::Tensor> encode_pngs(
+    const std::vector<torch::Tensor>& data,
+    int64_t compression_level,
+    const std::string& strategy = "default",
+    const std::string& filter = "default");
 
 } // namespace image
 } // namespace vision
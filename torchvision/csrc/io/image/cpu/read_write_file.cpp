@@ -32,7 +32,7 @@ std::wstring utf8_decode(const std::string& str) {
 } // namespace
 #endif
 
-torch::Tensor read_file(const std::string& filename) {
+torch::Tensor read_file(const std::string& filename, bool mmap) {
 #ifdef _WIN32
   // According to
   // https://docs.microsoft.com/en-us/cpp/c-runtime-library/reference/stat-functions?view=vs-2019,
@@ -52,25 +52,28 @@ torch::Tensor read_file(const std::string& filename) {
 
   TORCH_CHECK(size > 0, "Expected a non empty file");
 
-#ifdef _WIN32
-  // TODO: Once torch::from_file handles UTF-8 paths correctly, we should move
-  // back to use the following implementation since it uses file mapping.
-  //   auto data =
-  //       torch::from_file(filename, /*shared=*/false, /*size=*/size,
-  //       torch::kU8).clone()
-  FILE* infile = _wfopen(fileW.c_str(), L"rb");
+#ifndef _WIN32
+  if (mmap) {
+    // The file is mapped privately: its pages are only loaded when they are
+    // accessed, and they are backed by the page cache instead of being copied
+    // into a new buffer.
+    return torch::from_file(
+        filename, /*shared=*/false, /*size=*/size, torch::kU8);
+  }
+#endif
+
+  // TODO: Once torch::from_file handles UTF-8 paths correctly, we should also
+  // use file mapping on Windows.
+  FILE* infile = detail::open_file(filename, "rb");
 
   TORCH_CHECK(infile != nullptr, "Error opening input file");
 
   auto data = torch::empty({size}, torch::kU8);
   auto dataBytes = data.data_ptr<uint8_t>();
 
-  fread(dataBytes, sizeof(uint8_t), size, infile);
+  size_t bytesRead = fread(dataBytes, sizeof(uint8_t), size, infile);
   fclose(infile);
-#else
-  auto data =
-      torch::from_file(filename, /*shared=*/false, /*size=*/size, torch::kU8);
-#endif
+  TORCH_CHECK(bytesRead == size_t(size), "Error reading input file");
 
   return data;
 }
@@ -86,13 +89,7 @@ void write_file(const std::string& filename, torch::Tensor& data) {
   TORCH_CHECK(data.dim() == 1, "Input data should be a 1-dimensional tensor");
 
   auto fileBytes = data.data_ptr<uint8_t>();
-  auto fileCStr = filename.c_str();
-#ifdef _WIN32
-  auto fileW = utf8_decode(filename);
-  FILE* outfile = _wfopen(fileW.c_str(), L"wb");
-#else
-  FILE* outfile = fopen(fileCStr, "wb");
-#endif
+  FILE* outfile = detail::open_file(filename, "wb");
 
   TORCH_CHECK(outfile != nullptr, "Error opening output file");
 
@@ -100,5 +97,19 @@ void write_file(const std::string& filename, torch::Tensor& data) {
   fclose(outfile);
 }
 
+namespace detail {
+
+FILE* open_file(const std::string& filename, const char* mode) {
+#ifdef _WIN32
+  auto fileW = utf8_decode(filename);
+  auto modeW = utf8_decode(mode);
+  return _wfopen(fileW.c_str(), modeW.c_str());
+#else
+  return fopen(filename.c_str(), mode);
+#endif
+}
+
+} // namespace detail
+
 } // namespace image
 } // namespace vision
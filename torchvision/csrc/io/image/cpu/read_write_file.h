@@ -5,9 +5,18 @@
 namespace vision {
 namespace image {
 
-C10_EXPORT torch::Tensor read_file(const std::string& filename);
+C10_EXPORT torch::Tensor read_file(
+    const std::string& filename,
+    bool mmap = true);
 
 C10_EXPORT void write_file(const std::string& filename, torch::Tensor& data);
 
+namespace detail {
+
+// Opens a file with fopen, supporting UTF-8 paths on Windows.
+FILE* open_file(const std::string& filename, const char* mode);
+
+} // namespace detail
+
 } // namespace image
 } // namespace vision
@@ -17,11 +17,24 @@ namespace image {
 static auto registry = torch::RegisterOperators()
                            .op("image::decode_png", &decode_png)
                            .op("image::encode_png", &encode_png)
+                           .op("image::encode_pngs", &encode_pngs)
                            .op("image::decode_jpeg", &decode_jpeg)
+                           .op("image::decode_jpeg_out", &decode_jpeg_out)
+                           .op("image::decode_jpegs_out", &decode_jpegs_out)
+                           .op("image::decode_jpeg_crop", &decode_jpeg_crop)
+                           .op("image::decode_jpeg_yuv420", &decode_jpeg_yuv420)
+                           .op("image::decode_jpegs", &decode_jpegs)
                            .op("image::encode_jpeg", &encode_jpeg)
+                           .op("image::encode_jpegs", &encode_jpegs)
                            .op("image::read_file", &read_file)
                            .op("image::write_file", &write_file)
                            .op("image::decode_image", &decode_image)
+                           .op("image::decode_images", &decode_images)
+                           .op("image::decode_image_out", &decode_image_out)
+                           .op("image::decode_images_out", &decode_images_out)
+                           .op("image::decode_image_info", &decode_image_info)
+                           .op("image::read_image_info", &read_image_info)
+                           .op("image::read_image_infos", &read_image_infos)
                            .op("image::decode_jpeg_cuda", &decode_jpeg_cuda);
 
 } // namespace image
@@ -1,6 +1,7 @@
 #pragma once
 
 #include "cpu/decode_image.h"
+#include "cpu/decode_image_info.h"
 #include "cpu/decode_jpeg.h"
 #include "cpu/decode_png.h"
 #include "cpu/encode_jpeg.h"
@@ -1,5 +1,8 @@
 #include "video.h"
 
+#include <cmath>
+#include <limits>
+#include <map>
 #include <regex>
 
 namespace vision {
@@ -91,6 +94,54 @@ std::tuple<std::string, long> _parseStream(const std::string& streamString) {
   return std::make_tuple(type_, index_);
 }
 
+AVPixelFormat _parsePixelFormat(const std::string& pixelFormat) {
+  static const std::map<std::string, AVPixelFormat> formats = {
+      {"rgb", AV_PIX_FMT_RGB24},
+      {"gray", AV_PIX_FMT_GRAY8},
+      {"yuv", AV_PIX_FMT_YUV444P},
+  };
+  auto format = formats.find(pixelFormat);
+  TORCH_CHECK(
+      format != formats.end(),
+      "Expected pixel format to be one of [rgb, gray, yuv], got ",
+      pixelFormat);
+  return format->second;
+}
+
+int _parseInterpolation(const std::string& interpolation) {
+  static const std::map<std::string, int> flags = {
+      {"area", SWS_AREA},
+      {"nearest", SWS_POINT},
+      {"fast_bilinear", SWS_FAST_BILINEAR},
+      {"bilinear", SWS_BILINEAR},
+      {"bicubic", SWS_BICUBIC},
+  };
+  auto flag = flags.find(interpolation);
+  TORCH_CHECK(
+      flag != flags.end(),
+      "Expected interpolation to be one of [area, nearest, fast_bilinear, bilinear, bicubic], got ",
+      interpolation);
+  return flag->second;
+}
+
+// Returns the shape of a video frame. Planar formats store each channel
+// separately, so their frames are [C, H, W] instead of [H, W, C].
+std::vector<int64_t> _frameShape(const VideoFormat& format, bool* planar) {
+  int64_t height = format.height;
+  int64_t width = format.width;
+  switch (format.format) {
+    case AV_PIX_FMT_GRAY8:
+      *planar = false;
+      return {height, width, 1};
+    case AV_PIX_FMT_YUV444P:
+      *planar = true;
+      return {3, height, width};
+    default:
+      *planar = false;
+      return {height, width, 3};
+  }
+}
+
 } // namespace
 
 void Video::_getDecoderParams(
@@ -105,6 +156,7 @@ void Video::_getDecoderParams(
   params.timeoutMs = decoderTimeoutMs;
   params.startOffset = videoStartUs;
   params.seekAccuracy = seekFrameMarginUs;
+  params.seekOffset = -1;
   params.headerOnly = false;
 
   params.preventStaleness = false; // not sure what this is about
@@ -117,10 +169,7 @@ void Video::_getDecoderParams(
 
     format.type = TYPE_VIDEO;
     format.stream = -2;
-    format.format.video.width = 0;
-    format.format.video.height = 0;
-    format.format.video.cropImage = 0;
-    format.format.video.format = defaultVideoPixelFormat;
+    format.format.video = videoFormat;
     params.formats.insert(format);
 
     format.type = TYPE_SUBTITLE;
@@ -142,10 +191,7 @@ void Video::_getDecoderParams(
     format.type = stream_type;
     format.stream = stream_id;
     if (stream_type == TYPE_VIDEO) {
-      format.format.video.width = 0;
-      format.format.video.height = 0;
-      format.format.video.cropImage = 0;
-      format.format.video.format = defaultVideoPixelFormat;
+      format.format.video = videoFormat;
     }
     params.formats.insert(format);
   }
@@ -153,6 +199,35 @@ void Video::_getDecoderParams(
 } // _get decoder params
 
 Video::Video(std::string videoPath, std::string stream) {
+  videoFormat.format = defaultVideoPixelFormat;
+  // an empty path leaves the input to initFromMemory
+  if (!videoPath.empty()) {
+    _init(videoPath, stream);
+  }
+}
+
+void Video::initFromMemory(torch::Tensor videoData, std::string stream) {
+  TORCH_CHECK(
+      videoData.dtype() == torch::kU8 && videoData.dim() == 1 &&
+          videoData.is_cpu(),
+      "Expected the video data to be a 1-dimensional CPU torch.uint8 tensor");
+  TORCH_CHECK(videoData.numel() > 0, "Expected non-empty video data");
+  // the decoder reads the data in place, so it has to outlive the decoder
+  inputData = videoData.contiguous();
+  _init("", stream);
+}
+
+DecoderInCallback Video::_getCallback() const {
+  // every decoder initialization consumes its callback, so a new one is created
+  // over the same data each time
+  if (!inputData.defined()) {
+    return nullptr;
+  }
+  return MemoryBuffer::getCallback(
+      inputData.data_ptr<uint8_t>(), inputData.numel());
+}
+
+void Video::_init(std::string videoPath, std::string stream) {
   // parse stream information
   current_stream = _parseStream(stream);
   // note that in the initial call we want to get all streams
@@ -164,12 +239,7 @@ Video::Video(std::string videoPath, std::string stream) {
       true // read all streams
   );
 
-  std::string logMessage, logType;
-
-  // TODO: add read from memory option
   params.uri = videoPath;
-  logType = "file";
-  logMessage = videoPath;
 
   // locals
   std::vector<double> audioFPS, videoFPS;
@@ -181,7 +251,7 @@ Video::Video(std::string videoPath, std::string stream) {
   c10::Dict<std::string, std::vector<double>> subsMetadata;
 
   // calback and metadata defined in struct
-  succeeded = decoder.init(params, std::move(callback), &metadata);
+  succeeded = decoder.init(params, _getCallback(), &metadata);
   if (succeeded) {
     for (const auto& header : metadata) {
       double fps = double(header.fps);
@@ -223,7 +293,7 @@ Video::Video(std::string videoPath, std::string stream) {
         << "Stream index set to " << std::get<1>(current_stream)
         << ". If you encounter trouble, consider switching it to automatic stream discovery. \n";
   }
-} // video
+}
 
 bool Video::setCurrentStream(std::string stream = "video") {
   if ((!stream.empty()) && (_parseStream(stream) != current_stream)) {
@@ -244,8 +314,43 @@ bool Video::setCurrentStream(std::string stream = "video") {
       false // read all streams
   );
 
+  hasPendingFrame = false;
+  pendingFrame.payload.reset();
   // calback and metadata defined in Video.h
-  return (decoder.init(params, std::move(callback), &metadata));
+  return (decoder.init(params, _getCallback(), &metadata));
+}
+
+bool Video::setOutputFormat(
+    int64_t width,
+    int64_t height,
+    int64_t minDimension,
+    int64_t maxDimension,
+    std::string interpolation,
+    std::string pixelFormat) {
+  TORCH_CHECK(
+      width >= 0 && height >= 0 && minDimension >= 0 && maxDimension >= 0,
+      "Expected the output dimensions to be non-negative");
+  videoFormat.width = width;
+  videoFormat.height = height;
+  videoFormat.minDimension = minDimension;
+  videoFormat.maxDimension = maxDimension;
+  videoFormat.swsFlags = _parseInterpolation(interpolation);
+  videoFormat.format = _parsePixelFormat(pixelFormat);
+
+  // the decoder is reinitialized with the new format
+  return setCurrentStream("");
+}
+
+bool Video::setThreads(int64_t numThreads, std::string threadType) {
+  TORCH_CHECK(
+      numThreads >= 0,
+      "Expected num_threads to be non-negative, got ",
+      numThreads);
+  params.numThreads = numThreads;
+  params.threadType = ffmpeg::parseThreadType(threadType);
+
+  // threading can only be configured when the codec is opened
+  return setCurrentStream("");
 }
 
 std::tuple<std::string, int64_t> Video::getCurrentStream() const {
@@ -258,6 +363,10 @@ c10::Dict<std::string, c10::Dict<std::string, std::vector<double>>> Video::
 }
 
 void Video::Seek(double ts) {
+  SeekWithKeyframe(ts, -1);
+}
+
+void Video::SeekWithKeyframe(double ts, double keyframeTs) {
   // initialize the class variables used for seeking and retrurn
   _getDecoderParams(
       ts, // video start
@@ -267,12 +376,29 @@ void Video::Seek(double ts) {
           current_stream)), // stream_id parsed from info above change to -2
       false // read all streams
   );
+  if (keyframeTs >= 0) {
+    // the keyframe is known, e.g. from an index, so seek the demuxer right to
+    // it. Rounding up keeps the position from falling before the keyframe,
+    // which would make the demuxer go back to the previous one.
+    params.seekOffset = std::ceil(keyframeTs * 1e6);
+  }
 
+  hasPendingFrame = false;
+  pendingFrame.payload.reset();
   // calback and metadata defined in Video.h
-  succeeded = decoder.init(params, std::move(callback), &metadata);
+  succeeded = decoder.init(params, _getCallback(), &metadata);
   LOG(INFO) << "Decoder init at seek " << succeeded << "\n";
 }
 
+int64_t Video::_decodeNext(DecoderOutputMessage* out) {
+  if (hasPendingFrame) {
+    hasPendingFrame = false;
+    *out = std::move(pendingFrame);
+    return 0;
+  }
+  return decoder.decode(out, decoderTimeoutMs);
+}
+
 std::tuple<torch::Tensor, double> Video::Next() {
   // if failing to decode simply return a null tensor (note, should we
   // raise an exeption?)
@@ -281,7 +407,7 @@ std::tuple<torch::Tensor, double> Video::Next() {
 
   // decode single frame
   DecoderOutputMessage out;
-  int64_t res = decoder.decode(&out, decoderTimeoutMs);
+  int64_t res = _decodeNext(&out);
   // if successfull
   if (res == 0) {
     frame_pts_s = double(double(out.header.pts) * 1e-6);
@@ -295,12 +421,13 @@ std::tuple<torch::Tensor, double> Video::Next() {
       // note: this can potentially be optimized
       // by having the global tensor that we fill at decode time
       // (would avoid allocations)
-      int outHeight = format.format.video.height;
-      int outWidth = format.format.video.width;
-      int numChannels = 3;
-      outFrame = torch::zeros({outHeight, outWidth, numChannels}, torch::kByte);
+      bool planar;
+      auto frameShape = _frameShape(format.format.video, &planar);
+      outFrame = torch::zeros(frameShape, torch::kByte);
       fillVideoTensor(out, outFrame);
-      outFrame = outFrame.permute({2, 0, 1});
+      if (!planar) {
+        outFrame = outFrame.permute({2, 0, 1});
+      }
 
     } else if (format.type == TYPE_AUDIO) {
       int outAudioChannels = format.format.audio.channels;
@@ -329,14 +456,103 @@ std::tuple<torch::Tensor, double> Video::Next() {
   return std::make_tuple(outFrame, frame_pts_s);
 }
 
+std::tuple<torch::Tensor, torch::Tensor> Video::ReadFrames(int64_t numFrames) {
+  TORCH_CHECK(
+      numFrames >= 0,
+      "Expected a non-negative number of frames, got ",
+      numFrames);
+  return _readFrames(numFrames, std::numeric_limits<double>::infinity());
+}
+
+std::tuple<torch::Tensor, torch::Tensor> Video::ReadUntil(double endPts) {
+  return _readFrames(-1, endPts);
+}
+
+std::tuple<torch::Tensor, torch::Tensor> Video::_readFrames(
+    int64_t maxFrames,
+    double endPts) {
+  TORCH_CHECK(
+      std::get<0>(current_stream) == "video",
+      "Reading batches of frames is only supported for video streams");
+
+  // The frames are decoded straight into a [T, H, W, C] tensor, or a
+  // [T, C, H, W] one for planar formats. It grows geometrically, starting
+  // small so that asking for many more frames than the stream holds does
+  // not allocate them all upfront.
+  torch::Tensor frames;
+  bool planar = false;
+  std::vector<double> framePts;
+  int64_t count = 0;
+  while (maxFrames < 0 || count < maxFrames) {
+    DecoderOutputMessage out;
+    int64_t res = _decodeNext(&out);
+    if (res == ENODATA) {
+      LOG(INFO) << "Decoder ran out of frames (ENODATA)\n";
+      break;
+    } else if (res != 0) {
+      LOG(ERROR) << "Decoder failed with ERROR_CODE " << res;
+      break;
+    }
+
+    double pts = double(out.header.pts) * 1e-6;
+    if (pts > endPts) {
+      // keep the frame for the next read
+      pendingFrame = std::move(out);
+      hasPendingFrame = true;
+      break;
+    }
+
+    auto frameShape = _frameShape(out.header.format.format.video, &planar);
+    if (!frames.defined() || count == frames.size(0)) {
+      int64_t capacity = std::max<int64_t>(2 * count, 16);
+      if (maxFrames >= 0) {
+        capacity = std::min(capacity, maxFrames);
+      }
+      std::vector<int64_t> shape = {capacity};
+      shape.insert(shape.end(), frameShape.begin(), frameShape.end());
+      auto newFrames = torch::empty(shape, torch::kByte);
+      if (count > 0) {
+        newFrames.narrow(0, 0, count).copy_(frames.narrow(0, 0, count));
+      }
+      frames = newFrames;
+    }
+    TORCH_CHECK(
+        frames.sizes().slice(1) == at::IntArrayRef(frameShape),
+        "The shape of the frames changed from ",
+        frames.sizes().slice(1),
+        " to ",
+        at::IntArrayRef(frameShape));
+
+    auto frame = frames[count];
+    fillVideoTensor(out, frame);
+    out.payload.reset();
+    framePts.push_back(pts);
+    ++count;
+  }
+
+  if (!frames.defined()) {
+    frames = torch::empty({0, 0, 0, 3}, torch::kByte);
+  }
+  frames = frames.narrow(0, 0, count);
+  return std::make_tuple(
+      planar ? frames : frames.permute({0, 3, 1, 2}),
+      torch::tensor(framePts, torch::kFloat64));
+}
+
 static auto registerVideo =
     torch::class_<Video>("torchvision", "Video")
         .def(torch::init<std::string, std::string>())
+        .def("init_from_memory", &Video::initFromMemory)
         .def("get_current_stream", &Video::getCurrentStream)
         .def("set_current_stream", &Video::setCurrentStream)
+        .def("set_output_format", &Video::setOutputFormat)
+        .def("set_threads", &Video::setThreads)
         .def("get_metadata", &Video::getStreamMetadata)
         .def("seek", &Video::Seek)
-        .def("next", &Video::Next);
+        .def("seek_with_keyframe", &Video::SeekWithKeyframe)
+        .def("next", &Video::Next)
+        .def("read_frames", &Video::ReadFrames)
+        .def("read_until", &Video::ReadUntil);
 
 } // namespace video
 } // namespace vision
@@ -19,12 +19,26 @@ struct Video : torch::CustomClassHolder {
 
  public:
   Video(std::string videoPath, std::string stream);
+  void initFromMemory(torch::Tensor videoData, std::string stream);
   std::tuple<std::string, int64_t> getCurrentStream() const;
   c10::Dict<std::string, c10::Dict<std::string, std::vector<double>>>
   getStreamMetadata() const;
   void Seek(double ts);
+  // seeks the demuxer straight to the keyframe at keyframeTs, which must
+  // precede ts, instead of searching for it
+  void SeekWithKeyframe(double ts, double keyframeTs);
   bool setCurrentStream(std::string stream);
+  bool setOutputFormat(
+      int64_t width,
+      int64_t height,
+      int64_t minDimension,
+      int64_t maxDimension,
+      std::string interpolation,
+      std::string pixelFormat);
+  bool setThreads(int64_t numThreads, std::string threadType);
   std::tuple<torch::Tensor, double> Next();
+  std::tuple<torch::Tensor, torch::Tensor> ReadFrames(int64_t numFrames);
+  std::tuple<torch::Tensor, torch::Tensor> ReadUntil(double endPts);
 
  private:
   bool succeeded = false; // decoder init flag
@@ -32,6 +46,8 @@ struct Video : torch::CustomClassHolder {
   // retruns the next frame. If it's set, we look at the global seek
   // time in comination with any_frame settings
   double seekTS = -1;
+  // size and pixel format of the decoded video frames
+  VideoFormat videoFormat;
 
   void _getDecoderParams(
       double videoStartS,
@@ -43,9 +59,23 @@ struct Video : torch::CustomClassHolder {
 
   std::map<std::string, std::vector<double>> streamTimeBase; // not used
 
-  DecoderInCallback callback = nullptr;
+  // encoded video, when decoding from memory instead of a file
+  torch::Tensor inputData;
   std::vector<DecoderMetadata> metadata;
 
+  void _init(std::string videoPath, std::string stream);
+  DecoderInCallback _getCallback() const;
+
+  // frame decoded past the end of the last ReadUntil call, returned by the
+  // next read
+  DecoderOutputMessage pendingFrame;
+  bool hasPendingFrame = false;
+
+  int64_t _decodeNext(DecoderOutputMessage* out);
+  std::tuple<torch::Tensor, torch::Tensor> _readFrames(
+      int64_t maxFrames,
+      double endPts);
+
  protected:
   SyncDecoder decoder;
   DecoderParameters params;
@@ -1,6 +1,8 @@
 #include "video_reader.h"
 
 #include <Python.h>
+#include <algorithm>
+#include <map>
 
 #include "../decoder/memory_buffer.h"
 #include "../decoder/sync_decoder.h"
@@ -42,14 +44,23 @@ DecoderParameters getDecoderParams(
     int videoMaxDimension,
     int64_t readAudioStream,
     int audioSamples,
-    int audioChannels) {
+    int audioChannels,
+    int64_t numThreads,
+    const std::string& threadType) {
+  TORCH_CHECK(
+      numThreads >= 0,
+      "Expected num_threads to be non-negative, got ",
+      numThreads);
   DecoderParameters params;
   params.headerOnly = getPtsOnly != 0;
+  params.ptsFromPackets = params.headerOnly;
   params.seekAccuracy = seekFrameMarginUs;
   params.startOffset = videoStartUs;
   params.endOffset = videoEndUs;
   params.timeoutMs = decoderTimeoutMs;
   params.preventStaleness = false;
+  params.numThreads = numThreads;
+  params.threadType = parseThreadType(threadType);
 
   if (readVideoStream == 1) {
     MediaFormat videoFormat(0);
@@ -196,7 +207,9 @@ torch::List<torch::Tensor> readVideo(
     int64_t audioStartPts,
     int64_t audioEndPts,
     int64_t audioTimeBaseNum,
-    int64_t audioTimeBaseDen) {
+    int64_t audioTimeBaseDen,
+    int64_t numThreads,
+    std::string threadType) {
   int64_t videoStartUs, videoEndUs;
 
   offsetsToUs(
@@ -226,7 +239,9 @@ torch::List<torch::Tensor> readVideo(
       maxDimension, // maxDimension
       readAudioStream, // readAudioStream
       audioSamples, // audioSamples
-      audioChannels // audioChannels
+      audioChannels, // audioChannels
+      numThreads, // numThreads
+      threadType // threadType
   );
 
   SyncDecoder decoder;
@@ -271,6 +286,15 @@ torch::List<torch::Tensor> readVideo(
       }
       msg.payload.reset();
     }
+    if (getPtsOnly != 0) {
+      // timestamps read from packets are in decoding order
+      std::stable_sort(
+          videoMessages.begin(),
+          videoMessages.end(),
+          [](const DecoderOutputMessage& a, const DecoderOutputMessage& b) {
+            return a.header.pts < b.header.pts;
+          });
+    }
   } else {
     LOG(ERROR) << "Decoder initialization has failed";
   }
@@ -434,7 +458,9 @@ torch::List<torch::Tensor> probeVideo(
       0, // maxDimension
       1, // readAudioStream
       0, // audioSamples
-      0 // audioChannels
+      0, // audioChannels
+      1, // numThreads, probing only reads headers
+      "auto" // threadType
   );
 
   SyncDecoder decoder;
@@ -582,7 +608,9 @@ torch::List<torch::Tensor> read_video_from_memory(
     int64_t audioStartPts,
     int64_t audioEndPts,
     int64_t audioTimeBaseNum,
-    int64_t audioTimeBaseDen) {
+    int64_t audioTimeBaseDen,
+    int64_t numThreads,
+    std::string threadType) {
   return readVideo(
       false,
       input_video,
@@ -604,7 +632,9 @@ torch::List<torch::Tensor> read_video_from_memory(
       audioStartPts,
       audioEndPts,
       audioTimeBaseNum,
-      audioTimeBaseDen);
+      audioTimeBaseDen,
+      numThreads,
+      threadType);
 }
 
 torch::List<torch::Tensor> read_video_from_file(
@@ -626,7 +656,9 @@ torch::List<torch::Tensor> read_video_from_file(
     int64_t audioStartPts,
     int64_t audioEndPts,
     int64_t audioTimeBaseNum,
-    int64_t audioTimeBaseDen) {
+    int64_t audioTimeBaseDen,
+    int64_t numThreads,
+    std::string threadType) {
   torch::Tensor dummy_input_video = torch::ones({0});
   return readVideo(
       true,
@@ -649,7 +681,9 @@ torch::List<torch::Tensor> read_video_from_file(
       audioStartPts,
       audioEndPts,
       audioTimeBaseNum,
-      audioTimeBaseDen);
+      audioTimeBaseDen,
+      numThreads,
+      threadType);
 }
 
 torch::List<torch::Tensor> probe_video_from_memory(torch::Tensor input_video) {
@@ -662,8 +696,54 @@ torch::List<torch::Tensor> probe_video_from_file(std::string videoPath) {
 }
 
 TORCH_LIBRARY_FRAGMENT(video_reader, m) {
-  m.def("read_video_from_memory", read_video_from_memory);
-  m.def("read_video_from_file", read_video_from_file);
+  // the schema is spelled out so that the trailing threading arguments get
+  // defaults and existing callers keep working
+  m.def(
+      "read_video_from_memory(Tensor input_video, "
+      "float seek_frame_margin, "
+      "int get_pts_only, "
+      "int read_video_stream, "
+      "int width, "
+      "int height, "
+      "int min_dimension, "
+      "int max_dimension, "
+      "int video_start_pts, "
+      "int video_end_pts, "
+      "int video_timebase_num, "
+      "int video_timebase_den, "
+      "int read_audio_stream, "
+      "int audio_samples, "
+      "int audio_channels, "
+      "int audio_start_pts, "
+      "int audio_end_pts, "
+      "int audio_timebase_num, "
+      "int audio_timebase_den, "
+      "int num_threads=1, "
+      "str thread_type=\"auto\") -> Tensor[]",
+      read_video_from_memory);
+  m.def(
+      "read_video_from_file(str video_path, "
+      "float seek_frame_margin, "
+      "int get_pts_only, "
+      "int read_video_stream, "
+      "int width, "
+      "int height, "
+      "int min_dimension, "
+      "int max_dimension, "
+      "int video_start_pts, "
+      "int video_end_pts, "
+      "int video_timebase_num, "
+      "int video_timebase_den, "
+      "int read_audio_stream, "
+      "int audio_samples, "
+      "int audio_channels, "
+      "int audio_start_pts, "
+      "int audio_end_pts, "
+      "int audio_timebase_num, "
+      "int audio_timebase_den, "
+      "int num_threads=1, "
+      "str thread_type=\"auto\") -> Tensor[]",
+      read_video_from_file);
   m.def("probe_video_from_memory", probe_video_from_memory);
   m.def("probe_video_from_file", probe_video_from_file);
 }
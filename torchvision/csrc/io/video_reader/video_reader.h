@@ -24,7 +24,9 @@ torch::List<torch::Tensor> read_video_from_memory(
     int64_t audioStartPts,
     int64_t audioEndPts,
     int64_t audioTimeBaseNum,
-    int64_t audioTimeBaseDen);
+    int64_t audioTimeBaseDen,
+    int64_t numThreads,
+    std::string threadType);
 
 torch::List<torch::Tensor> read_video_from_file(
     std::string videoPath,
@@ -45,7 +47,9 @@ torch::List<torch::Tensor> read_video_from_file(
     int64_t audioStartPts,
     int64_t audioEndPts,
     int64_t audioTimeBaseNum,
-    int64_t audioTimeBaseDen);
+    int64_t audioTimeBaseDen,
+    int64_t numThreads,
+    std::string threadType);
 
 torch::List<torch::Tensor> probe_video_from_memory(torch::Tensor input_video);
 
@@ -1,10 +1,14 @@
 from .vision import VisionDataset
+from ..io.image import ImageReadMode, ImageReader, decode_image, decode_image_info, decode_jpeg_crop, read_file
+from ..transforms import functional as F, InterpolationMode, RandomResizedCrop
+from ..transforms.transforms import _get_resized_crop_params
 
 from PIL import Image
 
 import os
 import os.path
-from typing import Any, Callable, cast, Dict, List, Optional, Tuple
+import torch.utils.data as data
+from typing import Any, Callable, cast, Dict, Iterator, List, Optional, Tuple
 
 
 def has_file_allowed_extension(filename: str, extensions: Tuple[str, ...]) -> bool:
@@ -269,6 +273,107 @@ def default_loader(path: str) -> Any:
         return pil_loader(path)
 
 
+class RandomResizedCropLoader:
+    """Image loader applying :class:`~torchvision.transforms.RandomResizedCrop` while decoding.
+
+    The crop is sampled from the image size found in the file header, before the
+    image is decoded. JPEG images are then decoded with
+    :func:`~torchvision.io.decode_jpeg_crop`, which only decodes the cropped region
+    at the smallest scale that is still at least as large as ``size``. Other images
+    are fully decoded before being cropped.
+
+    It can be used as the ``loader`` of an :class:`ImageFolder` in place of a
+    ``RandomResizedCrop`` transform. The loaded images are uint8 tensors.
+
+    Args:
+        size (int or sequence): expected output size of the crop, for each edge.
+            See :class:`~torchvision.transforms.RandomResizedCrop`.
+        scale (tuple of float): Specifies the lower and upper bounds for the random area of the crop,
+            before resizing. The scale is defined with respect to the area of the original image.
+        ratio (tuple of float): lower and upper bounds for the random aspect ratio of the crop, before
+            resizing.
+        interpolation (InterpolationMode): Desired interpolation enum defined by
+            :class:`torchvision.transforms.InterpolationMode`. Default is ``InterpolationMode.BILINEAR``.
+        mode (ImageReadMode): the read mode used for optionally converting the image.
+            Default: ``ImageReadMode.RGB``.
+    """
+
+    def __init__(
+            self,
+            size: Any,
+            scale: Tuple[float, float] = (0.08, 1.0),
+            ratio: Tuple[float, float] = (3. / 4., 4. / 3.),
+            interpolation: InterpolationMode = InterpolationMode.BILINEAR,
+            mode: ImageReadMode = ImageReadMode.RGB,
+    ) -> None:
+        # Reuse the argument checks of the transform
+        crop = RandomResizedCrop(size, scale, ratio, interpolation)
+        self.size = list(crop.size)
+        self.scale = crop.scale
+        self.ratio = crop.ratio
+        self.interpolation = crop.interpolation
+        self.mode = mode
+
+    def __call__(self, path: str) -> Any:
+        data = read_file(path)
+        height, width, _, format = decode_image_info(data)
+
+        top, left, crop_height, crop_width = _get_resized_crop_params(height, width, self.scale, self.ratio)
+        if format == "jpeg":
+            img = decode_jpeg_crop(data, top, left, crop_height, crop_width, mode=self.mode, size=self.size)
+        else:
+            img = F.crop(decode_image(data, mode=self.mode), top, left, crop_height, crop_width)
+        return F.resize(img, self.size, self.interpolation)
+
+
+class PrefetchDataset(VisionDataset, data.IterableDataset):
+    """Iterable view of a :class:`DatasetFolder` prefetching its samples in index order.
+
+    The samples are loaded ahead of time by an :class:`~torchvision.io.ImageReader`,
+    which keeps up to ``max_in_flight`` loads in flight in background threads, so that
+    slow storage doesn't stall the iteration. The samples are yielded in the order of
+    their indices, transformed by the ``transform`` and ``target_transform`` of the
+    wrapped dataset.
+
+    When it is used with a :class:`~torch.utils.data.DataLoader` with several workers,
+    each worker iterates over its own interleaved subset of the indices.
+
+    Args:
+        dataset (DatasetFolder): the dataset to iterate over. Only its ``samples``,
+            ``loader``, ``transform`` and ``target_transform`` attributes are used.
+        num_workers (int, optional): number of threads loading the samples.
+            Default: ``None``, which uses ``max_in_flight`` threads.
+        max_in_flight (int): maximum number of samples loaded ahead. Default: 16
+    """
+
+    def __init__(self, dataset: DatasetFolder, num_workers: Optional[int] = None, max_in_flight: int = 16) -> None:
+        super(PrefetchDataset, self).__init__(dataset.root)
+        self.dataset = dataset
+        self.num_workers = num_workers
+        self.max_in_flight = max_in_flight
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        samples = self.dataset.samples
+        worker_info = data.get_worker_info()
+        if worker_info is not None:
+            samples = samples[worker_info.id::worker_info.num_workers]
+
+        paths = (path for path, _ in samples)
+        reader = ImageReader(paths, num_workers=self.num_workers, max_in_flight=self.max_in_flight,
+                             loader=self.dataset.loader)
+        transform = self.dataset.transform
+        target_transform = self.dataset.target_transform
+        for sample, (_, target) in zip(reader, samples):
+            if transform is not None:
+                sample = transform(sample)
+            if target_transform is not None:
+                target = target_transform(target)
+            yield sample, target
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+
 class ImageFolder(DatasetFolder):
     """A generic data loader where the images are arranged in this way by default: ::
 
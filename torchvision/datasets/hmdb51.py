@@ -2,7 +2,7 @@ import glob
 import os
 
 from .folder import find_classes, make_dataset
-from .video_utils import VideoClips
+from .video_utils import VideoClips, get_frames_path
 from .vision import VisionDataset
 
 
@@ -34,6 +34,15 @@ class HMDB51(VisionDataset):
             otherwise from the ``test`` split.
         transform (callable, optional): A function/transform that takes in a TxHxWxC video
             and returns a transformed version.
+        metadata_cache_dir (str, optional): directory in which VideoClips caches the timestamps
+            of the videos, so that they are only computed once for each video
+        frames_root (str, optional): directory of the frames extracted from the videos of
+            ``root`` with :func:`~torchvision.datasets.video_utils.extract_frames`. If given,
+            the clips are read from the frames instead of being decoded from the videos, and
+            they have no audio.
+        decoder_cache_size (int, optional): number of videos that VideoClips keeps open in each
+            process, to read the clips of a recently read video faster, see ``group_by_video`` of
+            :class:`~torchvision.datasets.samplers.RandomClipSampler`. Default: 0
 
     Returns:
         tuple: A 3-tuple with the following entries:
@@ -55,7 +64,8 @@ class HMDB51(VisionDataset):
     def __init__(self, root, annotation_path, frames_per_clip, step_between_clips=1,
                  frame_rate=None, fold=1, train=True, transform=None,
                  _precomputed_metadata=None, num_workers=1, _video_width=0,
-                 _video_height=0, _video_min_dimension=0, _audio_samples=0):
+                 _video_height=0, _video_min_dimension=0, _audio_samples=0, metadata_cache_dir=None,
+                 frames_root=None, decoder_cache_size=0):
         super(HMDB51, self).__init__(root)
         if fold not in (1, 2, 3):
             raise ValueError("fold should be between 1 and 3, got {}".format(fold))
@@ -69,8 +79,11 @@ class HMDB51(VisionDataset):
         )
 
         video_paths = [path for (path, _) in self.samples]
+        clip_paths = video_paths
+        if frames_root is not None:
+            clip_paths = [get_frames_path(path, self.root, frames_root) for path in video_paths]
         video_clips = VideoClips(
-            video_paths,
+            clip_paths,
             frames_per_clip,
             step_between_clips,
             frame_rate,
@@ -80,6 +93,8 @@ class HMDB51(VisionDataset):
             _video_height=_video_height,
             _video_min_dimension=_video_min_dimension,
             _audio_samples=_audio_samples,
+            metadata_cache_dir=metadata_cache_dir,
+            decoder_cache_size=decoder_cache_size,
         )
         # we bookkeep the full version of video clips because we want to be able
         # to return the meta data of full version rather than the subset version of
@@ -123,6 +138,21 @@ class HMDB51(VisionDataset):
 
     def __getitem__(self, idx):
         video, audio, _, video_idx = self.video_clips.get_clip(idx)
+        return self._make_sample(video, audio, video_idx)
+
+    def iter_clips(self, video_indices=None):
+        """
+        Iterates over the samples of the dataset in order, reading each video only once,
+        see :meth:`VideoClips.iter_clips <torchvision.datasets.video_utils.VideoClips.iter_clips>`.
+
+        Args:
+            video_indices (List[int], optional): indices of the videos whose samples are
+                read. By default, all the videos are read.
+        """
+        for video, audio, _, video_idx in self.video_clips.iter_clips(video_indices):
+            yield self._make_sample(video, audio, video_idx)
+
+    def _make_sample(self, video, audio, video_idx):
         sample_index = self.indices[video_idx]
         _, class_index = self.samples[sample_index]
 
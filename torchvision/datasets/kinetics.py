@@ -11,7 +11,7 @@ from multiprocessing import Pool
 
 from .utils import download_and_extract_archive, download_url, verify_str_arg, check_integrity
 from .folder import find_classes, make_dataset
-from .video_utils import VideoClips
+from .video_utils import VideoClips, get_frames_path
 from .vision import VisionDataset
 
 
@@ -59,6 +59,15 @@ class Kinetics(VisionDataset):
             and returns a transformed version.
         download (bool): Download the official version of the dataset to root folder.
         num_workers (int): Use multiple workers for VideoClips creation
+        metadata_cache_dir (str, optional): directory in which VideoClips caches the timestamps
+            of the videos, so that they are only computed once for each video
+        frames_root (str, optional): directory of the frames extracted from the videos of
+            ``root`` with :func:`~torchvision.datasets.video_utils.extract_frames`. If given,
+            the clips are read from the frames instead of being decoded from the videos, and
+            they have no audio.
+        decoder_cache_size (int): number of videos that VideoClips keeps open in each process,
+            to read the clips of a recently read video faster, see ``group_by_video`` of
+            :class:`~torchvision.datasets.samplers.RandomClipSampler`. Default: 0
         num_download_workers (int): Use multiprocessing in order to speed up download.
 
     Returns:
@@ -97,6 +106,9 @@ class Kinetics(VisionDataset):
         download: bool = False,
         num_download_workers: int = 1,
         num_workers: int = 1,
+        metadata_cache_dir: Optional[str] = None,
+        frames_root: Optional[str] = None,
+        decoder_cache_size: int = 0,
         _precomputed_metadata: Optional[Dict] = None,
         _video_width: int = 0,
         _video_height: int = 0,
@@ -130,6 +142,8 @@ class Kinetics(VisionDataset):
         self.classes, class_to_idx = find_classes(self.split_folder)
         self.samples = make_dataset(self.split_folder, class_to_idx, extensions, is_valid_file=None)
         video_list = [x[0] for x in self.samples]
+        if frames_root is not None:
+            video_list = [get_frames_path(video_path, self.root, frames_root) for video_path in video_list]
         self.video_clips = VideoClips(
             video_list,
             frames_per_clip,
@@ -142,6 +156,8 @@ class Kinetics(VisionDataset):
             _video_min_dimension=_video_min_dimension,
             _audio_samples=_audio_samples,
             _audio_channels=_audio_channels,
+            metadata_cache_dir=metadata_cache_dir,
+            decoder_cache_size=decoder_cache_size,
         )
         self.transform = transform
 
@@ -236,6 +252,21 @@ class Kinetics(VisionDataset):
 
     def __getitem__(self, idx):
         video, audio, info, video_idx = self.video_clips.get_clip(idx)
+        return self._make_sample(video, audio, video_idx)
+
+    def iter_clips(self, video_indices=None):
+        """
+        Iterates over the samples of the dataset in order, reading each video only once,
+        see :meth:`VideoClips.iter_clips <torchvision.datasets.video_utils.VideoClips.iter_clips>`.
+
+        Args:
+            video_indices (List[int], optional): indices of the videos whose samples are
+                read. By default, all the videos are read.
+        """
+        for video, audio, _, video_idx in self.video_clips.iter_clips(video_indices):
+            yield self._make_sample(video, audio, video_idx)
+
+    def _make_sample(self, video, audio, video_idx):
         if not self._legacy:
             # [T,H,W,C] --> [T,C,H,W]
             video = video.permute(0, 3, 1, 2)
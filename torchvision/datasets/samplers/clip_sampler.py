@@ -126,8 +126,7 @@ class UniformClipSampler(Sampler):
         idxs = []
         s = 0
         # select num_clips_per_video for each video, uniformly spaced
-        for c in self.video_clips.clips:
-            length = len(c)
+        for length in self.video_clips.num_clips_per_video().tolist():
             if length == 0:
                 # corner case where video decoding fails
                 continue
@@ -142,9 +141,7 @@ class UniformClipSampler(Sampler):
         return iter(cast(List[int], torch.cat(idxs).tolist()))
 
     def __len__(self) -> int:
-        return sum(
-            self.num_clips_per_video for c in self.video_clips.clips if len(c) > 0
-        )
+        return self.num_clips_per_video * int((self.video_clips.num_clips_per_video() > 0).sum())
 
 
 class RandomClipSampler(Sampler):
@@ -154,28 +151,94 @@ class RandomClipSampler(Sampler):
     Args:
         video_clips (VideoClips): video clips to sample from
         max_clips_per_video (int): maximum number of clips to be sampled per video
+        group_by_video (bool): if True, the clips of each video are sampled one after
+            the other, in random order, and only the order of the videos is shuffled.
+            The clips of a video then mostly end up in the same batch, which a data
+            loader worker reads from a single open video when ``video_clips`` has a
+            ``decoder_cache_size``, at the cost of less diverse batches. Default: False
+        num_replicas (int, optional): with ``group_by_video``, number of processes
+            participating in distributed training. The videos are then split between
+            the processes, so that the clips of a video are all sampled by the same
+            process, and every process samples the same number of clips. It replaces
+            :class:`DistributedSampler`, which would split the clips of each video
+            between the processes. Call :meth:`set_epoch` at the start of every epoch,
+            as the videos are shuffled the same way on every process. Default: None
+        rank (int, optional): rank of the current process within ``num_replicas``.
+            Default: None
     """
-    def __init__(self, video_clips: VideoClips, max_clips_per_video: int) -> None:
+    def __init__(
+            self,
+            video_clips: VideoClips,
+            max_clips_per_video: int,
+            group_by_video: bool = False,
+            num_replicas: Optional[int] = None,
+            rank: Optional[int] = None,
+    ) -> None:
         if not isinstance(video_clips, VideoClips):
             raise TypeError("Expected video_clips to be an instance of VideoClips, "
                             "got {}".format(type(video_clips)))
+        if num_replicas is not None:
+            if not group_by_video:
+                raise ValueError("num_replicas is only supported with group_by_video=True")
+            if rank is None or not 0 <= rank < num_replicas:
+                raise ValueError("Expected a rank in [0, {}), got {}".format(num_replicas, rank))
         self.video_clips = video_clips
         self.max_clips_per_video = max_clips_per_video
+        self.group_by_video = group_by_video
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
 
     def __iter__(self) -> Iterator[int]:
         idxs = []
         s = 0
         # select at most max_clips_per_video for each video, randomly
-        for c in self.video_clips.clips:
-            length = len(c)
+        for length in self.video_clips.num_clips_per_video().tolist():
             size = min(length, self.max_clips_per_video)
             sampled = torch.randperm(length)[:size] + s
             s += length
             idxs.append(sampled)
+        if not idxs:
+            return iter([])
+        if self.num_replicas is not None:
+            return iter(self._shard_videos(idxs))
+        if self.group_by_video:
+            # shuffle the videos only
+            return iter(torch.cat([idxs[i] for i in torch.randperm(len(idxs)).tolist()]).tolist())
         idxs_ = torch.cat(idxs)
         # shuffle all clips randomly
         perm = torch.randperm(len(idxs_))
         return iter(idxs_[perm].tolist())
 
+    def _shard_videos(self, idxs: List[torch.Tensor]) -> List[int]:
+        num_replicas = cast(int, self.num_replicas)
+        # every process shuffles the videos the same way, and gives each of them
+        # to the process that has the fewest clips so far
+        g = torch.Generator()
+        g.manual_seed(self.epoch)
+        shards: List[List[torch.Tensor]] = [[] for _ in range(num_replicas)]
+        sizes = [0] * num_replicas
+        for i in torch.randperm(len(idxs), generator=g).tolist():
+            if len(idxs[i]) == 0:
+                continue
+            rank = sizes.index(min(sizes))
+            shards[rank].append(idxs[i])
+            sizes[rank] += len(idxs[i])
+
+        num_samples = len(self)
+        # with fewer videos than processes, the processes left without videos
+        # sample from all of them
+        shard = torch.cat(shards[cast(int, self.rank)] or idxs)
+        if len(shard) == 0:
+            return []
+        # repeat the clips of the shard to make the processes evenly sized
+        return shard.repeat(int(math.ceil(num_samples / len(shard))))[:num_samples].tolist()
+
     def __len__(self) -> int:
-        return sum(min(len(c), self.max_clips_per_video) for c in self.video_clips.clips)
+        num_samples = int(self.video_clips.num_clips_per_video().clamp(max=self.max_clips_per_video).sum())
+        if self.num_replicas is not None:
+            num_samples = int(math.ceil(num_samples * 1.0 / self.num_replicas))
+        return num_samples
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
@@ -1,7 +1,7 @@
 import os
 
 from .folder import find_classes, make_dataset
-from .video_utils import VideoClips
+from .video_utils import VideoClips, get_frames_path
 from .vision import VisionDataset
 
 
@@ -32,6 +32,15 @@ class UCF101(VisionDataset):
             otherwise from the ``test`` split.
         transform (callable, optional): A function/transform that  takes in a TxHxWxC video
             and returns a transformed version.
+        metadata_cache_dir (str, optional): directory in which VideoClips caches the timestamps
+            of the videos, so that they are only computed once for each video
+        frames_root (str, optional): directory of the frames extracted from the videos of
+            ``root`` with :func:`~torchvision.datasets.video_utils.extract_frames`. If given,
+            the clips are read from the frames instead of being decoded from the videos, and
+            they have no audio.
+        decoder_cache_size (int, optional): number of videos that VideoClips keeps open in each
+            process, to read the clips of a recently read video faster, see ``group_by_video`` of
+            :class:`~torchvision.datasets.samplers.RandomClipSampler`. Default: 0
 
     Returns:
         tuple: A 3-tuple with the following entries:
@@ -45,7 +54,8 @@ class UCF101(VisionDataset):
     def __init__(self, root, annotation_path, frames_per_clip, step_between_clips=1,
                  frame_rate=None, fold=1, train=True, transform=None,
                  _precomputed_metadata=None, num_workers=1, _video_width=0,
-                 _video_height=0, _video_min_dimension=0, _audio_samples=0):
+                 _video_height=0, _video_min_dimension=0, _audio_samples=0, metadata_cache_dir=None,
+                 frames_root=None, decoder_cache_size=0):
         super(UCF101, self).__init__(root)
         if not 1 <= fold <= 3:
             raise ValueError("fold should be between 1 and 3, got {}".format(fold))
@@ -57,8 +67,11 @@ class UCF101(VisionDataset):
         self.classes, class_to_idx = find_classes(self.root)
         self.samples = make_dataset(self.root, class_to_idx, extensions, is_valid_file=None)
         video_list = [x[0] for x in self.samples]
+        clip_paths = video_list
+        if frames_root is not None:
+            clip_paths = [get_frames_path(path, self.root, frames_root) for path in video_list]
         video_clips = VideoClips(
-            video_list,
+            clip_paths,
             frames_per_clip,
             step_between_clips,
             frame_rate,
@@ -68,6 +81,8 @@ class UCF101(VisionDataset):
             _video_height=_video_height,
             _video_min_dimension=_video_min_dimension,
             _audio_samples=_audio_samples,
+            metadata_cache_dir=metadata_cache_dir,
+            decoder_cache_size=decoder_cache_size,
         )
         # we bookkeep the full version of video clips because we want to be able
         # to return the meta data of full version rather than the subset version of
@@ -100,6 +115,21 @@ class UCF101(VisionDataset):
 
     def __getitem__(self, idx):
         video, audio, info, video_idx = self.video_clips.get_clip(idx)
+        return self._make_sample(video, audio, video_idx)
+
+    def iter_clips(self, video_indices=None):
+        """
+        Iterates over the samples of the dataset in order, reading each video only once,
+        see :meth:`VideoClips.iter_clips <torchvision.datasets.video_utils.VideoClips.iter_clips>`.
+
+        Args:
+            video_indices (List[int], optional): indices of the videos whose samples are
+                read. By default, all the videos are read.
+        """
+        for video, audio, _, video_idx in self.video_clips.iter_clips(video_indices):
+            yield self._make_sample(video, audio, video_idx)
+
+    def _make_sample(self, video, audio, video_idx):
         label = self.samples[self.indices[video_idx]][1]
 
         if self.transform is not None:
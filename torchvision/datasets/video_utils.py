@@ -1,16 +1,29 @@
-import bisect
+import hashlib
+import json
 import math
+import os
+import shutil
+import struct
 import warnings
+from collections import OrderedDict
 from fractions import Fraction
-from typing import List
+from functools import partial
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import torch
 from torchvision.io import (
+    ImageReadMode,
     _probe_video_from_file,
     _read_video_from_file,
+    decode_jpeg,
+    encode_jpeg,
+    read_file,
     read_video,
     read_video_timestamps,
+    write_file,
 )
+from torchvision.io.video import _open_container, _read_video_from_container, _read_video_ranges
 
 from .utils import tqdm
 
@@ -62,7 +75,368 @@ class _VideoTimestampsDataset(object):
         return len(self.video_paths)
 
     def __getitem__(self, idx):
-        return read_video_timestamps(self.video_paths[idx])
+        path = self.video_paths[idx]
+        if _is_frames_path(path):
+            try:
+                frames = _Frames(path)
+            except (OSError, ValueError) as e:
+                warnings.warn(f"Failed to open the frames of {path}: {e}")
+                return [], None
+            # the timestamps of extracted frames are their indices
+            return torch.arange(frames.num_frames), frames.fps
+        return read_video_timestamps(path)
+
+
+_FRAMES_EXTENSION = ".frames"
+_FRAMES_INFO_FILE = "info.json"
+_FRAMES_MAGIC = b"TVFRAME1"
+# magic, fps, number of frames, height and width at the end of a packed frames file
+_FRAMES_TRAILER = struct.Struct("<8sdqqq")
+# number of frames encoded at once during the extraction
+_FRAMES_BATCH_SIZE = 32
+
+
+def _frame_file_name(idx: int) -> str:
+    return "{:06d}.jpg".format(idx)
+
+
+def _is_frames_path(path: str) -> bool:
+    # a directory only holds frames once their info file is written
+    return path.endswith(_FRAMES_EXTENSION) or os.path.isfile(os.path.join(path, _FRAMES_INFO_FILE))
+
+
+def get_frames_path(video_path: str, root: str, frames_root: str) -> str:
+    """
+    Returns the path of the frames that :func:`extract_frames` extracted from a video.
+
+    Args:
+        video_path (str): path to the video file
+        root (str): directory of the videos given to :func:`extract_frames`
+        frames_root (str): directory of the extracted frames given to :func:`extract_frames`
+
+    Returns:
+        path (str): the packed frames file if it exists, otherwise the frames directory
+    """
+    name = os.path.join(frames_root, os.path.splitext(os.path.relpath(video_path, root))[0])
+    packed_path = name + _FRAMES_EXTENSION
+    return packed_path if os.path.exists(packed_path) else name
+
+
+class _Frames(object):
+    """
+    JPEG frames extracted from a video by extract_frames, either in a directory
+    with one file per frame or packed in a single file followed by an index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data: Optional[torch.Tensor] = None
+        self._offsets: List[int] = []
+        if os.path.isdir(path):
+            with open(os.path.join(path, _FRAMES_INFO_FILE)) as f:
+                info = json.load(f)
+            self.fps = info["video_fps"]
+            self.num_frames = info["num_frames"]
+            self.height, self.width = info["height"], info["width"]
+            return
+
+        # the file is memory-mapped, so only the frames which are read are loaded
+        data = read_file(path)
+        if len(data) < _FRAMES_TRAILER.size:
+            raise ValueError(f"{path} is not a packed frames file")
+        magic, self.fps, self.num_frames, self.height, self.width = _FRAMES_TRAILER.unpack(
+            data[-_FRAMES_TRAILER.size:].numpy().tobytes()
+        )
+        if magic != _FRAMES_MAGIC:
+            raise ValueError(f"{path} is not a packed frames file")
+        index_end = len(data) - _FRAMES_TRAILER.size
+        index = data[index_end - 8 * (self.num_frames + 1):index_end].numpy().tobytes()
+        self._offsets = list(struct.unpack(f"<{self.num_frames + 1}q", index))
+        self._data = data
+
+    def read(self, frame_idxs: List[int]) -> torch.Tensor:
+        if self._data is None:
+            encoded = [read_file(os.path.join(self.path, _frame_file_name(i)), mmap=False) for i in frame_idxs]
+        else:
+            encoded = [self._data[self._offsets[i]:self._offsets[i + 1]] for i in frame_idxs]
+        # the frames are decoded as a batch, directly into the [T, H, W, C] clip
+        video = torch.empty((len(frame_idxs), self.height, self.width, 3), dtype=torch.uint8)
+        decode_jpeg(encoded, mode=ImageReadMode.RGB, out=video.permute(0, 3, 1, 2))
+        return video
+
+    def close(self) -> None:
+        self._data = None
+
+
+def _extract_video_frames(
+    paths: Tuple[str, str], frame_rate: Optional[float], short_side: Optional[int], packed: bool, quality: int
+) -> Optional[str]:
+    # extracts the frames of a video in a worker of extract_frames, returns an error message if it fails
+    video_path, output_path = paths
+    container = _open_container(video_path)
+    if container is None:
+        return f"Failed to open {video_path}"
+
+    # the frames are written to a temporary path which is renamed when they are
+    # complete, so that an interrupted extraction resumes with the missing videos
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        if not container.streams.video or container.streams.video[0].average_rate is None:
+            return f"{video_path} has no video stream with a frame rate"
+        stream = container.streams.video[0]
+        fps = float(stream.average_rate)
+        # the frames are resampled like VideoClips resamples the frames of a video
+        step = 1.0 if frame_rate is None else fps / frame_rate
+
+        width = height = 0
+        num_frames = 0
+        batch: List[torch.Tensor] = []
+        offsets = [0]
+        out = open(tmp_path, "wb") if packed else None
+        if out is None:
+            os.makedirs(tmp_path)
+
+        def write_batch():
+            nonlocal num_frames
+            for data in encode_jpeg(batch, quality=quality):
+                if out is None:
+                    write_file(os.path.join(tmp_path, _frame_file_name(num_frames)), data)
+                else:
+                    out.write(data.numpy().tobytes())
+                    offsets.append(offsets[-1] + len(data))
+                num_frames += 1
+            batch.clear()
+
+        try:
+            next_idx = 0
+            for idx, frame in enumerate(container.decode(stream)):
+                if idx == 0:
+                    width, height = frame.width, frame.height
+                    if short_side is not None:
+                        if width < height:
+                            width, height = short_side, int(short_side * height / width)
+                        else:
+                            width, height = int(short_side * width / height), short_side
+                image = None
+                while math.floor(next_idx * step) == idx:
+                    if image is None:
+                        image = frame.to_ndarray(width=width, height=height, format="rgb24")
+                        image = torch.from_numpy(image).permute(2, 0, 1).contiguous()
+                    batch.append(image)
+                    next_idx += 1
+                if len(batch) >= _FRAMES_BATCH_SIZE:
+                    write_batch()
+            if batch:
+                write_batch()
+
+            info = {"video_fps": frame_rate or fps, "num_frames": num_frames, "height": height, "width": width}
+            if out is None:
+                with open(os.path.join(tmp_path, _FRAMES_INFO_FILE), "w") as f:
+                    json.dump(info, f)
+            else:
+                out.write(torch.as_tensor(offsets, dtype=torch.int64).numpy().astype("<i8").tobytes())
+                out.write(_FRAMES_TRAILER.pack(_FRAMES_MAGIC, info["video_fps"], num_frames, height, width))
+        finally:
+            if out is not None:
+                out.close()
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        return f"Failed to extract the frames of {video_path}: {e}"
+    finally:
+        container.close()
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return None
+
+
+def extract_frames(
+    video_paths: List[str],
+    root: str,
+    frames_root: str,
+    frame_rate: Optional[float] = None,
+    short_side: Optional[int] = None,
+    packed: bool = False,
+    quality: int = 90,
+    num_workers: int = 1,
+) -> List[str]:
+    """
+    Decodes videos once and stores their frames as JPEG images, so that :class:`VideoClips`
+    reads a clip by decoding a few small JPEG images instead of the group of pictures of
+    the video around the clip.
+
+    The frames of ``root/path/video.avi`` are stored either in the directory
+    ``frames_root/path/video`` with a file per frame, or in the single file
+    ``frames_root/path/video.frames`` which packs the frames with an index. The frames
+    of the videos which were already extracted are not extracted again, so an
+    interrupted extraction resumes where it stopped. Pass the paths returned by
+    :func:`get_frames_path` to :class:`VideoClips` to read the clips from the frames,
+    which are decoded with the batched JPEG decoder. The audio is not extracted.
+
+    Args:
+        video_paths (List[str]): paths to the video files
+        root (str): directory containing the videos, whose layout is kept in ``frames_root``
+        frames_root (str): directory in which the frames are stored
+        frame_rate (float, optional): if specified, the videos are resampled to this frame rate
+        short_side (int, optional): if specified, the frames are resized so that their
+            smaller edge has this size, keeping their aspect ratio
+        packed (bool): if ``True``, the frames of each video are stored in a single file
+            instead of a directory, which uses fewer files and inodes. (default: ``False``)
+        quality (int): quality of the JPEG images, between 1 and 100. (default: 90)
+        num_workers (int): number of processes extracting the videos in parallel. (default: 1)
+
+    Returns:
+        frames_paths (List[str]): paths to the frames of each video, in the order of
+        ``video_paths``. The videos whose frames could not be extracted are left out, with
+        a warning.
+    """
+    if not 1 <= quality <= 100:
+        raise ValueError("quality should be between 1 and 100, got {}".format(quality))
+
+    frames_paths = []
+    missing = []
+    for video_path in video_paths:
+        name = os.path.join(frames_root, os.path.splitext(os.path.relpath(video_path, root))[0])
+        frames_path = name + _FRAMES_EXTENSION if packed else name
+        frames_paths.append(frames_path)
+        if not os.path.exists(frames_path):
+            os.makedirs(os.path.dirname(frames_path), exist_ok=True)
+            missing.append((video_path, frames_path))
+
+    extract = partial(
+        _extract_video_frames, frame_rate=frame_rate, short_side=short_side, packed=packed, quality=quality
+    )
+    failed = set()
+    with tqdm(total=len(missing)) as pbar:
+        if num_workers > 1:
+            pool = Pool(num_workers)
+            errors = pool.imap(extract, missing)
+        else:
+            pool = None
+            errors = map(extract, missing)
+        try:
+            for (_, frames_path), error in zip(missing, errors):
+                pbar.update(1)
+                if error is not None:
+                    warnings.warn(error)
+                    failed.add(frames_path)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return [frames_path for frames_path in frames_paths if frames_path not in failed]
+
+
+class _VideoPts(object):
+    """
+    Timestamps of the frames of a list of videos, stored in a single tensor
+    with the bounds of each video. Unlike one tensor per video, this doesn't
+    create Python objects whose reference counts make the data loader workers
+    copy the memory of the dataset, and subsets share the timestamps.
+    """
+
+    def __init__(self, data: torch.Tensor, bounds: torch.Tensor):
+        self.data = data
+        self.bounds = bounds
+
+    @classmethod
+    def from_list(cls, video_pts: List[torch.Tensor]) -> "_VideoPts":
+        sizes = torch.as_tensor([len(pts) for pts in video_pts], dtype=torch.int64)
+        ends = sizes.cumsum(0)
+        # we need to specify dtype=torch.long because for empty list,
+        # torch.as_tensor will use torch.float as default dtype
+        data = [torch.as_tensor(pts, dtype=torch.int64) for pts in video_pts]
+        data = torch.cat(data) if data else torch.zeros(0, dtype=torch.int64)
+        return cls(data, torch.stack([ends - sizes, ends], dim=1))
+
+    def select(self, indices: List[int]) -> "_VideoPts":
+        return _VideoPts(self.data, self.bounds[indices])
+
+    def sizes(self) -> torch.Tensor:
+        return self.bounds[:, 1] - self.bounds[:, 0]
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def __getitem__(self, idx: int) -> torch.Tensor:
+        start, end = self.bounds[idx].tolist()
+        return self.data[start:end]
+
+    def __iter__(self) -> Iterator[torch.Tensor]:
+        for start, end in self.bounds.tolist():
+            yield self.data[start:end]
+
+
+class _LazySequence(object):
+    """
+    Read-only sequence whose items are computed when accessed.
+    """
+
+    def __init__(self, length: int, getitem: Callable[[int], Any]):
+        self._length = length
+        self._getitem = getitem
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError(f"Index {idx} out of range ({self._length} items)")
+        return self._getitem(idx)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self._getitem(idx) for idx in range(self._length))
+
+
+class _VideoCache(object):
+    """
+    Least recently used videos of VideoClips.get_clip: with the pyav backend their
+    open containers, with the video_reader backend their probed information, and
+    the opened extracted frames.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._pid = os.getpid()
+        self._videos: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+
+    def get(self, path: str, backend: str) -> Any:
+        if os.getpid() != self._pid:
+            # each data loader worker opens its own videos, the file offsets of
+            # the containers opened before forking are shared with the parent
+            self._videos = OrderedDict()
+            self._pid = os.getpid()
+
+        key = (path, backend)
+        video = self._videos.pop(key, None)
+        if video is None:
+            if backend == "frames":
+                video = _Frames(path)
+            elif backend == "pyav":
+                video = _open_container(path)
+            else:
+                video = _probe_video_from_file(path)
+            if video is None:
+                return None
+        self._videos[key] = video
+        while len(self._videos) > self.size:
+            _, evicted = self._videos.popitem(last=False)
+            self._close(evicted)
+        return video
+
+    def clear(self) -> None:
+        if os.getpid() == self._pid:
+            for video in self._videos.values():
+                self._close(video)
+        self._videos = OrderedDict()
+
+    @staticmethod
+    def _close(video: Any) -> None:
+        if hasattr(video, "close"):
+            video.close()
 
 
 def _collate_fn(x):
@@ -72,6 +446,79 @@ def _collate_fn(x):
     return x
 
 
+_METADATA_CACHE_VERSION = 1
+# number of videos whose metadata is written to the cache at once
+_METADATA_SHARD_SIZE = 256
+
+
+def _video_metadata_key(path: str) -> Optional[str]:
+    # videos are identified by their path, size and modification time,
+    # so that a modified video is scanned again
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _load_metadata_cache(cache_dir: str) -> Tuple[Dict[str, Tuple[torch.Tensor, Optional[float]]], List[str]]:
+    # returns the entries of the cache and the shards they were read from
+    cache: Dict[str, Tuple[torch.Tensor, Optional[float]]] = {}
+    shards: List[str] = []
+    if not os.path.isdir(cache_dir):
+        return cache, shards
+    for name in sorted(os.listdir(cache_dir)):
+        if not name.endswith(".pt"):
+            continue
+        try:
+            shard = torch.load(os.path.join(cache_dir, name))
+        except Exception as e:
+            warnings.warn(f"Ignoring the unreadable video metadata shard {name}: {e}")
+            continue
+        if shard.get("version") == _METADATA_CACHE_VERSION:
+            cache.update(shard["entries"])
+            shards.append(name)
+    return cache, shards
+
+
+def _save_metadata_shard(cache_dir: str, entries: Dict[str, Tuple[torch.Tensor, Optional[float]]]) -> Optional[str]:
+    # shards are named after their videos and written atomically, so that an
+    # interrupted scan leaves complete shards only. Returns the name of the shard,
+    # or None if it couldn't be written
+    name = hashlib.sha1("".join(sorted(entries)).encode()).hexdigest() + ".pt"
+    path = os.path.join(cache_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        torch.save({"version": _METADATA_CACHE_VERSION, "entries": entries}, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        warnings.warn(f"Failed to write the video metadata to {cache_dir}: {e}")
+        return None
+    return name
+
+
+def _compact_metadata_cache(
+    cache_dir: str, entries: Dict[str, Tuple[torch.Tensor, Optional[float]]], shards: List[str]
+) -> None:
+    # merges the shards, once a scan is complete, so that the cache is read from a
+    # single file. The merged shard is written before the others are deleted, so
+    # the cache stays complete if this is interrupted
+    if len(shards) <= 1:
+        return
+    name = _save_metadata_shard(cache_dir, entries)
+    if name is None:
+        return
+    for shard in shards:
+        if shard != name:
+            try:
+                os.remove(os.path.join(cache_dir, shard))
+            except OSError:
+                # e.g. already removed by another process compacting the cache
+                pass
+
+
 class VideoClips(object):
     """
     Given a list of video files, computes all consecutive subvideos of size
@@ -96,6 +543,17 @@ class VideoClips(object):
             on the resampled video
         num_workers (int): how many subprocesses to use for data loading.
             0 means that the data will be loaded in the main process. (default: 0)
+        metadata_cache_dir (str, optional): directory in which the timestamps of the videos
+            are cached. They are written every few hundred videos while the videos are
+            scanned, so an interrupted scan resumes where it stopped, and only videos that
+            were added or modified since are scanned when the list of videos changes.
+        decoder_cache_size (int): number of videos that :meth:`get_clip` keeps open in each
+            process, so that clips of a recently read video are read without opening and
+            probing it again, see ``group_by_video`` of
+            :class:`~torchvision.datasets.samplers.RandomClipSampler`. With the pyav backend
+            every open video holds a file descriptor, so this is also the budget of file
+            descriptors of each data loader worker. With the video_reader backend only the
+            probed information of the videos is kept. (default: 0)
     """
 
     def __init__(
@@ -112,10 +570,15 @@ class VideoClips(object):
         _video_max_dimension=0,
         _audio_samples=0,
         _audio_channels=0,
+        metadata_cache_dir=None,
+        decoder_cache_size=0,
     ):
 
         self.video_paths = video_paths
         self.num_workers = num_workers
+        self.metadata_cache_dir = metadata_cache_dir
+        self.decoder_cache_size = decoder_cache_size
+        self._video_cache = _VideoCache(decoder_cache_size) if decoder_cache_size > 0 else None
 
         # these options are not valid for pyav backend
         self._video_width = _video_width
@@ -132,50 +595,81 @@ class VideoClips(object):
         self.compute_clips(clip_length_in_frames, frames_between_clips, frame_rate)
 
     def _compute_frame_pts(self):
-        self.video_pts = []
-        self.video_fps = []
+        cache = {}
+        keys = [None] * len(self.video_paths)
+        shards = []
+        if self.metadata_cache_dir is not None:
+            cache, shards = _load_metadata_cache(self.metadata_cache_dir)
+            keys = [_video_metadata_key(path) for path in self.video_paths]
+        metadata = {i: cache[key] for i, key in enumerate(keys) if key in cache}
+        missing = [i for i in range(len(self.video_paths)) if i not in metadata]
 
         # strategy: use a DataLoader to parallelize read_video_timestamps
         # so need to create a dummy dataset first
         import torch.utils.data
 
         dl = torch.utils.data.DataLoader(
-            _VideoTimestampsDataset(self.video_paths),
+            _VideoTimestampsDataset([self.video_paths[i] for i in missing]),
             batch_size=16,
             num_workers=self.num_workers,
             collate_fn=_collate_fn,
         )
 
+        shard = {}
         with tqdm(total=len(dl)) as pbar:
-            for batch in dl:
+            for batch_idx, batch in enumerate(dl):
                 pbar.update(1)
-                clips, fps = list(zip(*batch))
-                # we need to specify dtype=torch.long because for empty list,
-                # torch.as_tensor will use torch.float as default dtype. This
-                # happens when decoding fails and no pts is returned in the list.
-                clips = [torch.as_tensor(c, dtype=torch.long) for c in clips]
-                self.video_pts.extend(clips)
-                self.video_fps.extend(fps)
+                indices = missing[batch_idx * dl.batch_size:][:len(batch)]
+                for i, (pts, fps) in zip(indices, batch):
+                    # we need to specify dtype=torch.long because for empty list,
+                    # torch.as_tensor will use torch.float as default dtype. This
+                    # happens when decoding fails and no pts is returned in the list.
+                    metadata[i] = (torch.as_tensor(pts, dtype=torch.long), fps)
+                    # a video without timestamps may have failed to be read, it
+                    # isn't cached so that it is scanned again next time
+                    if keys[i] is not None and len(pts) > 0:
+                        shard[keys[i]] = metadata[i]
+                if len(shard) >= _METADATA_SHARD_SIZE:
+                    shards.append(_save_metadata_shard(self.metadata_cache_dir, shard))
+                    cache.update(shard)
+                    shard = {}
+        if shard:
+            shards.append(_save_metadata_shard(self.metadata_cache_dir, shard))
+            cache.update(shard)
+        if self.metadata_cache_dir is not None:
+            # keep the entries of the videos of other datasets sharing the cache
+            _compact_metadata_cache(self.metadata_cache_dir, cache, [name for name in shards if name is not None])
+
+        self._video_pts = _VideoPts.from_list([metadata[i][0] for i in range(len(self.video_paths))])
+        self.video_fps = [metadata[i][1] for i in range(len(self.video_paths))]
 
     def _init_from_metadata(self, metadata):
         self.video_paths = metadata["video_paths"]
         assert len(self.video_paths) == len(metadata["video_pts"])
-        self.video_pts = metadata["video_pts"]
+        video_pts = metadata["video_pts"]
+        if not isinstance(video_pts, _VideoPts):
+            video_pts = _VideoPts.from_list(video_pts)
+        self._video_pts = video_pts
         assert len(self.video_paths) == len(metadata["video_fps"])
         self.video_fps = metadata["video_fps"]
 
+    @property
+    def video_pts(self):
+        return self._video_pts
+
     @property
     def metadata(self):
         _metadata = {
             "video_paths": self.video_paths,
-            "video_pts": self.video_pts,
+            "video_pts": list(self.video_pts),
             "video_fps": self.video_fps,
         }
         return _metadata
 
     def subset(self, indices):
         video_paths = [self.video_paths[i] for i in indices]
-        video_pts = [self.video_pts[i] for i in indices]
+        # the subset shares the timestamps of the videos
+        video_pts = self._video_pts.select(indices)
         video_fps = [self.video_fps[i] for i in indices]
         metadata = {
             "video_paths": video_paths,
@@ -195,6 +689,8 @@ class VideoClips(object):
             _video_max_dimension=self._video_max_dimension,
             _audio_samples=self._audio_samples,
             _audio_channels=self._audio_channels,
+            metadata_cache_dir=self.metadata_cache_dir,
+            decoder_cache_size=self.decoder_cache_size,
         )
 
     @staticmethod
@@ -234,16 +730,47 @@ class VideoClips(object):
         self.num_frames = num_frames
         self.step = step
         self.frame_rate = frame_rate
-        self.clips = []
-        self.resampling_idxs = []
-        for video_pts, fps in zip(self.video_pts, self.video_fps):
-            clips, idxs = self.compute_clips_for_video(
-                video_pts, num_frames, step, fps, frame_rate
+
+        # the clips aren't stored, they are computed from the number of frames of each
+        # video after resampling, in the same way as compute_clips_for_video
+        # if for some reason the video doesn't have fps (because doesn't have a video stream)
+        # set the fps to 1. The value doesn't matter, because video_pts is empty anyway
+        fps = torch.as_tensor([1 if f is None else f for f in self.video_fps], dtype=torch.float64)
+        new_fps = fps if frame_rate is None else torch.full_like(fps, frame_rate)
+        num_video_frames = self._video_pts.sizes()
+        self._frame_steps = fps / new_fps
+        integer_steps = self._frame_steps == self._frame_steps.floor()
+        steps = self._frame_steps.floor().clamp(min=1).to(torch.int64)
+        num_frames_resampled = torch.where(
+            integer_steps,
+            (num_video_frames + steps - 1).div(steps, rounding_mode="floor"),
+            (num_video_frames * (new_fps / fps)).floor().to(torch.int64),
+        )
+        num_clips = (num_frames_resampled - num_frames).div(step, rounding_mode="floor") + 1
+        num_clips = num_clips.clamp(min=0)
+        if (num_clips == 0).any():
+            warnings.warn("There aren't enough frames in the current video to get a clip for the given clip length and "
+                          "frames between clips. The video (and potentially others) will be skipped.")
+        self._clip_offsets = torch.cat([torch.zeros(1, dtype=torch.int64), num_clips.cumsum(0)])
+
+    def _compute_clips_for_video(self, video_idx):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return self.compute_clips_for_video(
+                self.video_pts[video_idx], self.num_frames, self.step, self.video_fps[video_idx], self.frame_rate
             )
-            self.clips.append(clips)
-            self.resampling_idxs.append(idxs)
-        clip_lengths = torch.as_tensor([len(v) for v in self.clips])
-        self.cumulative_sizes = clip_lengths.cumsum(0).tolist()
+
+    @property
+    def clips(self):
+        return _LazySequence(self.num_videos(), lambda i: self._compute_clips_for_video(i)[0])
+
+    @property
+    def resampling_idxs(self):
+        return _LazySequence(self.num_videos(), lambda i: self._compute_clips_for_video(i)[1])
+
+    @property
+    def cumulative_sizes(self):
+        return self._clip_offsets[1:].tolist()
 
     def __len__(self):
         return self.num_clips()
@@ -255,20 +782,34 @@ class VideoClips(object):
         """
         Number of subclips that are available in the video list.
         """
-        return self.cumulative_sizes[-1]
+        return int(self._clip_offsets[-1])
+
+    def num_clips_per_video(self):
+        """
+        Number of subclips in each video, as a tensor.
+        """
+        return self._clip_offsets[1:] - self._clip_offsets[:-1]
 
     def get_clip_location(self, idx):
         """
         Converts a flattened representation of the indices into a video_idx, clip_idx
         representation.
         """
-        video_idx = bisect.bisect_right(self.cumulative_sizes, idx)
-        if video_idx == 0:
-            clip_idx = idx
-        else:
-            clip_idx = idx - self.cumulative_sizes[video_idx - 1]
+        video_idx = int(torch.searchsorted(self._clip_offsets[1:], torch.tensor([idx]), right=True)[0])
+        clip_idx = idx - int(self._clip_offsets[video_idx])
         return video_idx, clip_idx
 
+    def _get_clip_frame_idxs(self, video_idx, clip_idx):
+        # indices of the frames of a clip in the video and in the decoded clip,
+        # see compute_clips_for_video
+        resampled_idxs = clip_idx * self.step + torch.arange(self.num_frames)
+        frame_step = self._frame_steps[video_idx].item()
+        if frame_step.is_integer():
+            frame_step = int(frame_step)
+            return resampled_idxs * frame_step, slice(None, None, frame_step)
+        frame_idxs = (resampled_idxs.to(torch.float32) * frame_step).floor().to(torch.int64)
+        return frame_idxs, frame_idxs - frame_idxs[0]
+
     @staticmethod
     def _resample_video_idx(num_frames, original_fps, new_fps):
         step = float(original_fps) / new_fps
@@ -281,6 +822,23 @@ class VideoClips(object):
         idxs = idxs.floor().to(torch.int64)
         return idxs
 
+    def _check_pyav_options(self):
+        # check for invalid options
+        if self._video_width != 0:
+            raise ValueError("pyav backend doesn't support _video_width != 0")
+        if self._video_height != 0:
+            raise ValueError("pyav backend doesn't support _video_height != 0")
+        if self._video_min_dimension != 0:
+            raise ValueError(
+                "pyav backend doesn't support _video_min_dimension != 0"
+            )
+        if self._video_max_dimension != 0:
+            raise ValueError(
+                "pyav backend doesn't support _video_max_dimension != 0"
+            )
+        if self._audio_samples != 0:
+            raise ValueError("pyav backend doesn't support _audio_samples != 0")
+
     def get_clip(self, idx):
         """
         Gets a subclip from a list of videos.
@@ -301,35 +859,41 @@ class VideoClips(object):
             )
         video_idx, clip_idx = self.get_clip_location(idx)
         video_path = self.video_paths[video_idx]
-        clip_pts = self.clips[video_idx][clip_idx]
+        frame_idxs, resampling_idx = self._get_clip_frame_idxs(video_idx, clip_idx)
+        clip_pts = self.video_pts[video_idx][frame_idxs]
 
         from torchvision import get_video_backend
 
         backend = get_video_backend()
 
-        if backend == "pyav":
-            # check for invalid options
-            if self._video_width != 0:
-                raise ValueError("pyav backend doesn't support _video_width != 0")
-            if self._video_height != 0:
-                raise ValueError("pyav backend doesn't support _video_height != 0")
-            if self._video_min_dimension != 0:
-                raise ValueError(
-                    "pyav backend doesn't support _video_min_dimension != 0"
-                )
-            if self._video_max_dimension != 0:
-                raise ValueError(
-                    "pyav backend doesn't support _video_max_dimension != 0"
-                )
-            if self._audio_samples != 0:
-                raise ValueError("pyav backend doesn't support _audio_samples != 0")
-
-        if backend == "pyav":
+        if _is_frames_path(video_path):
+            frames = None
+            if self._video_cache is not None:
+                frames = self._video_cache.get(video_path, "frames")
+            if frames is None:
+                frames = _Frames(video_path)
+            # the timestamps of the frames are their indices, so the clip is read already resampled
+            video = frames.read(clip_pts.tolist())
+            audio = torch.empty((1, 0), dtype=torch.float32)
+            info = {"video_fps": frames.fps}
+            resampling_idx = slice(None)
+        elif backend == "pyav":
+            self._check_pyav_options()
             start_pts = clip_pts[0].item()
             end_pts = clip_pts[-1].item()
-            video, audio, info = read_video(video_path, start_pts, end_pts)
+            container = None
+            if self._video_cache is not None:
+                container = self._video_cache.get(video_path, backend)
+            if container is None:
+                video, audio, info = read_video(video_path, start_pts, end_pts)
+            else:
+                video, audio, info = _read_video_from_container(container, start_pts, end_pts, "pts")
         else:
-            info = _probe_video_from_file(video_path)
+            info = None
+            if self._video_cache is not None:
+                info = self._video_cache.get(video_path, backend)
+            if info is None:
+                info = _probe_video_from_file(video_path)
             video_fps = info.video_fps
             audio_fps = None
 
@@ -371,9 +935,6 @@ class VideoClips(object):
                 info["audio_fps"] = audio_fps
 
         if self.frame_rate is not None:
-            resampling_idx = self.resampling_idxs[video_idx][clip_idx]
-            if isinstance(resampling_idx, torch.Tensor):
-                resampling_idx = resampling_idx - resampling_idx[0]
             video = video[resampling_idx]
             info["video_fps"] = self.frame_rate
         assert len(video) == self.num_frames, "{} x {}".format(
@@ -381,46 +942,108 @@ class VideoClips(object):
         )
         return video, audio, info, video_idx
 
-    def __getstate__(self):
-        video_pts_sizes = [len(v) for v in self.video_pts]
-        # To be back-compatible, we convert data to dtype torch.long as needed
-        # because for empty list, in legacy implementation, torch.as_tensor will
-        # use torch.float as default dtype. This happens when decoding fails and
-        # no pts is returned in the list.
-        video_pts = [x.to(torch.int64) for x in self.video_pts]
-        # video_pts can be an empty list if no frames have been decoded
-        if video_pts:
-            video_pts = torch.cat(video_pts)
-            # avoid bug in https://github.com/pytorch/pytorch/issues/32351
-            # TODO: Revert it once the bug is fixed.
-            video_pts = video_pts.numpy()
+    def iter_clips(self, video_indices=None):
+        """
+        Iterates over the subclips of the videos in order, like calling :meth:`get_clip`
+        for every subclip, but reads each video only once.
+
+        With the pyav backend, each video is decoded in a single pass and the frames are
+        kept while a subclip still needs them, so that frames shared by overlapping
+        subclips are decoded once and the cost is linear in the length of the video
+        rather than in the number of subclips times their length. This is meant for
+        dense evaluation, e.g. with `frames_between_clips` of 1. The audio of a subclip
+        may differ from :meth:`get_clip` in its first samples, which :meth:`get_clip`
+        decodes right after seeking. The video_reader backend reads the subclips with
+        :meth:`get_clip`.
+
+        Args:
+            video_indices (List[int], optional): indices of the videos whose subclips are
+                read, e.g. to split the videos among data loader workers. By default, all
+                the videos are read.
+
+        Yields:
+            video (Tensor)
+            audio (Tensor)
+            info (Dict)
+            video_idx (int): index of the video in `video_paths`
+        """
+        from torchvision import get_video_backend
+
+        if video_indices is None:
+            video_indices = range(self.num_videos())
+        for video_idx in video_indices:
+            first_idx = int(self._clip_offsets[video_idx])
+            num_clips = int(self._clip_offsets[video_idx + 1]) - first_idx
+            if num_clips == 0:
+                continue
+
+            container = None
+            if get_video_backend() == "pyav" and not _is_frames_path(self.video_paths[video_idx]):
+                self._check_pyav_options()
+                container = _open_container(self.video_paths[video_idx])
+            if container is None:
+                for idx in range(first_idx, first_idx + num_clips):
+                    yield self.get_clip(idx)
+                continue
 
+            try:
+                ranges, resampling_idxs = [], []
+                for clip_idx in range(num_clips):
+                    frame_idxs, resampling_idx = self._get_clip_frame_idxs(video_idx, clip_idx)
+                    clip_pts = self.video_pts[video_idx][frame_idxs]
+                    ranges.append((clip_pts[0].item(), clip_pts[-1].item()))
+                    resampling_idxs.append(resampling_idx)
+
+                clips = _read_video_ranges(container, ranges)
+                for (video, audio, info), resampling_idx in zip(clips, resampling_idxs):
+                    if self.frame_rate is not None:
+                        video = video[resampling_idx]
+                        info["video_fps"] = self.frame_rate
+                    assert len(video) == self.num_frames, "{} x {}".format(
+                        video.shape, self.num_frames
+                    )
+                    yield video, audio, info, video_idx
+            finally:
+                container.close()
+
+    def __getstate__(self):
         # make a copy of the fields of self
         d = self.__dict__.copy()
-        d["video_pts_sizes"] = video_pts_sizes
-        d["video_pts"] = video_pts
+        # avoid bug in https://github.com/pytorch/pytorch/issues/32351
+        # TODO: Revert it once the bug is fixed.
+        d["_video_pts"] = (self._video_pts.data.numpy(), self._video_pts.bounds.numpy())
         # delete the following attributes to reduce the size of dictionary. They
         # will be re-computed in "__setstate__()"
-        del d["clips"]
-        del d["resampling_idxs"]
-        del d["cumulative_sizes"]
+        del d["_frame_steps"]
+        del d["_clip_offsets"]
+        # open videos can't be pickled, each process opens its own
+        d["_video_cache"] = None
 
         # for backwards-compatibility
-        d["_version"] = 2
+        d["_version"] = 3
         return d
 
     def __setstate__(self, d):
         # for backwards-compatibility
-        if "_version" not in d:
-            self.__dict__ = d
-            return
-
-        video_pts = torch.as_tensor(d["video_pts"], dtype=torch.int64)
-        video_pts = torch.split(video_pts, d["video_pts_sizes"], dim=0)
-        # don't need this info anymore
-        del d["video_pts_sizes"]
-
-        d["video_pts"] = video_pts
+        version = d.pop("_version", 1)
+        if version == 1:
+            # the timestamps were pickled as a list of tensors
+            video_pts = _VideoPts.from_list(d.pop("video_pts"))
+        elif version == 2:
+            video_pts = torch.as_tensor(d.pop("video_pts"), dtype=torch.int64)
+            video_pts = _VideoPts.from_list(torch.split(video_pts, d.pop("video_pts_sizes"), dim=0))
+        else:
+            data, bounds = d["_video_pts"]
+            video_pts = _VideoPts(torch.as_tensor(data), torch.as_tensor(bounds))
+        for name in ["clips", "resampling_idxs", "cumulative_sizes"]:
+            d.pop(name, None)
+        d["_video_pts"] = video_pts
+        d.setdefault("metadata_cache_dir", None)
+        d.setdefault("decoder_cache_size", 0)
+        if d["decoder_cache_size"] > 0:
+            d["_video_cache"] = _VideoCache(d["decoder_cache_size"])
+        else:
+            d["_video_cache"] = None
         self.__dict__ = d
-        # recompute attributes "clips", "resampling_idxs" and other derivative ones
+        # recompute the clips
         self.compute_clips(self.num_frames, self.step, self.frame_rate)
@@ -1,3 +1,7 @@
+from fractions import Fraction
+from typing import List
+
+import numpy as np
 import torch
 
 from ._video_opt import (
@@ -12,19 +16,32 @@ from ._video_opt import (
     _read_video_timestamps_from_memory,
 )
 from .video import (
+    _seek_is_cheaper,
+    KeyframeIndex,
+    VideoWriter,
+    read_keyframe_index,
+    read_keyframes,
     read_video,
+    read_video_clips,
     read_video_timestamps,
     write_video,
 )
 from .image import (
+    ImageInfo,
     ImageReadMode,
+    ImageReader,
+    ImageWriter,
     decode_image,
+    decode_image_info,
     decode_jpeg,
+    decode_jpeg_crop,
+    decode_jpeg_yuv420,
     decode_png,
     encode_jpeg,
     encode_png,
     read_file,
     read_image,
+    read_image_info,
     write_file,
     write_jpeg,
     write_png,
@@ -82,6 +99,16 @@ class VideoReader:
             for frame in itertools.islice(reader.seek(2), 10):
                 frames.append(frame['data'])
 
+        Clips are more efficiently read with :meth:`read_frames` and :meth:`read_until`,
+        which decode the frames directly into a single tensor::
+
+            clip = reader.seek(2).read_frames(10)['data']  # Tensor[10, C, H, W]
+            clip = reader.seek(2).read_until(5)['data']
+
+        Frames spread over the video are read in a single pass with :meth:`read_at`::
+
+            frames = reader.read_at([1, 3, 5, 7])['data']  # Tensor[4, C, H, W]
+
     .. note::
 
         Each stream descriptor consists of two parts: stream type (e.g. 'video') and
@@ -92,14 +119,60 @@ class VideoReader:
 
     Args:
 
-        path (string): Path to the video file in supported format
+        path (string, bytes or Tensor): Path to the video file in supported format, or the
+            encoded video itself as bytes or as a 1-dimensional uint8 tensor. Videos in memory,
+            e.g. read from a tar shard or a key-value store, are decoded without being written to
+            a temporary file and support seeking just like files.
 
         stream (string, optional): descriptor of the required stream, followed by the stream id,
             in the format ``{stream_type}:{stream_id}``. Defaults to ``"video:0"``.
             Currently available options include ``['video', 'audio']``
+
+        width (int, optional): width of the decoded video frames. Defaults to 0.
+
+        height (int, optional): height of the decoded video frames. Defaults to 0.
+
+        min_dimension (int, optional): size of the shorter edge of the decoded video frames.
+            Defaults to 0.
+
+        max_dimension (int, optional): size of the longer edge of the decoded video frames.
+            Defaults to 0.
+
+            The video frames are resized by ffmpeg while they are converted from their
+            native pixel format, which is much cheaper than resizing full resolution frames
+            afterwards. A size of 0 is left free: if only one of ``width``, ``height``,
+            ``min_dimension`` and ``max_dimension`` is given, the aspect ratio is kept.
+            By default the frames are decoded at their original resolution.
+
+        interpolation (string, optional): interpolation used to resize the video frames, one of
+            ``['area', 'nearest', 'fast_bilinear', 'bilinear', 'bicubic']``. Defaults to ``"area"``.
+
+        pixel_format (string, optional): pixel format of the decoded video frames, one of
+            ``['rgb', 'gray', 'yuv']``. ``'gray'`` frames have a single channel, and ``'yuv'``
+            frames have full resolution Y, U and V planes. Defaults to ``"rgb"``.
+
+        num_threads (int, optional): number of threads used by the ffmpeg decoder. ``0`` lets
+            ffmpeg pick one thread per core. Defaults to 1, which keeps decoding single-threaded
+            so that multiple readers, e.g. in data loader workers, don't oversubscribe the cpu.
+
+        thread_type (string, optional): threading strategy of the decoder, one of
+            ``['auto', 'frame', 'slice']``. Frame threading decodes several frames at once and
+            scales best but delays the first frame, slice threading splits a single frame and
+            only helps codecs encoded with multiple slices. ``'auto'`` leaves the choice to the
+            codec. Defaults to ``"auto"``.
+
+        keyframe_index (KeyframeIndex, optional): index of the video, see
+            :func:`~torchvision.io.read_keyframe_index`. If given, :meth:`seek` jumps right to the
+            keyframe that precedes the requested time instead of the one before it, and can seek
+            to keyframes only.
+
+    Streams that are not selected are discarded by the demuxer, so their packets are never
+    read or decoded.
     """
 
-    def __init__(self, path, stream="video"):
+    def __init__(self, path, stream="video", width=0, height=0, min_dimension=0, max_dimension=0,
+                 interpolation="area", pixel_format="rgb", num_threads=1, thread_type="auto",
+                 keyframe_index=None):
         if not _has_video_opt():
             raise RuntimeError(
                 "Not compiled with video_reader support, "
@@ -107,7 +180,18 @@ class VideoReader:
                 + "ffmpeg (version 4.2 is currently supported) and"
                 + "build torchvision from source."
             )
-        self._c = torch.classes.torchvision.Video(path, stream)
+        if isinstance(path, str):
+            self._c = torch.classes.torchvision.Video(path, stream)
+        else:
+            if not isinstance(path, torch.Tensor):
+                path = torch.from_numpy(np.frombuffer(path, dtype=np.uint8))
+            self._c = torch.classes.torchvision.Video("", stream)
+            self._c.init_from_memory(path, stream)
+        if (width, height, min_dimension, max_dimension, interpolation, pixel_format) != (0, 0, 0, 0, "area", "rgb"):
+            self._c.set_output_format(width, height, min_dimension, max_dimension, interpolation, pixel_format)
+        if (num_threads, thread_type) != (1, "auto"):
+            self._c.set_threads(num_threads, thread_type)
+        self._keyframe_index = keyframe_index
 
     def __next__(self):
         """Decodes and returns the next frame of the current stream.
@@ -129,11 +213,114 @@ class VideoReader:
     def __iter__(self):
         return self
 
-    def seek(self, time_s: float):
+    def read_frames(self, num_frames: int):
+        """Decodes and returns the next ``num_frames`` frames of the current video stream.
+
+        The frames are decoded directly into a single preallocated tensor, which is
+        much cheaper than iterating over the reader and stacking the frames.
+        Fewer frames are returned if the end of the stream is reached.
+
+        Args:
+            num_frames (int): number of frames to read
+
+        Returns:
+            (dict): a dictionary containing the decoded frames (``data``) as a
+            ``Tensor[T, C, H, W]`` and their timestamps (``pts``) in seconds as a
+            ``Tensor[T]`` of dtype float64. ``data`` is a permuted view of a
+            ``[T, H, W, C]`` tensor.
+        """
+        frames, pts = self._c.read_frames(num_frames)
+        return {"data": frames, "pts": pts}
+
+    def read_until(self, pts: float):
+        """Decodes and returns the frames of the current video stream up to a timestamp.
+
+        All the frames with a timestamp lower than or equal to ``pts`` are returned,
+        as in :meth:`read_frames`. The first frame after ``pts`` is returned by the
+        next read.
+
+        Args:
+            pts (float): timestamp of the last frame to read, in seconds
+
+        Returns:
+            (dict): a dictionary containing the decoded frames (``data``) as a
+            ``Tensor[T, C, H, W]`` and their timestamps (``pts``) in seconds as a
+            ``Tensor[T]`` of dtype float64.
+        """
+        frames, frames_pts = self._c.read_until(pts)
+        return {"data": frames, "pts": frames_pts}
+
+    def read_at(self, pts_list: List[float]):
+        """Decodes and returns the frames of the current video stream at several timestamps.
+
+        For every timestamp, the frame that :meth:`seek` followed by ``next`` returns is
+        picked, i.e. the frame at the timestamp or the first one after it. The timestamps
+        are visited in increasing order within a single pass. Between two timestamps the
+        reader keeps decoding unless a seek skips frames: with a ``keyframe_index`` it
+        seeks only if there is a keyframe in between, otherwise it seeks if the timestamps
+        are more than a second apart. This makes sparse sampling of a few frames per video
+        much cheaper than seeking to each of them.
+
+        Timestamps after the last frame of the stream are skipped. Afterwards, the reader
+        continues after the frame of the largest timestamp.
+
+        Args:
+            pts_list (List[float]): timestamps of the frames to read, in seconds, in any order
+
+        Returns:
+            (dict): a dictionary containing the decoded frames (``data``) as a
+            ``Tensor[N, C, H, W]`` in the order of ``pts_list``, and their timestamps
+            (``pts``) in seconds as a ``Tensor[N]`` of dtype float64.
+        """
+        index = self._keyframe_index if self._c.get_current_stream()[0] == "video" else None
+        data = None
+        frames_pts = torch.empty(len(pts_list), dtype=torch.float64)
+        order = sorted(range(len(pts_list)), key=lambda i: pts_list[i])
+        num_found = 0
+        frame, frame_pts = None, 0.0
+        for i in order:
+            # the decoder compares timestamps in microseconds
+            time_s = pts_list[i] - 1e-6
+            if frame is None or frame_pts < time_s:
+                if frame is None:
+                    seek = True
+                elif index is not None:
+                    seek = _seek_is_cheaper(
+                        index.to_pts(frame_pts), index.to_pts(pts_list[i]), index.time_base, index)
+                else:
+                    seek = _seek_is_cheaper(frame_pts, time_s, Fraction(1), None)
+                if seek:
+                    self.seek(pts_list[i])
+                frame, frame_pts = self._c.next()
+                while frame.numel() > 0 and frame_pts < time_s:
+                    frame, frame_pts = self._c.next()
+                if frame.numel() == 0:
+                    # end of the stream, the remaining timestamps are after the last frame
+                    break
+            # the frame is the first one at or after the previous, smaller, timestamp,
+            # so it is also the first one at or after this one
+            if data is None:
+                data = torch.empty((len(pts_list),) + frame.shape, dtype=frame.dtype)
+            data[i] = frame
+            frames_pts[i] = frame_pts
+            num_found += 1
+
+        if data is None:
+            return {"data": torch.empty(0, dtype=torch.uint8), "pts": torch.empty(0, dtype=torch.float64)}
+        if num_found < len(pts_list):
+            # drop the timestamps after the end of the stream
+            found = torch.tensor(sorted(order[:num_found]))
+            data, frames_pts = data[found], frames_pts[found]
+        return {"data": data, "pts": frames_pts}
+
+    def seek(self, time_s: float, keyframes_only: bool = False):
         """Seek within current stream.
 
         Args:
             time_s (float): seek time in seconds
+            keyframes_only (bool, optional): seek to the last keyframe at or before ``time_s``
+                instead, which only needs a single frame to be decoded. This is meant for cheap
+                thumbnails and requires a ``keyframe_index``. Defaults to False.
 
         .. note::
             Current implementation is the so-called precise seek. This
@@ -141,7 +328,16 @@ class VideoReader:
             frame with the exact timestamp if it exists or
             the first frame with timestamp larger than ``time_s``.
         """
-        self._c.seek(time_s)
+        if self._keyframe_index is not None and self._c.get_current_stream()[0] == "video":
+            index = self._keyframe_index
+            keyframe_s = index.to_sec(index.keyframe_before(index.to_pts(time_s)))
+            if keyframes_only:
+                time_s = keyframe_s
+            self._c.seek_with_keyframe(time_s, keyframe_s)
+        elif keyframes_only:
+            raise ValueError("Seeking to keyframes only requires the VideoReader to have a keyframe_index")
+        else:
+            self._c.seek(time_s)
         return self
 
     def get_metadata(self):
@@ -174,8 +370,13 @@ class VideoReader:
 
 __all__ = [
     "write_video",
+    "VideoWriter",
     "read_video",
     "read_video_timestamps",
+    "read_video_clips",
+    "read_keyframes",
+    "KeyframeIndex",
+    "read_keyframe_index",
     "_read_video_from_file",
     "_read_video_timestamps_from_file",
     "_probe_video_from_file",
@@ -187,14 +388,21 @@ __all__ = [
     "_read_video_meta_data",
     "VideoMetaData",
     "Timebase",
+    "ImageInfo",
     "ImageReadMode",
+    "ImageReader",
+    "ImageWriter",
     "decode_image",
+    "decode_image_info",
     "decode_jpeg",
+    "decode_jpeg_crop",
+    "decode_jpeg_yuv420",
     "decode_png",
     "encode_jpeg",
     "encode_png",
     "read_file",
     "read_image",
+    "read_image_info",
     "write_file",
     "write_jpeg",
     "write_png",
@@ -175,6 +175,8 @@ def _read_video_from_file(
     audio_channels=0,
     audio_pts_range=(0, -1),
     audio_timebase=default_timebase,
+    num_threads=1,
+    thread_type="auto",
 ):
     """
     Reads a video from a file, returning both the video frames as well as
@@ -217,6 +219,8 @@ def _read_video_from_file(
     audio_channels (int optional): audio channels
     audio_pts_range (list(int), optional): the start and end presentation timestamp of audio stream
     audio_timebase (Fraction, optional): a Fraction rational number which denotes time base in audio stream
+    num_threads (int, optional): number of decoder threads, 0 lets ffmpeg pick one per core
+    thread_type (str, optional): one of "auto", "frame" or "slice"
 
     Returns
         vframes (Tensor[T, H, W, C]): the `T` video frames
@@ -248,6 +252,8 @@ def _read_video_from_file(
         audio_pts_range[1],
         audio_timebase.numerator,
         audio_timebase.denominator,
+        num_threads,
+        thread_type,
     )
     vframes, _vframe_pts, vtimebase, vfps, vduration, \
         aframes, aframe_pts, atimebase, asample_rate, aduration = (
@@ -265,6 +271,9 @@ def _read_video_timestamps_from_file(filename):
     Decode all video- and audio frames in the video. Only pts
     (presentation timestamp) is returned. The actual frame pixel data is not
     copied. Thus, it is much faster than read_video(...)
+
+    The video timestamps are read from the packets without decoding them, unless
+    the container stores them in decoding order while the codec reorders frames.
     """
     result = torch.ops.video_reader.read_video_from_file(
         filename,
@@ -323,6 +332,8 @@ def _read_video_from_memory(
     audio_pts_range=(0, -1),  # type: List[int]
     audio_timebase_numerator=0,  # type: int
     audio_timebase_denominator=1,  # type: int
+    num_threads=1,  # type: int
+    thread_type="auto",  # type: str
 ):
     # type: (...) -> Tuple[torch.Tensor, torch.Tensor]
     """
@@ -370,6 +381,8 @@ def _read_video_from_memory(
     audio_pts_range (list(int), optional): the start and end presentation timestamp of audio stream
     audio_timebase_numerator / audio_timebase_denominator (float, optional):
         a rational number which denotes time base in audio stream
+    num_threads (int, optional): number of decoder threads, 0 lets ffmpeg pick one per core
+    thread_type (str, optional): one of "auto", "frame" or "slice"
 
     Returns:
         vframes (Tensor[T, H, W, C]): the `T` video frames
@@ -403,6 +416,8 @@ def _read_video_from_memory(
         audio_pts_range[1],
         audio_timebase_numerator,
         audio_timebase_denominator,
+        num_threads,
+        thread_type,
     )
 
     vframes, _vframe_pts, vtimebase, vfps, vduration, \
@@ -422,6 +437,9 @@ def _read_video_timestamps_from_memory(video_data):
     Decode all frames in the video. Only pts (presentation timestamp) is returned.
     The actual frame pixel data is not copied. Thus, read_video_timestamps(...)
     is much faster than read_video(...)
+
+    The video timestamps are read from the packets without decoding them, unless
+    the container stores them in decoding order while the codec reorders frames.
     """
     if not isinstance(video_data, torch.Tensor):
         video_data = torch.from_numpy(np.frombuffer(video_data, dtype=np.uint8))
@@ -489,7 +507,11 @@ def _read_video(filename, start_pts=0, end_pts=None, pts_unit="pts"):
             + "follow-up version. Please use pts_unit 'sec'."
         )
 
-    info = _probe_video_from_file(filename)
+    from_memory = not isinstance(filename, str)
+    if from_memory:
+        info = _probe_video_from_memory(filename)
+    else:
+        info = _probe_video_from_file(filename)
 
     has_video = info.has_video
     has_audio = info.has_audio
@@ -532,15 +554,28 @@ def _read_video(filename, start_pts=0, end_pts=None, pts_unit="pts"):
     if has_audio:
         audio_pts_range = get_pts(audio_timebase)
 
-    vframes, aframes, info = _read_video_from_file(
-        filename,
-        read_video_stream=True,
-        video_pts_range=video_pts_range,
-        video_timebase=video_timebase,
-        read_audio_stream=True,
-        audio_pts_range=audio_pts_range,
-        audio_timebase=audio_timebase,
-    )
+    if from_memory:
+        vframes, aframes = _read_video_from_memory(
+            filename,
+            read_video_stream=True,
+            video_pts_range=video_pts_range,
+            video_timebase_numerator=video_timebase.numerator,
+            video_timebase_denominator=video_timebase.denominator,
+            read_audio_stream=True,
+            audio_pts_range=audio_pts_range,
+            audio_timebase_numerator=audio_timebase.numerator,
+            audio_timebase_denominator=audio_timebase.denominator,
+        )
+    else:
+        vframes, aframes, info = _read_video_from_file(
+            filename,
+            read_video_stream=True,
+            video_pts_range=video_pts_range,
+            video_timebase=video_timebase,
+            read_audio_stream=True,
+            audio_pts_range=audio_pts_range,
+            audio_timebase=audio_timebase,
+        )
     _info = {}
     if has_video:
         _info["video_fps"] = info.video_fps
@@ -3,8 +3,13 @@ import torch
 import os
 import os.path as osp
 import importlib.machinery
+import threading
+import warnings
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 _HAS_IMAGE_OPT = False
 
@@ -65,18 +70,65 @@ class ImageReadMode(Enum):
     RGB_ALPHA = 4
 
 
-def read_file(path: str) -> torch.Tensor:
+class ImageInfo(NamedTuple):
+    """
+    Properties of an encoded image, as returned by :func:`decode_image_info`
+    and :func:`read_image_info`.
+
+    ``channels`` is the number of channels of the image decoded with
+    ``ImageReadMode.UNCHANGED``, and ``format`` is either ``"jpeg"`` or ``"png"``.
+    """
+    height: int
+    width: int
+    channels: int
+    format: str
+
+
+@torch.jit.unused
+def _as_uint8_tensor(input: Any) -> Any:
+    # Wraps objects implementing the buffer protocol (bytes, memoryview, numpy
+    # arrays, ...) into uint8 tensors sharing their memory, so that encoded images
+    # don't have to be copied before being decoded.
+    if isinstance(input, torch.Tensor):
+        return input
+    if isinstance(input, (list, tuple)):
+        return [_as_uint8_tensor(data) for data in input]
+    if memoryview(input).nbytes == 0:
+        return torch.empty(0, dtype=torch.uint8)
+    with warnings.catch_warnings():
+        # The decoders never write into their input
+        warnings.filterwarnings("ignore", message="The given buffer is not writable")
+        return torch.frombuffer(input, dtype=torch.uint8)
+
+
+def _get_decode_size(size: Optional[List[int]]) -> List[int]:
+    if size is None:
+        return torch.jit.annotate(List[int], [])
+    if isinstance(size, int):
+        size = [size]
+    if len(size) not in (1, 2):
+        raise ValueError("size should be an int or a sequence of length 1 or 2, got {}".format(size))
+    return list(size)
+
+
+def read_file(path: str, mmap: bool = True) -> torch.Tensor:
     """
     Reads and outputs the bytes contents of a file as a uint8 Tensor
     with one dimension.
 
     Args:
         path (str): the path to the file to be read
+        mmap (bool): If ``True``, the file is memory-mapped instead of being
+            copied into a newly allocated tensor: its pages are only read when
+            they are accessed, and they don't count towards the memory of the
+            process. The file must not be truncated while the tensor is in use.
+            Memory mapping is not supported on Windows, where the file is always
+            copied. Default: ``True``.
 
     Returns:
         data (Tensor)
     """
-    data = torch.ops.image.read_file(path)
+    data = torch.ops.image.read_file(path, mmap)
     return data
 
 
@@ -99,8 +151,10 @@ def decode_png(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGE
     The values of the output tensor are uint8 between 0 and 255.
 
     Args:
-        input (Tensor[1]): a one dimensional uint8 tensor containing
-            the raw bytes of the PNG image.
+        input (Tensor[1] or buffer): a one dimensional uint8 tensor containing
+            the raw bytes of the PNG image. Any object supporting the buffer
+            protocol (e.g. ``bytes``, ``memoryview`` or a numpy array) can also be
+            passed, in which case its memory is used without being copied.
         mode (ImageReadMode): the read mode used for optionally
             converting the image. Default: ``ImageReadMode.UNCHANGED``.
             See `ImageReadMode` class for more information on various
@@ -109,30 +163,49 @@ def decode_png(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGE
     Returns:
         output (Tensor[image_channels, image_height, image_width])
     """
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
     output = torch.ops.image.decode_png(input, mode.value)
     return output
 
 
-def encode_png(input: torch.Tensor, compression_level: int = 6) -> torch.Tensor:
+def encode_png(input: Union[torch.Tensor, List[torch.Tensor]], compression_level: int = 6,
+               strategy: str = "default", filter: str = "default") -> Union[torch.Tensor, List[torch.Tensor]]:
     """
     Takes an input tensor in CHW layout and returns a buffer with the contents
     of its corresponding PNG file.
 
+    A list of tensors can be passed to encode a whole batch at once, in which
+    case the images are encoded in parallel using the intra-op thread pool.
+
     Args:
-        input (Tensor[channels, image_height, image_width]): int8 image tensor of
-            ``c`` channels, where ``c`` must 3 or 1.
+        input (Tensor[channels, image_height, image_width] or list[Tensor]): int8 image tensor of
+            ``c`` channels, where ``c`` must 3 or 1, or a list of such tensors.
         compression_level (int): Compression factor for the resulting file, it must be a number
             between 0 and 9. Default: 6
+        strategy (str): zlib compression strategy, one of ``"default"``, ``"filtered"``,
+            ``"huffman_only"``, ``"rle"`` or ``"fixed"``. Default: ``"default"``
+        filter (str): PNG row filter, one of ``"none"``, ``"sub"``, ``"up"``, ``"avg"``,
+            ``"paeth"`` or ``"all"``. ``"default"`` lets libpng choose the filters, which
+            usually means trying all of them on each row. Default: ``"default"``
+
+            .. note::
+                When encoding speed matters more than file size, e.g. for debug or
+                visualization dumps, ``compression_level=1`` with ``strategy="rle"``
+                and ``filter="none"`` or ``filter="sub"`` is much faster than the defaults.
 
     Returns:
-        Tensor[1]: A one dimensional int8 tensor that contains the raw bytes of the
-            PNG file.
+        Tensor[1] or list[Tensor[1]]: A one dimensional int8 tensor that contains the raw bytes of the
+            PNG file, or a list of them if ``input`` is a list.
     """
-    output = torch.ops.image.encode_png(input, compression_level)
+    if isinstance(input, list):
+        return torch.ops.image.encode_pngs(input, compression_level, strategy, filter)
+    output = torch.ops.image.encode_png(input, compression_level, strategy, filter)
     return output
 
 
-def write_png(input: torch.Tensor, filename: str, compression_level: int = 6):
+def write_png(input: torch.Tensor, filename: str, compression_level: int = 6,
+              strategy: str = "default", filter: str = "default"):
     """
     Takes an input tensor in CHW layout (or HW in the case of grayscale images)
     and saves it in a PNG file.
@@ -143,22 +216,32 @@ def write_png(input: torch.Tensor, filename: str, compression_level: int = 6):
         filename (str): Path to save the image.
         compression_level (int): Compression factor for the resulting file, it must be a number
             between 0 and 9. Default: 6
+        strategy (str): zlib compression strategy, see :func:`encode_png`. Default: ``"default"``
+        filter (str): PNG row filter, see :func:`encode_png`. Default: ``"default"``
     """
-    output = encode_png(input, compression_level)
+    output = torch.ops.image.encode_png(input, compression_level, strategy, filter)
     write_file(filename, output)
 
 
-def decode_jpeg(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED,
-                device: str = 'cpu') -> torch.Tensor:
+def decode_jpeg(input: Union[torch.Tensor, List[torch.Tensor]], mode: ImageReadMode = ImageReadMode.UNCHANGED,
+                device: str = 'cpu', size: Optional[List[int]] = None,
+                out: Optional[torch.Tensor] = None) -> Union[torch.Tensor, List[torch.Tensor]]:
     """
     Decodes a JPEG image into a 3 dimensional RGB Tensor.
     Optionally converts the image to the desired format.
     The values of the output tensor are uint8 between 0 and 255.
 
+    A list of encoded images can be passed to decode a whole batch at once.
+    On CPU, the images of the batch are decoded in parallel using the
+    intra-op thread pool (see :func:`torch.set_num_threads`).
+
     Args:
-        input (Tensor[1]): a one dimensional uint8 tensor containing
-            the raw bytes of the JPEG image. This tensor must be on CPU,
-            regardless of the ``device`` parameter.
+        input (Tensor[1] or list[Tensor[1]]): a one dimensional uint8 tensor containing
+            the raw bytes of the JPEG image, or a list of such tensors.
+            These tensors must be on CPU, regardless of the ``device`` parameter.
+            Any object supporting the buffer protocol (e.g. ``bytes``, ``memoryview``
+            or a numpy array) can also be passed instead of a tensor, in which case
+            its memory is used without being copied.
         mode (ImageReadMode): the read mode used for optionally
             converting the image. Default: ``ImageReadMode.UNCHANGED``.
             See ``ImageReadMode`` class for more information on various
@@ -167,37 +250,154 @@ def decode_jpeg(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANG
             be stored. If a cuda device is specified, the image will be decoded
             with `nvjpeg <https://developer.nvidia.com/nvjpeg>`_. This is only
             supported for CUDA version >= 10.1
+        size (sequence or int, optional): Minimum size of the decoded image. If given,
+            the image is downscaled while decoding by the largest factor among 1/2, 1/4
+            and 1/8 which keeps it at least this large, which is much cheaper than decoding
+            the full image and resizing it afterwards. If size is a sequence like (h, w),
+            both the height and the width are kept at least as large as h and w. If size is
+            an int, the smaller edge of the image is kept at least as large as this number.
+            Pass the ``size`` of a subsequent :class:`~torchvision.transforms.Resize` here
+            to avoid decoding pixels that would be discarded. Only supported on CPU.
+            Default: ``None`` (decode at full resolution).
+
+            .. note::
+                In torchscript mode size as single int is not supported, use a sequence of length 1: ``[size, ]``.
+        out (Tensor, optional): uint8 tensor of shape ``[image_channels, image_height, image_width]``
+            the image is decoded into, or of shape ``[batch_size, image_channels, image_height, image_width]``
+            if ``input`` is a list. This avoids allocating the images and copying them into a
+            batch, e.g. into a pinned memory buffer in a ``collate_fn``. The decoded rows are written
+            directly when the pixels of each row are contiguous in ``out``, e.g. for tensors in the
+            ``torch.channels_last`` memory format or with a single channel; otherwise the images
+            are decoded into temporary tensors which are copied into ``out``. Only supported on CPU.
+            Default: ``None``.
 
     Returns:
-        output (Tensor[image_channels, image_height, image_width])
+        output (Tensor[image_channels, image_height, image_width] or list[Tensor]):
+            the decoded image, or the list of decoded images if ``input`` is a list.
+            Images of a batch may have different sizes, so they are
+            returned as a list; use :func:`torch.stack` or ``out`` to batch same-sized images.
+            If ``out`` is given, it is returned.
+
+    Example:
+        The following ``collate_fn`` decodes a batch of same-sized JPEG files, given as
+        raw bytes by the dataset, directly into a pinned memory batch::
+
+            def collate_fn(batch):
+                # channels last view of a pinned buffer, so that the rows are decoded in place
+                out = torch.empty((len(batch), 224, 224, 3), dtype=torch.uint8, pin_memory=True)
+                return decode_jpeg(batch, mode=ImageReadMode.RGB, out=out.permute(0, 3, 1, 2))
     """
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
     device = torch.device(device)
+    if device.type == 'cuda' and size is not None:
+        raise ValueError("Decoding to a given size is not supported on GPU")
+    if device.type == 'cuda' and out is not None:
+        raise ValueError("Decoding into an out tensor is not supported on GPU")
+    decode_size = _get_decode_size(size)
+
+    if out is not None:
+        if isinstance(input, list):
+            return torch.ops.image.decode_jpegs_out(input, out, mode.value, decode_size)
+        return torch.ops.image.decode_jpeg_out(input, out, mode.value, decode_size)
+
+    if isinstance(input, list):
+        if device.type == 'cuda':
+            return [torch.ops.image.decode_jpeg_cuda(data, mode.value, device) for data in input]
+        return torch.ops.image.decode_jpegs(input, mode.value, decode_size)
+
     if device.type == 'cuda':
         output = torch.ops.image.decode_jpeg_cuda(input, mode.value, device)
     else:
-        output = torch.ops.image.decode_jpeg(input, mode.value)
+        output = torch.ops.image.decode_jpeg(input, mode.value, decode_size)
     return output
 
 
-def encode_jpeg(input: torch.Tensor, quality: int = 75) -> torch.Tensor:
+def decode_jpeg_crop(input: torch.Tensor, top: int, left: int, height: int, width: int,
+                     mode: ImageReadMode = ImageReadMode.UNCHANGED, size: Optional[List[int]] = None) -> torch.Tensor:
+    """
+    Decodes a region of a JPEG image into a 3 dimensional RGB Tensor.
+
+    The output is the same as ``F.crop(decode_jpeg(input, mode), top, left, height, width)``,
+    but only the rows and columns of blocks covering the region are decoded, which is
+    much faster for small crops like the ones of :class:`~torchvision.transforms.RandomResizedCrop`.
+    The values of the output tensor are uint8 between 0 and 255.
+
+    Args:
+        input (Tensor[1] or buffer): a one dimensional uint8 tensor containing
+            the raw bytes of the JPEG image, or any object supporting the buffer
+            protocol, see :func:`decode_jpeg`.
+        top (int): Vertical component of the top left corner of the crop box.
+        left (int): Horizontal component of the top left corner of the crop box.
+        height (int): Height of the crop box.
+        width (int): Width of the crop box.
+        mode (ImageReadMode): the read mode used for optionally
+            converting the image. Default: ``ImageReadMode.UNCHANGED``.
+            See ``ImageReadMode`` class for more information on various
+            available modes.
+        size (sequence or int, optional): Minimum size of the decoded crop. If given, the
+            crop is downscaled while decoding, see :func:`decode_jpeg` for more details.
+            The crop box is always expressed in the coordinates of the full resolution
+            image. Default: ``None``.
+
+    Returns:
+        output (Tensor[image_channels, crop_height, crop_width])
+    """
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
+    return torch.ops.image.decode_jpeg_crop(input, top, left, height, width, mode.value, _get_decode_size(size))
+
+
+def decode_jpeg_yuv420(input: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Decodes a JPEG image into its planar YUV420 (YCbCr 4:2:0) representation.
+
+    For the most common 4:2:0 subsampled JPEG files the planes are returned as they are
+    stored in the file, skipping the chroma upsampling and the color conversion to RGB
+    entirely. Images with other subsamplings are decoded to full resolution YCbCr and
+    their chroma planes are averaged over 2x2 blocks. Grayscale images get constant
+    chroma planes of value 128. If only the luma is needed, ``decode_jpeg`` with
+    ``ImageReadMode.GRAY`` is cheaper as it does not decode the chroma planes at all.
+
+    Args:
+        input (Tensor[1] or buffer): a one dimensional uint8 tensor containing
+            the raw bytes of the JPEG image, or any object supporting the buffer
+            protocol, see :func:`decode_jpeg`.
+
+    Returns:
+        (Tensor[1, image_height, image_width], Tensor[1, ceil(image_height / 2), ceil(image_width / 2)],
+        Tensor[1, ceil(image_height / 2), ceil(image_width / 2)]): the Y, U (Cb) and V (Cr) planes
+    """
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
+    return torch.ops.image.decode_jpeg_yuv420(input)
+
+
+def encode_jpeg(input: Union[torch.Tensor, List[torch.Tensor]],
+                quality: int = 75) -> Union[torch.Tensor, List[torch.Tensor]]:
     """
     Takes an input tensor in CHW layout and returns a buffer with the contents
     of its corresponding JPEG file.
 
+    A list of tensors can be passed to encode a whole batch at once, in which
+    case the images are encoded in parallel using the intra-op thread pool.
+
     Args:
-        input (Tensor[channels, image_height, image_width])): int8 image tensor of
-            ``c`` channels, where ``c`` must be 1 or 3.
+        input (Tensor[channels, image_height, image_width] or list[Tensor]): int8 image tensor of
+            ``c`` channels, where ``c`` must be 1 or 3, or a list of such tensors.
         quality (int): Quality of the resulting JPEG file, it must be a number between
             1 and 100. Default: 75
 
     Returns:
-        output (Tensor[1]): A one dimensional int8 tensor that contains the raw bytes of the
-            JPEG file.
+        output (Tensor[1] or list[Tensor[1]]): A one dimensional int8 tensor that contains the raw bytes of the
+            JPEG file, or a list of them if ``input`` is a list.
     """
     if quality < 1 or quality > 100:
         raise ValueError('Image quality should be a positive number '
                          'between 1 and 100')
 
+    if isinstance(input, list):
+        return torch.ops.image.encode_jpegs(input, quality)
     output = torch.ops.image.encode_jpeg(input, quality)
     return output
 
@@ -213,11 +413,17 @@ def write_jpeg(input: torch.Tensor, filename: str, quality: int = 75):
         quality (int): Quality of the resulting JPEG file, it must be a number
             between 1 and 100. Default: 75
     """
-    output = encode_jpeg(input, quality)
+    if quality < 1 or quality > 100:
+        raise ValueError('Image quality should be a positive number '
+                         'between 1 and 100')
+
+    output = torch.ops.image.encode_jpeg(input, quality)
     write_file(filename, output)
 
 
-def decode_image(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
+def decode_image(input: Union[torch.Tensor, List[torch.Tensor]], mode: ImageReadMode = ImageReadMode.UNCHANGED,
+                 size: Optional[List[int]] = None,
+                 out: Optional[torch.Tensor] = None) -> Union[torch.Tensor, List[torch.Tensor]]:
     """
     Detects whether an image is a JPEG or PNG and performs the appropriate
     operation to decode the image into a 3 dimensional RGB Tensor.
@@ -225,22 +431,94 @@ def decode_image(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHAN
     Optionally converts the image to the desired format.
     The values of the output tensor are uint8 between 0 and 255.
 
+    A list of encoded images can be passed to decode a whole batch at once, in
+    which case the images are decoded in parallel using the intra-op thread pool.
+
     Args:
-        input (Tensor): a one dimensional uint8 tensor containing the raw bytes of the
-            PNG or JPEG image.
+        input (Tensor or list[Tensor]): a one dimensional uint8 tensor containing the raw bytes of the
+            PNG or JPEG image, or a list of such tensors. Any object supporting the buffer protocol
+            (e.g. ``bytes``, ``memoryview`` or a numpy array) can also be passed instead of a tensor,
+            in which case its memory is used without being copied.
         mode (ImageReadMode): the read mode used for optionally converting the image.
             Default: ``ImageReadMode.UNCHANGED``.
             See ``ImageReadMode`` class for more information on various
             available modes.
+        size (sequence or int, optional): Minimum size of the decoded image, used to
+            downscale JPEG images while decoding. PNG images are always decoded at full
+            resolution. See :func:`decode_jpeg` for more details. Default: ``None``.
+        out (Tensor, optional): uint8 tensor the image, or the batch of images if ``input`` is a
+            list, is decoded into. JPEG images are written directly into it when possible, PNG
+            images are decoded and copied. See :func:`decode_jpeg` for more details. Default: ``None``.
 
     Returns:
-        output (Tensor[image_channels, image_height, image_width])
+        output (Tensor[image_channels, image_height, image_width] or list[Tensor]):
+            the decoded image, or the list of decoded images if ``input`` is a list.
+            If ``out`` is given, it is returned.
     """
-    output = torch.ops.image.decode_image(input, mode.value)
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
+    decode_size = _get_decode_size(size)
+    if out is not None:
+        if isinstance(input, list):
+            return torch.ops.image.decode_images_out(input, out, mode.value, decode_size)
+        return torch.ops.image.decode_image_out(input, out, mode.value, decode_size)
+
+    if isinstance(input, list):
+        return torch.ops.image.decode_images(input, mode.value, decode_size)
+
+    output = torch.ops.image.decode_image(input, mode.value, decode_size)
     return output
 
 
-def read_image(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
+def decode_image_info(input: torch.Tensor) -> ImageInfo:
+    """
+    Returns the size, number of channels and format of a JPEG or PNG image,
+    without decoding it.
+
+    Only the JPEG SOF segment or the PNG IHDR chunk is parsed, which makes this
+    much cheaper than decoding the image.
+
+    Args:
+        input (Tensor or buffer): a one dimensional uint8 tensor containing the raw bytes of the
+            PNG or JPEG image, or any object supporting the buffer protocol.
+
+    Returns:
+        ImageInfo: a named tuple ``(height, width, channels, format)``
+    """
+    if not torch.jit.is_scripting():
+        input = _as_uint8_tensor(input)
+    height, width, channels, format = torch.ops.image.decode_image_info(input)
+    return ImageInfo(height, width, channels, format)
+
+
+def read_image_info(path: Union[str, List[str]]) -> Union[ImageInfo, List[ImageInfo]]:
+    """
+    Returns the size, number of channels and format of a JPEG or PNG image file,
+    without reading the whole file nor decoding the image.
+
+    Only the bytes up to the JPEG SOF segment or the PNG IHDR chunk are read from
+    the file. A list of paths can be passed, in which case the files are read in
+    parallel using the intra-op thread pool (see :func:`torch.set_num_threads`).
+
+    Args:
+        path (str or list[str]): path of the JPEG or PNG image, or a list of paths.
+
+    Returns:
+        ImageInfo or list[ImageInfo]: a named tuple ``(height, width, channels, format)``,
+            or a list of them if ``path`` is a list.
+    """
+    if isinstance(path, list):
+        infos: List[ImageInfo] = []
+        for height, width, channels, format in torch.ops.image.read_image_infos(path):
+            infos.append(ImageInfo(height, width, channels, format))
+        return infos
+
+    height, width, channels, format = torch.ops.image.read_image_info(path)
+    return ImageInfo(height, width, channels, format)
+
+
+def read_image(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED,
+               size: Optional[List[int]] = None) -> torch.Tensor:
     """
     Reads a JPEG or PNG image into a 3 dimensional RGB Tensor.
     Optionally converts the image to the desired format.
@@ -252,9 +530,241 @@ def read_image(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torc
             Default: ``ImageReadMode.UNCHANGED``.
             See ``ImageReadMode`` class for more information on various
             available modes.
+        size (sequence or int, optional): Minimum size of the decoded image, used to
+            downscale JPEG images while decoding. See :func:`decode_jpeg` for more details.
+            Default: ``None``.
 
     Returns:
         output (Tensor[image_channels, image_height, image_width])
+
+    Example:
+        ``read_image`` can be used as the loader of an
+        :class:`~torchvision.datasets.ImageFolder` followed by a resize, in which
+        case the target size can be passed down to the decoder::
+
+            loader = functools.partial(read_image, mode=ImageReadMode.RGB, size=256)
+            dataset = ImageFolder(root, loader=loader, transform=T.Compose([T.Resize(256), ...]))
     """
     data = read_file(path)
-    return decode_image(data, mode)
+    return torch.ops.image.decode_image(data, mode.value, _get_decode_size(size))
+
+
+class ImageWriter:
+    """
+    Encodes and writes images to JPEG or PNG files in the background.
+
+    Images are encoded and written by a pool of threads, so that the loop producing
+    them doesn't have to wait for the compression. The format of each file is
+    determined from the extension of its filename (``.jpg``, ``.jpeg`` or ``.png``).
+
+    Errors raised while writing an image are re-raised by the next call to
+    :meth:`write` or by :meth:`close`.
+
+    Example:
+        The following example writes a stream of images, at most 32 of them being
+        kept in memory at a time::
+
+            with ImageWriter(num_workers=4, max_queue_size=32) as writer:
+                for i, img in enumerate(images):
+                    writer.write(img, f"{i:06d}.png")
+
+    .. note::
+
+        The images are not copied: a tensor passed to :meth:`write` must not be
+        modified until it has been written, i.e. until :meth:`close` returns.
+
+    Args:
+        num_workers (int, optional): number of threads encoding and writing images.
+            Default: ``None``, which uses as many threads as
+            :class:`concurrent.futures.ThreadPoolExecutor`.
+        max_queue_size (int): maximum number of images waiting to be written. When
+            it is reached, :meth:`write` blocks until an image has been written. Default: 64
+        quality (int): quality of the JPEG files, see :func:`encode_jpeg`. Default: 75
+        compression_level (int): compression level of the PNG files, see :func:`encode_png`. Default: 6
+        strategy (str): zlib compression strategy of the PNG files, see :func:`encode_png`.
+            Default: ``"default"``
+        filter (str): row filter of the PNG files, see :func:`encode_png`. Default: ``"default"``
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, max_queue_size: int = 64, quality: int = 75,
+                 compression_level: int = 6, strategy: str = "default", filter: str = "default") -> None:
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size should be a positive number, got {}".format(max_queue_size))
+        if quality < 1 or quality > 100:
+            raise ValueError('Image quality should be a positive number '
+                             'between 1 and 100')
+
+        self.quality = quality
+        self.compression_level = compression_level
+        self.strategy = strategy
+        self.filter = filter
+
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._slots = threading.BoundedSemaphore(max_queue_size)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    def write(self, input: torch.Tensor, filename: str) -> None:
+        """
+        Queues an image to be written.
+
+        Args:
+            input (Tensor[channels, image_height, image_width]): uint8 image tensor of
+                ``c`` channels, where ``c`` must be 1 or 3.
+            filename (str): Path to save the image.
+        """
+        if self._closed:
+            raise RuntimeError("Cannot write images with a closed ImageWriter")
+        self._raise_error()
+
+        ext = osp.splitext(filename)[1].lower()
+        if ext in (".jpg", ".jpeg"):
+            encode = self._encode_jpeg
+        elif ext == ".png":
+            encode = self._encode_png
+        else:
+            raise ValueError("Unsupported image file extension '{}', expected .jpg, .jpeg or .png".format(ext))
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, encode, input, filename)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_written)
+
+    def close(self) -> None:
+        """
+        Waits for all the queued images to be written and stops the threads.
+        """
+        if not self._closed:
+            self._closed = True
+            self._executor.shutdown(wait=True)
+        self._raise_error()
+
+    def __enter__(self) -> "ImageWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't hide the exception raised in the with block
+            self._closed = True
+            self._executor.shutdown(wait=True)
+
+    def _encode_jpeg(self, input: torch.Tensor) -> torch.Tensor:
+        return torch.ops.image.encode_jpeg(input, self.quality)
+
+    def _encode_png(self, input: torch.Tensor) -> torch.Tensor:
+        return torch.ops.image.encode_png(input, self.compression_level, self.strategy, self.filter)
+
+    @staticmethod
+    def _write(encode: Any, input: torch.Tensor, filename: str) -> None:
+        write_file(filename, encode(input))
+
+    def _on_written(self, future: Any) -> None:
+        self._slots.release()
+        error = future.exception()
+        if error is not None and self._error is None:
+            self._error = error
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+class ImageReader:
+    """
+    Reads and decodes images in the background, keeping a bounded number of reads in flight.
+
+    Iterating over an ``ImageReader`` yields the images of ``paths``, which are read and
+    decoded ahead of time by a pool of threads. This hides the latency of the storage,
+    e.g. of network filesystems, from the loop consuming the images. At most
+    ``max_in_flight`` images are being read or waiting to be consumed at any time.
+
+    By default the images are yielded in the order of ``paths``. With ``ordered=False``
+    they are yielded as soon as they are decoded, as ``(index, image)`` tuples where
+    ``index`` is the position of the image in ``paths``.
+
+    Errors raised while reading an image are re-raised when that image is reached by the
+    iteration. The reads still pending when the iteration stops are cancelled.
+
+    Example:
+        The following example reads a list of files with at most 32 reads in flight::
+
+            for img in ImageReader(paths, max_in_flight=32, mode=ImageReadMode.RGB):
+                ...
+
+    Args:
+        paths (iterable of str): paths of the images to read. It is consumed lazily, and
+            iterated again every time the reader is iterated over.
+        num_workers (int, optional): number of threads reading images.
+            Default: ``None``, which uses ``max_in_flight`` threads.
+        max_in_flight (int): maximum number of images being read or waiting to be
+            consumed. Default: 16
+        ordered (bool): whether to yield the images in the order of ``paths``, or as they
+            are decoded. Default: ``True``
+        mode (ImageReadMode): the read mode used for optionally converting the images,
+            see :func:`read_image`. Default: ``ImageReadMode.UNCHANGED``.
+        size (sequence or int, optional): Minimum size of the decoded images, see
+            :func:`read_image`. Default: ``None``.
+        loader (callable, optional): a function loading an image from its path, used instead
+            of :func:`read_image`. ``mode`` and ``size`` are ignored if it is given.
+    """
+
+    def __init__(self, paths: Iterable[str], num_workers: Optional[int] = None, max_in_flight: int = 16,
+                 ordered: bool = True, mode: ImageReadMode = ImageReadMode.UNCHANGED,
+                 size: Optional[List[int]] = None, loader: Optional[Callable[[str], Any]] = None) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight should be a positive number, got {}".format(max_in_flight))
+
+        self.paths = paths
+        self.num_workers = num_workers if num_workers is not None else max_in_flight
+        self.max_in_flight = max_in_flight
+        self.ordered = ordered
+        self.mode = mode
+        self.size = size
+        self.loader = loader
+
+    def __iter__(self) -> Iterator[Any]:
+        paths = enumerate(self.paths)
+        executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        pending: Any = deque() if self.ordered else set()
+
+        def submit() -> bool:
+            try:
+                index, path = next(paths)
+            except StopIteration:
+                return False
+            future = executor.submit(self._load, path)
+            if self.ordered:
+                pending.append(future)
+            else:
+                future.index = index  # type: ignore[attr-defined]
+                pending.add(future)
+            return True
+
+        try:
+            while len(pending) < self.max_in_flight and submit():
+                pass
+            while pending:
+                if self.ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.difference_update(done)
+                for future in done:
+                    img = future.result()
+                    submit()
+                    yield img if self.ordered else (future.index, img)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _load(self, path: str) -> Any:
+        if self.loader is not None:
+            return self.loader(path)
+        return read_image(path, self.mode, self.size)
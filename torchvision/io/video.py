@@ -1,9 +1,16 @@
+import collections
 import gc
+import hashlib
+import io
+import itertools
 import math
 import os
+import queue
 import re
+import threading
 import warnings
-from typing import Any, Dict, List, Optional, Tuple, Union
+from fractions import Fraction
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
@@ -49,6 +56,20 @@ _CALLED_TIMES = 0
 _GC_COLLECTION_INTERVAL = 10
 
 
+_AUDIO_FORMAT_DTYPES = {
+    'dbl': '<f8',
+    'dblp': '<f8',
+    'flt': '<f4',
+    'fltp': '<f4',
+    's16': '<i2',
+    's16p': '<i2',
+    's32': '<i4',
+    's32p': '<i4',
+    'u8': 'u1',
+    'u8p': 'u1',
+}
+
+
 def write_video(
     filename: str,
     video_array: torch.Tensor,
@@ -92,18 +113,6 @@ def write_video(
         stream.options = options or {}
 
         if audio_array is not None:
-            audio_format_dtypes = {
-                'dbl': '<f8',
-                'dblp': '<f8',
-                'flt': '<f4',
-                'fltp': '<f4',
-                's16': '<i2',
-                's16p': '<i2',
-                's32': '<i4',
-                's32p': '<i4',
-                'u8': 'u1',
-                'u8p': 'u1',
-            }
             a_stream = container.add_stream(audio_codec, rate=audio_fps)
             a_stream.options = audio_options or {}
 
@@ -111,7 +120,7 @@ def write_video(
             audio_layout = "stereo" if num_channels > 1 else "mono"
             audio_sample_fmt = container.streams.audio[0].format.name
 
-            format_dtype = np.dtype(audio_format_dtypes[audio_sample_fmt])
+            format_dtype = np.dtype(_AUDIO_FORMAT_DTYPES[audio_sample_fmt])
             audio_array = torch.as_tensor(audio_array).numpy().astype(format_dtype)
 
             frame = av.AudioFrame.from_ndarray(
@@ -137,19 +146,384 @@ def write_video(
             container.mux(packet)
 
 
-def _read_from_stream(
-    container: "av.container.Container",
-    start_offset: float,
-    end_offset: float,
-    pts_unit: str,
-    stream: "av.stream.Stream",
-    stream_name: Dict[str, Optional[Union[int, Tuple[int, ...], List[int]]]],
-) -> List["av.frame.Frame"]:
-    global _CALLED_TIMES, _GC_COLLECTION_INTERVAL
-    _CALLED_TIMES += 1
-    if _CALLED_TIMES % _GC_COLLECTION_INTERVAL == _GC_COLLECTION_INTERVAL - 1:
-        gc.collect()
+class VideoWriter:
+    """
+    Encodes and writes a video file incrementally.
+
+    Unlike :func:`write_video`, which needs the whole video as a single tensor, frames
+    and audio are passed in as they are produced, and are encoded and written by a
+    background thread. At most ``max_queue_size`` frame batches and audio chunks are
+    waiting to be encoded at a time, so the memory use does not depend on the length
+    of the video.
+
+    Errors raised while encoding are re-raised by the next call to :meth:`write`,
+    :meth:`write_audio` or by :meth:`close`.
+
+    Example:
+        The following example writes frames as they are rendered::
+
+            with VideoWriter("out.mp4", fps=30, options={"crf": "18"}) as writer:
+                for frame in render():  # Tensor[H, W, C]
+                    writer.write(frame)
+
+    .. note::
+
+        The frames and audio are not copied: a tensor passed to :meth:`write` or
+        :meth:`write_audio` must not be modified until it has been encoded, i.e.
+        until :meth:`close` returns.
+
+    Args:
+        filename (str): path where the video will be saved
+        fps (Number): video frames per second
+        video_codec (str): the name of the video codec, i.e. "libx264", "h264", etc.
+        options (Dict): dictionary containing options to be passed into the PyAV video stream
+        audio_fps (Number): audio sample rate, typically 44100 or 48000. Required to write audio
+        audio_codec (str): the name of the audio codec, i.e. "mp3", "aac", etc. Required to write audio
+        audio_options (Dict): dictionary containing options to be passed into the PyAV audio stream
+        audio_channels (int): number of audio channels, 1 or 2. Default: 2
+        max_queue_size (int): maximum number of frame batches and audio chunks waiting to be
+            encoded. When it is reached, writing blocks until one has been encoded. Default: 16
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        fps: float,
+        video_codec: str = "libx264",
+        options: Optional[Dict[str, Any]] = None,
+        audio_fps: Optional[float] = None,
+        audio_codec: Optional[str] = None,
+        audio_options: Optional[Dict[str, Any]] = None,
+        audio_channels: int = 2,
+        max_queue_size: int = 16,
+    ) -> None:
+        _check_av_available()
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size should be a positive number, got {}".format(max_queue_size))
+        if (audio_codec is None) != (audio_fps is None):
+            raise ValueError("audio_codec and audio_fps should be given together")
+        if audio_channels not in (1, 2):
+            raise ValueError("audio_channels should be 1 or 2, got {}".format(audio_channels))
+
+        # PyAV does not support floating point numbers with decimal point
+        # and will throw OverflowException in case this is not the case
+        if isinstance(fps, float):
+            fps = np.round(fps)
+
+        self.filename = filename
+        self.fps = fps
+        self.video_codec = video_codec
+        self.options = options
+        self.audio_fps = audio_fps
+        self.audio_codec = audio_codec
+        self.audio_options = audio_options
+        self.audio_channels = audio_channels
+        self._audio_layout = "stereo" if audio_channels == 2 else "mono"
+
+        self._container = av.open(filename, mode="w")
+        self._stream = None
+        self._audio_stream = None
+        self._queue: "queue.Queue[Optional[Tuple[str, np.ndarray]]]" = queue.Queue(max_queue_size)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, frames: torch.Tensor) -> None:
+        """
+        Queues frames to be encoded.
+
+        Args:
+            frames (Tensor[H, W, C] or Tensor[T, H, W, C]): a frame or a batch of frames, as
+                uint8 RGB tensors. All the frames of a video must have the same size.
+        """
+        frames = torch.as_tensor(frames, dtype=torch.uint8)
+        if frames.ndim == 3:
+            frames = frames.unsqueeze(0)
+        if frames.ndim != 4 or frames.shape[-1] != 3:
+            raise ValueError("Expected frames of shape [H, W, 3] or [T, H, W, 3], got {}".format(list(frames.shape)))
+        self._put("video", frames.numpy())
+
+    def write_audio(self, audio: torch.Tensor) -> None:
+        """
+        Queues audio to be encoded. Audio can only be written after the first frames,
+        which determine the size of the video.
+
+        Args:
+            audio (Tensor[C, N]): the next ``N`` samples of each of the ``C`` channels
+        """
+        if self.audio_codec is None:
+            raise RuntimeError("Cannot write audio with a VideoWriter created without audio_codec")
+        audio = torch.as_tensor(audio)
+        if audio.ndim != 2 or audio.shape[0] != self.audio_channels:
+            raise ValueError(
+                "Expected audio of shape [{}, N], got {}".format(self.audio_channels, list(audio.shape))
+            )
+        self._put("audio", audio.numpy())
+
+    def close(self) -> None:
+        """
+        Waits for all the queued frames and audio to be encoded, flushes the encoders and
+        closes the file.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self) -> "VideoWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't hide the exception raised in the with block
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _put(self, kind: str, data: np.ndarray) -> None:
+        if self._closed:
+            raise RuntimeError("Cannot write to a closed VideoWriter")
+        self._raise_error()
+        self._queue.put((kind, data))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if self._error is not None:
+                    # keep draining the queue, so that writers don't block
+                    continue
+                try:
+                    kind, data = item
+                    if kind == "video":
+                        self._encode_video(data)
+                    else:
+                        self._encode_audio(data)
+                except BaseException as e:
+                    self._error = e
+            if self._error is None:
+                self._flush()
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._container.close()
+
+    def _add_streams(self, height: int, width: int) -> None:
+        # the size of the video is only known from the first frames, and all the streams
+        # have to be added before any packet is written
+        self._stream = self._container.add_stream(self.video_codec, rate=self.fps)
+        self._stream.width = width
+        self._stream.height = height
+        self._stream.pix_fmt = "yuv420p" if self.video_codec != "libx264rgb" else "rgb24"
+        self._stream.options = self.options or {}
+        if self.audio_codec is not None:
+            self._audio_stream = self._container.add_stream(self.audio_codec, rate=self.audio_fps)
+            self._audio_stream.layout = self._audio_layout
+            self._audio_stream.options = self.audio_options or {}
+
+    def _encode_video(self, frames: np.ndarray) -> None:
+        if self._stream is None:
+            self._add_streams(frames.shape[1], frames.shape[2])
+        for img in frames:
+            frame = av.VideoFrame.from_ndarray(img, format="rgb24")
+            frame.pict_type = "NONE"
+            for packet in self._stream.encode(frame):
+                self._container.mux(packet)
+
+    def _encode_audio(self, audio: np.ndarray) -> None:
+        if self._stream is None:
+            raise RuntimeError("The first frames have to be written before any audio")
+        audio_sample_fmt = self._audio_stream.format.name
+        format_dtype = np.dtype(_AUDIO_FORMAT_DTYPES[audio_sample_fmt])
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(audio.astype(format_dtype)), format=audio_sample_fmt, layout=self._audio_layout
+        )
+        frame.sample_rate = self.audio_fps
+        for packet in self._audio_stream.encode(frame):
+            self._container.mux(packet)
+
+    def _flush(self) -> None:
+        for stream in (self._audio_stream, self._stream):
+            if stream is not None:
+                for packet in stream.encode():
+                    self._container.mux(packet)
+
+
+class KeyframeIndex:
+    """
+    Presentation timestamps of the frames of the first video stream of a file, along with
+    which of them are keyframes.
+
+    The index is built by demuxing the file, which is much cheaper than decoding it. The
+    readers use it to seek right to the keyframe that starts the group of pictures of a
+    frame, instead of seeking a safety margin earlier and decoding forward from there.
+    Use :func:`read_keyframe_index` to build it once and cache it on disk.
+
+    Args:
+        pts (Tensor[N]): sorted presentation timestamps of the video frames, in ``time_base`` units
+        keyframes (Tensor[N]): boolean mask of the frames in ``pts`` that are keyframes
+        time_base (Fraction): time base of the video stream
+    """
+
+    def __init__(self, pts: torch.Tensor, keyframes: torch.Tensor, time_base: Fraction) -> None:
+        self.pts = pts
+        self.keyframes = keyframes
+        self.time_base = time_base
+        self._keyframe_pts = pts[keyframes] if keyframes.any() else pts[:1]
+
+    def __len__(self) -> int:
+        return len(self.pts)
+
+    def keyframe_before(self, pts: int) -> int:
+        """Returns the pts of the last keyframe at or before ``pts``."""
+        idx = int(torch.searchsorted(self._keyframe_pts, torch.tensor([pts]), right=True)) - 1
+        return int(self._keyframe_pts[max(idx, 0)])
+
+    def frames_between(self, start_pts: int, end_pts: float) -> torch.Tensor:
+        """Returns the pts of the frames in the closed interval ``[start_pts, end_pts]``."""
+        return self.pts[(self.pts >= start_pts) & (self.pts <= end_pts)]
+
+    def to_sec(self, pts: int) -> float:
+        return float(pts * self.time_base)
+
+    def to_pts(self, sec: float) -> int:
+        # tolerate the rounding error of times computed from the pts
+        return int(math.floor(sec / self.time_base + 1e-6))
+
+    @classmethod
+    def build(cls, filename: str) -> "KeyframeIndex":
+        """Builds the index of a video file by reading its packets, without decoding them."""
+        _check_av_available()
+        pts = []
+        keyframes = []
+        with av.open(filename, metadata_errors="ignore") as container:
+            if not container.streams.video:
+                raise ValueError(f"{filename} has no video stream")
+            stream = container.streams.video[0]
+            time_base = stream.time_base
+            for packet in container.demux(stream):
+                if packet.pts is not None:
+                    pts.append(packet.pts)
+                    keyframes.append(packet.is_keyframe)
+        pts_tensor = torch.tensor(pts, dtype=torch.int64)
+        pts_tensor, order = pts_tensor.sort()
+        return cls(pts_tensor, torch.tensor(keyframes, dtype=torch.bool)[order], time_base)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(num_frames={len(self)}, num_keyframes={int(self.keyframes.sum())})"
+
 
+_KEYFRAME_INDEX_VERSION = 1
+
+
+def _keyframe_index_path(filename: str, stat: os.stat_result, cache_dir: Optional[str]) -> str:
+    if cache_dir is None:
+        return filename + ".keyframes.pt"
+    key = f"{os.path.abspath(filename)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".pt")
+
+
+def read_keyframe_index(filename: str, cache_dir: Optional[str] = None) -> KeyframeIndex:
+    """
+    Returns the :class:`KeyframeIndex` of a video file, building it on the first call and
+    loading it from disk afterwards.
+
+    The index is stored next to the video as ``<filename>.keyframes.pt``, or in ``cache_dir``
+    under a name derived from the path, modification time and size of the video. In both cases
+    an index that does not match the current modification time and size of the video is rebuilt.
+    If the index cannot be written, a warning is raised and the index is only returned.
+
+    Args:
+        filename (str): path to the video file
+        cache_dir (str, optional): directory of the index files. Defaults to storing the index
+            next to the video
+
+    Returns:
+        KeyframeIndex: the index of the first video stream of the file
+    """
+    stat = os.stat(filename)
+    source = {"version": _KEYFRAME_INDEX_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    path = _keyframe_index_path(filename, stat, cache_dir)
+
+    if os.path.exists(path):
+        try:
+            data = torch.load(path)
+        except Exception as e:
+            warnings.warn(f"Ignoring unreadable keyframe index {path}: {e}")
+        else:
+            if data["source"] == source:
+                return KeyframeIndex(data["pts"], data["keyframes"], Fraction(*data["time_base"]))
+
+    index = KeyframeIndex.build(filename)
+    data = {
+        "source": source,
+        "pts": index.pts,
+        "keyframes": index.keyframes,
+        "time_base": (index.time_base.numerator, index.time_base.denominator),
+    }
+    try:
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first so that concurrent readers never see a partial index
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(data, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        warnings.warn(f"Failed to save the keyframe index of {filename} to {path}: {e}")
+    return index
+
+
+def _av_input(src: Union[str, bytes, torch.Tensor]) -> Union[str, io.BytesIO]:
+    # PyAV reads encoded videos in memory from file-like objects
+    if isinstance(src, str):
+        return src
+    if isinstance(src, torch.Tensor):
+        src = src.numpy().tobytes()
+    return io.BytesIO(src)
+
+
+# number of frames decoded past the end of a range, to sort out-of-order pts
+_MAX_BUFFER_SIZE = 5
+
+
+def _should_buffer(stream: "av.stream.Stream") -> bool:
+    # DivX-style packed B-frames can have out-of-order pts (2 frames in a single pkt)
+    # so need to buffer some extra frames to sort everything properly. Packed
+    # B-frames only exist in MPEG-4 part 2 video, decoders of other codecs return
+    # the frames in presentation order.
+    if stream.type != "video" or stream.codec_context.name != "mpeg4":
+        return False
+    should_buffer = True
+    extradata = stream.codec_context.extradata
+    # overly complicated way of finding if `divx_packed` is set, following
+    # https://github.com/FFmpeg/FFmpeg/commit/d5a21172283572af587b3d939eba0091484d3263
+    if extradata and b"DivX" in extradata:
+        # can't use regex directly because of some weird characters sometimes...
+        pos = extradata.find(b"DivX")
+        d = extradata[pos:]
+        o = re.search(br"DivX(\d+)Build(\d+)(\w)", d)
+        if o is None:
+            o = re.search(br"DivX(\d+)b(\d+)(\w)", d)
+        if o is not None:
+            should_buffer = o.group(3) == b"p"
+    return should_buffer
+
+
+def _to_stream_pts(
+    start_offset: float, end_offset: float, pts_unit: str, stream: "av.stream.Stream"
+) -> Tuple[int, float]:
     if pts_unit == "sec":
         start_offset = int(math.floor(start_offset * (1 / stream.time_base)))
         if end_offset != float("inf"):
@@ -159,44 +533,69 @@ def _read_from_stream(
             "The pts_unit 'pts' gives wrong results and will be removed in a "
             + "follow-up version. Please use pts_unit 'sec'."
         )
+    return start_offset, end_offset
 
-    frames = {}
-    should_buffer = True
-    max_buffer_size = 5
-    if stream.type == "video":
-        # DivX-style packed B-frames can have out-of-order pts (2 frames in a single pkt)
-        # so need to buffer some extra frames to sort everything
-        # properly
-        extradata = stream.codec_context.extradata
-        # overly complicated way of finding if `divx_packed` is set, following
-        # https://github.com/FFmpeg/FFmpeg/commit/d5a21172283572af587b3d939eba0091484d3263
-        if extradata and b"DivX" in extradata:
-            # can't use regex directly because of some weird characters sometimes...
-            pos = extradata.find(b"DivX")
-            d = extradata[pos:]
-            o = re.search(br"DivX(\d+)Build(\d+)(\w)", d)
-            if o is None:
-                o = re.search(br"DivX(\d+)b(\d+)(\w)", d)
-            if o is not None:
-                should_buffer = o.group(3) == b"p"
-    seek_offset = start_offset
-    # some files don't seek to the right location, so better be safe here
-    seek_offset = max(seek_offset - 1, 0)
-    if should_buffer:
-        # FIXME this is kind of a hack, but we will jump to the previous keyframe
-        # so this will be safe
-        seek_offset = max(seek_offset - max_buffer_size, 0)
+
+def _decode_range(
+    container: "av.container.Container",
+    start_offset: int,
+    end_offset: float,
+    stream: "av.stream.Stream",
+    stream_name: Dict[str, Optional[Union[int, Tuple[int, ...], List[int]]]],
+    keyframe_index: Optional[KeyframeIndex] = None,
+) -> Iterator["av.frame.Frame"]:
+    """Seeks before ``start_offset`` and yields the decoded frames until ``end_offset`` is passed."""
+    global _CALLED_TIMES, _GC_COLLECTION_INTERVAL
+    _CALLED_TIMES += 1
+    if _CALLED_TIMES % _GC_COLLECTION_INTERVAL == _GC_COLLECTION_INTERVAL - 1:
+        gc.collect()
+
+    should_buffer = _should_buffer(stream)
+    max_buffer_size = _MAX_BUFFER_SIZE
+    # frames that still have to be decoded when the index tells which ones there are
+    pending = None
+    if keyframe_index is not None:
+        if keyframe_index.time_base != stream.time_base:
+            raise ValueError(
+                f"The keyframe index has a time base of {keyframe_index.time_base}, "
+                f"but the stream has a time base of {stream.time_base}"
+            )
+        # seek right to the keyframe of the first frame, which is the last one
+        # before start_offset if there is no frame at start_offset
+        pending = set(keyframe_index.frames_between(start_offset, end_offset).tolist())
+        first_frame = start_offset
+        if start_offset > 0 and start_offset not in pending:
+            preceding = keyframe_index.pts[keyframe_index.pts < start_offset]
+            if len(preceding) > 0:
+                first_frame = int(preceding[-1])
+                pending.add(first_frame)
+        if not pending:
+            return
+        seek_offset = keyframe_index.keyframe_before(first_frame)
+    else:
+        seek_offset = start_offset
+        # some files don't seek to the right location, so better be safe here
+        seek_offset = max(seek_offset - 1, 0)
+        if should_buffer:
+            # FIXME this is kind of a hack, but we will jump to the previous keyframe
+            # so this will be safe
+            seek_offset = max(seek_offset - max_buffer_size, 0)
     try:
         # TODO check if stream needs to always be the video stream here or not
         container.seek(seek_offset, any_frame=False, backward=True, stream=stream)
     except av.AVError:
         # TODO add some warnings in this case
         # print("Corrupted file?", container.name)
-        return []
+        return
     buffer_count = 0
     try:
         for _idx, frame in enumerate(container.decode(**stream_name)):
-            frames[frame.pts] = frame
+            yield frame
+            if pending is not None:
+                # all frames are known, so there is no need to buffer past the end
+                pending.discard(frame.pts)
+                if not pending:
+                    break
             if frame.pts >= end_offset:
                 if should_buffer and buffer_count < max_buffer_size:
                     buffer_count += 1
@@ -205,6 +604,21 @@ def _read_from_stream(
     except av.AVError:
         # TODO add a warning
         pass
+
+
+def _read_from_stream(
+    container: "av.container.Container",
+    start_offset: float,
+    end_offset: float,
+    pts_unit: str,
+    stream: "av.stream.Stream",
+    stream_name: Dict[str, Optional[Union[int, Tuple[int, ...], List[int]]]],
+    keyframe_index: Optional[KeyframeIndex] = None,
+) -> List["av.frame.Frame"]:
+    start_offset, end_offset = _to_stream_pts(start_offset, end_offset, pts_unit, stream)
+    frames = {}
+    for frame in _decode_range(container, start_offset, end_offset, stream, stream_name, keyframe_index):
+        frames[frame.pts] = frame
     # ensure that the results are sorted wrt the pts
     result = [
         frames[i] for i in sorted(frames) if start_offset <= frames[i].pts <= end_offset
@@ -220,6 +634,108 @@ def _read_from_stream(
     return result
 
 
+def _estimate_num_frames(
+    stream: "av.stream.Stream", start_offset: int, end_offset: float, keyframe_index: Optional[KeyframeIndex]
+) -> int:
+    if keyframe_index is not None:
+        # one more for the frame preceding start_offset
+        return len(keyframe_index.frames_between(start_offset, end_offset)) + 1
+    rate = stream.average_rate or stream.guessed_rate
+    if stream.duration:
+        end_offset = min(end_offset, (stream.start_time or 0) + stream.duration)
+    num_frames = 0
+    if rate and end_offset != float("inf"):
+        num_frames = int(math.ceil(max(end_offset - start_offset, 0) * stream.time_base * rate)) + 2
+    if stream.frames:
+        num_frames = min(num_frames, stream.frames + 1) if num_frames else stream.frames + 1
+    return num_frames or 16
+
+
+class _ClipFrames:
+    """
+    The video frames of a range of pts, as :func:`_read_from_stream` selects them, which are
+    converted to RGB as they are decoded and copied into a tensor preallocated for
+    ``capacity`` frames, so that no decoded frame needs to be kept.
+    """
+
+    def __init__(self, start_offset: int, end_offset: float, capacity: int) -> None:
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.capacity = capacity
+        # number of frames decoded after end_offset
+        self.num_frames_past_end = 0
+        self._out: Optional[torch.Tensor] = None
+        # slot of each pts in out, slot 0 is kept for the frame preceding start_offset
+        self._slots: Dict[int, int] = {}
+        self._preceding: Optional["av.frame.Frame"] = None
+
+    def add(self, frame: "av.frame.Frame", data: Optional[torch.Tensor] = None) -> Optional[torch.Tensor]:
+        """Adds a decoded frame and returns its RGB data if it had to be converted, to share it."""
+        if frame.pts < self.start_offset:
+            if self._preceding is None or frame.pts > self._preceding.pts:
+                self._preceding = frame
+            return data
+        if frame.pts > self.end_offset:
+            self.num_frames_past_end += 1
+            return data
+        if data is None:
+            data = torch.from_numpy(frame.to_rgb().to_ndarray())
+        if self._out is None:
+            self._out = torch.empty((self.capacity + 1,) + data.shape, dtype=torch.uint8)
+        slot = self._slots.get(frame.pts)
+        if slot is None:
+            slot = len(self._slots) + 1
+            if slot == len(self._out):
+                grown = torch.empty((2 * len(self._out),) + data.shape, dtype=torch.uint8)
+                grown[:slot] = self._out
+                self._out = grown
+            self._slots[frame.pts] = slot
+        self._out[slot].copy_(data)
+        return data
+
+    def result(self) -> Optional[torch.Tensor]:
+        """Returns the frames sorted by pts, or None if there are none."""
+        out = self._out
+        first = 1
+        if self._preceding is not None and self.start_offset > 0 and self.start_offset not in self._slots:
+            # if there is no frame that exactly matches the pts of start_offset
+            # add the last frame smaller than start_offset, as _read_from_stream does
+            data = torch.from_numpy(self._preceding.to_rgb().to_ndarray())
+            if out is None:
+                out = torch.empty((1,) + data.shape, dtype=torch.uint8)
+            out[0].copy_(data)
+            first = 0
+        if out is None:
+            return None
+
+        # ensure that the results are sorted wrt the pts
+        order = [self._slots[pts] for pts in sorted(self._slots)]
+        if order != sorted(order):
+            out[1:len(order) + 1] = out[order]
+        return out[first:len(order) + 1]
+
+
+def _read_video_from_stream(
+    container: "av.container.Container",
+    start_offset: float,
+    end_offset: float,
+    pts_unit: str,
+    stream: "av.stream.Stream",
+    keyframe_index: Optional[KeyframeIndex] = None,
+) -> Optional[torch.Tensor]:
+    """
+    Same as :func:`_read_from_stream` for a video stream, but converts the frames to RGB as
+    soon as they are decoded and copies them into a tensor that is sized from the pts range,
+    so that only the output and a single decoded frame are held in memory.
+    """
+    start_offset, end_offset = _to_stream_pts(start_offset, end_offset, pts_unit, stream)
+    capacity = _estimate_num_frames(stream, start_offset, end_offset, keyframe_index)
+    clip = _ClipFrames(start_offset, end_offset, capacity)
+    for frame in _decode_range(container, start_offset, end_offset, stream, {"video": 0}, keyframe_index):
+        clip.add(frame)
+    return clip.result()
+
+
 def _align_audio_frames(
     aframes: torch.Tensor, audio_frames: List["av.frame.Frame"], ref_start: int, ref_end: float
 ) -> torch.Tensor:
@@ -236,20 +752,30 @@ def _align_audio_frames(
 
 
 def read_video(
-    filename: str, start_pts: int = 0, end_pts: Optional[float] = None, pts_unit: str = "pts"
+    filename: Union[str, bytes, torch.Tensor],
+    start_pts: int = 0,
+    end_pts: Optional[float] = None,
+    pts_unit: str = "pts",
+    keyframe_index: Optional[KeyframeIndex] = None,
 ) -> Tuple[torch.Tensor, torch.Tensor, Dict[str, Any]]:
     """
     Reads a video from a file, returning both the video frames as well as
     the audio frames
 
     Args:
-        filename (str): path to the video file
+        filename (str, bytes or Tensor): path to the video file, or the encoded video as bytes or
+            as a 1-dimensional uint8 tensor, e.g. read from a tar shard, so that it does not have
+            to be written to a temporary file
         start_pts (int if pts_unit = 'pts', float / Fraction if pts_unit = 'sec', optional):
             The start presentation time of the video
         end_pts (int if pts_unit = 'pts', float / Fraction if pts_unit = 'sec', optional):
             The end presentation time
         pts_unit (str, optional): unit in which start_pts and end_pts values will be interpreted,
             either 'pts' or 'sec'. Defaults to 'pts'.
+        keyframe_index (KeyframeIndex, optional): index of the video, see :func:`read_keyframe_index`.
+            If given, the video stream is decoded from the keyframe of the first frame and decoding
+            stops at the last frame, instead of starting and ending with a safety margin.
+            Only used by the ``pyav`` backend.
 
     Returns:
         vframes (Tensor[T, H, W, C]): the `T` video frames
@@ -259,7 +785,7 @@ def read_video(
 
     from torchvision import get_video_backend
 
-    if not os.path.exists(filename):
+    if isinstance(filename, str) and not os.path.exists(filename):
         raise RuntimeError(f'File not found: {filename}')
 
     if get_video_backend() != "pyav":
@@ -276,12 +802,37 @@ def read_video(
             "start_pts={} and end_pts={}".format(start_pts, end_pts)
         )
 
+    container = _open_container(filename)
+    try:
+        return _read_video_from_container(container, start_pts, end_pts, pts_unit, keyframe_index)
+    finally:
+        if container is not None:
+            container.close()
+
+
+def _open_container(filename: Union[str, bytes, torch.Tensor]) -> Optional["av.container.Container"]:
+    _check_av_available()
+    try:
+        return av.open(_av_input(filename), metadata_errors="ignore")
+    except av.AVError:
+        # TODO raise a warning?
+        return None
+
+
+def _read_video_from_container(
+    container: Optional["av.container.Container"],
+    start_pts: Union[float, Fraction],
+    end_pts: Union[float, Fraction],
+    pts_unit: str,
+    keyframe_index: Optional[KeyframeIndex] = None,
+) -> Tuple[torch.Tensor, torch.Tensor, Dict[str, Any]]:
+    # read_video from an open container, which can be read from several times
     info = {}
-    video_frames = []
+    vframes = None
     audio_frames = []
 
     try:
-        with av.open(filename, metadata_errors="ignore") as container:
+        if container is not None:
             time_base = _video_opt.default_timebase
             if container.streams.video:
                 time_base = container.streams.video[0].time_base
@@ -291,13 +842,13 @@ def read_video(
             start_pts_sec, end_pts_sec, pts_unit = _video_opt._convert_to_sec(
                 start_pts, end_pts, pts_unit, time_base)
             if container.streams.video:
-                video_frames = _read_from_stream(
+                vframes = _read_video_from_stream(
                     container,
                     start_pts_sec,
                     end_pts_sec,
                     pts_unit,
                     container.streams.video[0],
-                    {"video": 0},
+                    keyframe_index,
                 )
                 video_fps = container.streams.video[0].average_rate
                 # guard against potentially corrupted files
@@ -319,12 +870,9 @@ def read_video(
         # TODO raise a warning?
         pass
 
-    vframes_list = [frame.to_rgb().to_ndarray() for frame in video_frames]
     aframes_list = [frame.to_ndarray() for frame in audio_frames]
 
-    if vframes_list:
-        vframes = torch.as_tensor(np.stack(vframes_list))
-    else:
+    if vframes is None:
         vframes = torch.empty((0, 1, 1, 3), dtype=torch.uint8)
 
     if aframes_list:
@@ -337,28 +885,321 @@ def read_video(
     return vframes, aframes, info
 
 
-def _can_read_timestamps_from_packets(container: "av.container.Container") -> bool:
-    extradata = container.streams[0].codec_context.extradata
-    if extradata is None:
-        return False
-    if b"Lavc" in extradata:
-        return True
-    return False
+def _select_frames(frames: Dict[int, Any], start_offset: int, end_offset: float) -> List[Any]:
+    # the frames _read_from_stream returns for the range
+    result = [frames[pts] for pts in sorted(frames) if start_offset <= pts <= end_offset]
+    if start_offset > 0 and start_offset not in frames:
+        preceding = [pts for pts in frames if pts < start_offset]
+        if preceding:
+            result.insert(0, frames[max(preceding)])
+    return result
+
+
+def _drop_frames(frames: Dict[int, Any], start_offset: int) -> None:
+    # drops the frames before start_offset, but the one preceding it
+    preceding = [pts for pts in frames if pts < start_offset]
+    for pts in sorted(preceding)[:-1]:
+        del frames[pts]
+
+
+# Without a keyframe index, gaps between clips shorter than this are decoded through
+# instead of seeking, as seeking has to decode from an unknown keyframe anyway.
+_MAX_SEQUENTIAL_GAP_SEC = 1.0
+
+
+def _seek_is_cheaper(
+    prev_end: float, next_start: float, time_base: Fraction, keyframe_index: Optional[KeyframeIndex]
+) -> bool:
+    """
+    Whether seeking to ``next_start`` needs fewer frames to be decoded than decoding on
+    from ``prev_end``, both in units of ``time_base``.
+    """
+    if keyframe_index is not None:
+        # seeking only saves work if there is a keyframe in the gap
+        return keyframe_index.keyframe_before(int(next_start)) > prev_end
+    return (next_start - prev_end) * time_base > _MAX_SEQUENTIAL_GAP_SEC
+
+
+def _decode_video_ranges(
+    container: "av.container.Container",
+    ranges: List[Tuple[int, float]],
+    keyframe_index: Optional[KeyframeIndex] = None,
+    audio_ranges: Optional[List[Tuple[int, float]]] = None,
+) -> Iterator[Tuple[Optional[torch.Tensor], List["av.frame.Frame"]]]:
+    """
+    Yields the frames of the video stream in each of the ``ranges`` of pts, sorted by start
+    and end, in order and as soon as they are decoded: what :func:`_read_video_from_stream`
+    returns for the range, and the audio frames :func:`_read_from_stream` returns for the
+    matching range of ``audio_ranges``, if given.
+
+    The ranges are decoded in runs with a seek at the start of each: between two ranges the
+    decoder either keeps decoding or seeks, whichever needs fewer frames to be decoded, see
+    :func:`_seek_is_cheaper`. With ``audio_ranges`` the audio stream is decoded along with the
+    video, in a single run from the start. Every frame is converted once and copied into the
+    preallocated tensors of the ranges that contain it, so that the frames shared by
+    overlapping ranges are decoded once and no decoded frame is kept.
+    """
+    video_stream = container.streams.video[0]
+    audio_stream = container.streams.audio[0] if audio_ranges is not None else None
+    should_buffer = _should_buffer(video_stream)
+    # frames decoded past the end of a range before it's complete, see _decode_range
+    num_frames_past_end = _MAX_BUFFER_SIZE + 1 if should_buffer else 1
+
+    runs: List[List[int]] = []
+    run_end = -1.0
+    for i, (start, end) in enumerate(ranges):
+        if runs and (audio_stream is not None or not _seek_is_cheaper(
+                run_end, start, video_stream.time_base, keyframe_index)):
+            runs[-1].append(i)
+            run_end = max(run_end, end)
+        else:
+            runs.append([i])
+            run_end = end
+
+    for run in runs:
+        clips = [
+            _ClipFrames(start, end, _estimate_num_frames(video_stream, start, end, keyframe_index))
+            for start, end in (ranges[i] for i in run)
+        ]
+        # clips are started once a frame reaches their start, only started clips get the
+        # frames and the last few frames are kept to find the frame preceding the start
+        num_started = 0
+        started: List[int] = []
+        recent: Deque["av.frame.Frame"] = collections.deque(maxlen=num_frames_past_end + 1)
+        audio_frames: Dict[int, "av.frame.Frame"] = {}
+        max_audio_pts = -float("inf")
+        done: Dict[int, Tuple[Optional[torch.Tensor], List["av.frame.Frame"]]] = {}
+        next_clip = 0
+
+        def start_clips(pts: float) -> None:
+            nonlocal num_started
+            while num_started < len(clips) and clips[num_started].start_offset <= pts:
+                for frame in recent:
+                    clips[num_started].add(frame)
+                started.append(num_started)
+                num_started += 1
+
+        def finish_clip(k: int) -> None:
+            audio: List["av.frame.Frame"] = []
+            if audio_ranges is not None:
+                audio = _select_frames(audio_frames, *audio_ranges[run[k]])
+            done[k] = (clips[k].result(), audio)
+
+        def is_complete(k: int) -> bool:
+            if clips[k].num_frames_past_end < num_frames_past_end:
+                return False
+            return audio_ranges is None or max_audio_pts >= audio_ranges[run[k]][1]
+
+        try:
+            if audio_stream is None:
+                run_start = ranges[run[0]][0]
+                if keyframe_index is not None:
+                    seek_offset = keyframe_index.keyframe_before(run_start)
+                else:
+                    # same safety margin as _decode_range
+                    seek_offset = max(run_start - 1 - (_MAX_BUFFER_SIZE if should_buffer else 0), 0)
+                container.seek(seek_offset, any_frame=False, backward=True, stream=video_stream)
+            streams = [video_stream] + ([audio_stream] if audio_stream is not None else [])
+            for frame in container.decode(*streams):
+                if frame.pts is None:
+                    continue
+                if isinstance(frame, av.VideoFrame):
+                    start_clips(frame.pts)
+                    data = None
+                    for k in started:
+                        data = clips[k].add(frame, data)
+                    recent.append(frame)
+                else:
+                    audio_frames[frame.pts] = frame
+                    max_audio_pts = max(max_audio_pts, frame.pts)
+
+                finished = [k for k in started if is_complete(k)]
+                if finished:
+                    for k in finished:
+                        finish_clip(k)
+                    started = [k for k in started if k not in finished]
+                    while next_clip in done:
+                        yield done.pop(next_clip)
+                        next_clip += 1
+                    if audio_ranges is not None and next_clip < len(clips):
+                        _drop_frames(audio_frames, audio_ranges[run[next_clip]][0])
+                if num_started == len(clips) and not started:
+                    break
+        except av.AVError:
+            # TODO add a warning
+            pass
+
+        # the stream ended, or decoding failed, before the remaining clips were complete
+        start_clips(float("inf"))
+        for k in started:
+            finish_clip(k)
+        while next_clip < len(clips):
+            yield done.pop(next_clip)
+            next_clip += 1
+
+
+def _read_video_ranges(
+    container: "av.container.Container", ranges: List[Tuple[int, int]]
+) -> Iterator[Tuple[torch.Tensor, torch.Tensor, Dict[str, Any]]]:
+    """
+    Yields what :func:`_read_video_from_container` returns for each of the ``ranges`` of
+    pts of the video stream, sorted by start and end, but decodes the container once from
+    its start with :func:`_decode_video_ranges`, so that frames shared by overlapping
+    ranges, like the clips of a video, are decoded once.
+    """
+    if not container.streams.video:
+        for start_pts, end_pts in ranges:
+            yield _read_video_from_container(container, start_pts, end_pts, "pts")
+        return
+
+    video_stream = container.streams.video[0]
+    audio_stream = container.streams.audio[0] if container.streams.audio else None
+    info: Dict[str, Any] = {}
+    if video_stream.average_rate is not None:
+        info["video_fps"] = float(video_stream.average_rate)
+    if audio_stream is not None:
+        info["audio_fps"] = audio_stream.rate
+
+    # offsets of the ranges in each stream, as read_video computes them
+    video_ranges, audio_ranges = [], []
+    for start_pts, end_pts in ranges:
+        start_sec, end_sec, _ = _video_opt._convert_to_sec(start_pts, end_pts, "pts", video_stream.time_base)
+        video_ranges.append(_to_stream_pts(start_sec, end_sec, "sec", video_stream))
+        if audio_stream is not None:
+            audio_ranges.append(_to_stream_pts(start_sec, end_sec, "sec", audio_stream))
+
+    decoded = _decode_video_ranges(container, video_ranges, audio_ranges=audio_ranges if audio_stream else None)
+    for (start_pts, end_pts), (vframes, audio_frames) in zip(ranges, decoded):
+        if vframes is None:
+            vframes = torch.empty((0, 1, 1, 3), dtype=torch.uint8)
+        aframes = torch.empty((1, 0), dtype=torch.float32)
+        if audio_frames:
+            aframes = torch.as_tensor(np.concatenate([frame.to_ndarray() for frame in audio_frames], 1))
+            aframes = _align_audio_frames(aframes, audio_frames, start_pts, end_pts)
+        yield vframes, aframes, dict(info)
+
+
+def read_video_clips(
+    filename: str,
+    clips: List[Tuple[float, float]],
+    pts_unit: str = "pts",
+    keyframe_index: Optional[KeyframeIndex] = None,
+) -> List[torch.Tensor]:
+    """
+    Reads several clips of the video stream of a file in a single pass.
+
+    Compared to calling :func:`read_video` once per clip, the container is only opened once
+    and the clips are decoded in order of their start. Between two clips the decoder either
+    keeps decoding or seeks, whichever needs fewer frames to be decoded: with a
+    ``keyframe_index`` it seeks only if there is a keyframe in between, otherwise it seeks if
+    the clips are more than a second apart. Overlapping clips are only decoded once.
+
+    Each clip contains the same frames that :func:`read_video` returns for it. Audio is not read.
+
+    Args:
+        filename (str): path to the video file
+        clips (List[Tuple[int, int]] if pts_unit = 'pts', List[Tuple[float, float]] if pts_unit = 'sec'):
+            start and end presentation time of each clip, in any order
+        pts_unit (str, optional): unit in which the start and end values will be interpreted,
+            either 'pts' or 'sec'. Defaults to 'pts'.
+        keyframe_index (KeyframeIndex, optional): index of the video, see :func:`read_keyframe_index`.
+            Only used by the ``pyav`` backend.
+
+    Returns:
+        List[Tensor[T, H, W, C]]: the frames of each clip, in the order of ``clips``
+    """
+    from torchvision import get_video_backend
+
+    if not os.path.exists(filename):
+        raise RuntimeError(f'File not found: {filename}')
+
+    for start_pts, end_pts in clips:
+        if end_pts < start_pts:
+            raise ValueError(
+                "end_pts should be larger than start_pts, got "
+                "start_pts={} and end_pts={}".format(start_pts, end_pts)
+            )
+
+    if get_video_backend() != "pyav":
+        return [_video_opt._read_video(filename, start_pts, end_pts, pts_unit)[0] for start_pts, end_pts in clips]
+
+    _check_av_available()
+
+    result = [torch.empty((0, 1, 1, 3), dtype=torch.uint8) for _ in clips]
+    try:
+        with av.open(filename, metadata_errors="ignore") as container:
+            if container.streams.video:
+                stream = container.streams.video[0]
+                time_base = stream.time_base
+                if keyframe_index is not None and keyframe_index.time_base != time_base:
+                    raise ValueError(
+                        f"The keyframe index has a time base of {keyframe_index.time_base}, "
+                        f"but the stream has a time base of {time_base}"
+                    )
+                ranges = []
+                for start_pts, end_pts in clips:
+                    start_sec, end_sec, _ = _video_opt._convert_to_sec(start_pts, end_pts, pts_unit, time_base)
+                    ranges.append(_to_stream_pts(start_sec, end_sec, "sec", stream))
+
+                order = sorted(range(len(ranges)), key=lambda i: ranges[i])
+                decoded = _decode_video_ranges(container, [ranges[i] for i in order], keyframe_index)
+                for i, (vframes, _) in zip(order, decoded):
+                    if vframes is not None:
+                        result[i] = vframes
+    except av.AVError:
+        pass
+    return result
+
+
+# packets kept while looking for out-of-order timestamps, see _decode_video_timestamps
+_MAX_PENDING_PACKETS = 32
 
 
 def _decode_video_timestamps(container: "av.container.Container") -> List[int]:
-    if _can_read_timestamps_from_packets(container):
-        # fast path
-        return [x.pts for x in container.demux(video=0) if x.pts is not None]
+    stream = container.streams.video[0]
+    packets = (packet for packet in container.demux(stream) if packet.size > 0)
+    pts: List[int] = []
+    # the packets carry the timestamps of the frames, unless the codec reorders frames
+    # and the container stores the timestamps in decoding order, like B-frames in avi
+    # files. Stored presentation timestamps show by being out of order, so until then
+    # the packets are kept to be decoded
+    pending: Optional[List["av.packet.Packet"]] = [] if stream.codec_context.has_b_frames else None
+    max_pts = None
+    for packet in packets:
+        if pending is None:
+            if packet.pts is not None:
+                pts.append(packet.pts)
+            continue
+        pending.append(packet)
+        if packet.pts is None:
+            break
+        if max_pts is not None and packet.pts < max_pts:
+            pending = None
+        max_pts = packet.pts if max_pts is None else max(max_pts, packet.pts)
+        pts.append(packet.pts)
+        if pending is not None and len(pending) >= _MAX_PENDING_PACKETS:
+            # the timestamps are still in order past any reordering
+            break
     else:
-        return [x.pts for x in container.decode(video=0) if x.pts is not None]
+        if pending is None:
+            return pts
+
+    # slow path
+    pts = []
+    for packet in itertools.chain(pending, packets):
+        pts.extend(frame.pts for frame in stream.decode(packet) if frame.pts is not None)
+    pts.extend(frame.pts for frame in stream.decode(None) if frame.pts is not None)
+    return pts
 
 
 def read_video_timestamps(filename: str, pts_unit: str = "pts") -> Tuple[List[int], Optional[float]]:
     """
     List the video frames timestamps.
 
-    Note that the function decodes the whole video frame-by-frame.
+    The timestamps are read from the packets of the video stream without decoding them,
+    which works for the common containers and codecs. The whole video is only decoded
+    frame-by-frame if the codec reorders frames but the container stores the timestamps
+    in decoding order, as with B-frames in avi files.
 
     Args:
         filename (str): path to the video file
@@ -401,3 +1242,126 @@ def read_video_timestamps(filename: str, pts_unit: str = "pts") -> Tuple[List[in
         pts = [x * video_time_base for x in pts]
 
     return pts, video_fps
+
+
+def _keyframe_size(
+    frame: "av.video.frame.VideoFrame", size: Optional[Union[int, Tuple[int, int]]]
+) -> Tuple[int, int]:
+    if size is None:
+        return frame.height, frame.width
+    if isinstance(size, int):
+        scale = size / min(frame.height, frame.width)
+        return max(1, int(round(frame.height * scale))), max(1, int(round(frame.width * scale)))
+    return size[0], size[1]
+
+
+def _decode_keyframes(
+    container: "av.container.Container", stream: "av.stream.Stream"
+) -> Iterator["av.video.frame.VideoFrame"]:
+    # decodes the keyframe packets as they are demuxed, from the current position
+    for packet in container.demux(stream):
+        # the last, empty, packet flushes the frames delayed by the decoder
+        if packet.is_keyframe or packet.size == 0:
+            yield from stream.decode(packet)
+
+
+def read_keyframes(
+    filename: Union[str, bytes, torch.Tensor],
+    max_frames: Optional[int] = None,
+    size: Optional[Union[int, Tuple[int, int]]] = None,
+    pts_unit: str = "pts",
+) -> Tuple[torch.Tensor, List[Union[int, Fraction]]]:
+    """
+    Reads the keyframes of the video stream, e.g. to get thumbnails of a video.
+
+    Only the packets of the keyframes are decoded, with the decoder skipping all other
+    frames, which is roughly a GOP length faster than decoding the whole video. The frames
+    are decoded while the video is demuxed, or right after seeking to each of them with
+    ``max_frames``, and resized while they are converted to RGB, so that only the output
+    is held in memory.
+
+    Args:
+        filename (str, bytes or Tensor): path to the video file, or the encoded video as bytes
+            or as a 1-dimensional uint8 tensor
+        max_frames (int, optional): maximum number of keyframes to read. If the video has more
+            keyframes, ``max_frames`` keyframes evenly spread over the video are read.
+            Defaults to reading all keyframes.
+        size (int or Tuple[int, int], optional): size of the returned frames. If an int, the
+            shorter edge of the frames is resized to it, keeping the aspect ratio, otherwise
+            the frames are resized to ``(height, width)``. Defaults to the size of the video.
+        pts_unit (str, optional): unit in which timestamp values will be returned
+            either 'pts' or 'sec'. Defaults to 'pts'.
+
+    Returns:
+        vframes (Tensor[T, H, W, C]): the keyframes, in presentation order
+        pts (List[int] if pts_unit = 'pts', List[Fraction] if pts_unit = 'sec'):
+            presentation timestamps of the keyframes
+    """
+    if isinstance(filename, str) and not os.path.exists(filename):
+        raise RuntimeError(f'File not found: {filename}')
+
+    if max_frames is not None and max_frames < 1:
+        raise ValueError(f"max_frames should be positive, got {max_frames}")
+
+    _check_av_available()
+
+    vframes: Optional[torch.Tensor] = None
+    frame_pts: List[int] = []
+    seen_pts = set()
+    capacity = 16
+    time_base = None
+
+    def add_frame(frame: "av.video.frame.VideoFrame") -> None:
+        nonlocal vframes
+        if frame.pts is None or frame.pts in seen_pts:
+            # e.g. packets flagged as keyframes without a frame of their own
+            return
+        if vframes is None:
+            height, width = _keyframe_size(frame, size)
+            vframes = torch.empty((capacity, height, width, 3), dtype=torch.uint8)
+        elif len(frame_pts) == len(vframes):
+            grown = torch.empty((2 * len(vframes),) + vframes.shape[1:], dtype=torch.uint8)
+            grown[:len(vframes)] = vframes
+            vframes = grown
+        height, width = vframes.shape[1:3]
+        vframes[len(frame_pts)] = torch.from_numpy(frame.to_ndarray(width=width, height=height, format="rgb24"))
+        frame_pts.append(frame.pts)
+        seen_pts.add(frame.pts)
+
+    try:
+        with av.open(_av_input(filename), metadata_errors="ignore") as container:
+            if container.streams.video:
+                stream = container.streams.video[0]
+                time_base = stream.time_base
+                stream.codec_context.skip_frame = "NONKEY"
+                if max_frames is None:
+                    for frame in _decode_keyframes(container, stream):
+                        add_frame(frame)
+                else:
+                    keyframes = [packet.pts for packet in container.demux(stream) if packet.is_keyframe]
+                    keyframes = [pts for pts in keyframes if pts is not None]
+                    if max_frames < len(keyframes):
+                        indices = torch.linspace(0, len(keyframes) - 1, max_frames).round().long()
+                        keyframes = [keyframes[i] for i in indices.unique().tolist()]
+                    capacity = max(len(keyframes), 1)
+                    for keyframe in keyframes:
+                        # seeking flushes the decoder, which then only has to decode the keyframe
+                        container.seek(keyframe, any_frame=False, backward=True, stream=stream)
+                        for frame in _decode_keyframes(container, stream):
+                            if frame.pts is not None and frame.pts >= keyframe:
+                                add_frame(frame)
+                                break
+    except av.AVError:
+        pass
+
+    if vframes is None:
+        return torch.empty((0, 1, 1, 3), dtype=torch.uint8), []
+    vframes = vframes[:len(frame_pts)]
+    # keyframes are decoded in decoding order
+    order = sorted(range(len(frame_pts)), key=lambda i: frame_pts[i])
+    if order != list(range(len(order))):
+        vframes = vframes[order]
+    pts: List[Union[int, Fraction]] = [frame_pts[i] for i in order]
+    if pts_unit == "sec":
+        pts = [x * time_base for x in pts]
+    return vframes, pts
@@ -86,7 +86,28 @@ def _is_numpy_image(img: Any) -> bool:
     return img.ndim in {2, 3}
 
 
-def to_tensor(pic):
+def _hwc_to_chw(img: Tensor, dtype: torch.dtype, channels_last: bool) -> Tensor:
+    # Converts a HWC tensor to a new CHW tensor of the given dtype in a single pass.
+    # With channels_last, the memory of the output stays in the HWC layout.
+    if channels_last:
+        output = torch.empty(img.shape, dtype=dtype).permute((2, 0, 1))
+    else:
+        output = torch.empty((img.shape[2], img.shape[0], img.shape[1]), dtype=dtype)
+    return output.copy_(img.permute((2, 0, 1)))
+
+
+def _pil_to_hwc_tensor(pic: Any, dtype: Any) -> Tensor:
+    # The array interface of PIL images gives a read-only view on a single copy of
+    # the pixels. The returned tensor must only be read from.
+    npimg = np.asarray(pic, dtype)
+    if npimg.ndim == 2:
+        npimg = npimg[:, :, None]
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        return torch.from_numpy(npimg)
+
+
+def to_tensor(pic, channels_last: bool = False):
     """Convert a ``PIL Image`` or ``numpy.ndarray`` to tensor.
     This function does not support torchscript.
 
@@ -94,6 +115,9 @@ def to_tensor(pic):
 
     Args:
         pic (PIL Image or numpy.ndarray): Image to be converted to tensor.
+        channels_last (bool): If True, the returned (C x H x W) tensor keeps the
+            memory layout (H x W x C) of the input, i.e. it is a permuted view of
+            a contiguous HWC tensor, which saves a transposition. Default: False.
 
     Returns:
         Tensor: Converted image.
@@ -111,12 +135,14 @@ def to_tensor(pic):
         if pic.ndim == 2:
             pic = pic[:, :, None]
 
-        img = torch.from_numpy(pic.transpose((2, 0, 1))).contiguous()
+        img = torch.from_numpy(pic)
         # backward compatibility
         if isinstance(img, torch.ByteTensor):
-            return img.to(dtype=default_float_dtype).div(255)
+            return _hwc_to_chw(img, default_float_dtype, channels_last).div_(255)
+        elif channels_last:
+            return img.permute((2, 0, 1))
         else:
-            return img
+            return img.permute((2, 0, 1)).contiguous()
 
     if accimage is not None and isinstance(pic, accimage.Image):
         nppic = np.zeros([pic.channels, pic.height, pic.width], dtype=np.float32)
@@ -125,19 +151,15 @@ def to_tensor(pic):
 
     # handle PIL Image
     mode_to_nptype = {'I': np.int32, 'I;16': np.int16, 'F': np.float32}
-    img = torch.from_numpy(
-        np.array(pic, mode_to_nptype.get(pic.mode, np.uint8), copy=True)
-    )
-
-    if pic.mode == '1':
-        img = 255 * img
-    img = img.view(pic.size[1], pic.size[0], len(pic.getbands()))
-    # put it from HWC to CHW format
-    img = img.permute((2, 0, 1)).contiguous()
-    if isinstance(img, torch.ByteTensor):
-        return img.to(dtype=default_float_dtype).div(255)
-    else:
-        return img
+    img = _pil_to_hwc_tensor(pic, mode_to_nptype.get(pic.mode, np.uint8))
+
+    if img.dtype != torch.uint8:
+        return _hwc_to_chw(img, img.dtype, channels_last)
+    img = _hwc_to_chw(img, default_float_dtype, channels_last)
+    # The pixels of mode '1' images are already 0 or 1
+    if pic.mode != '1':
+        img.div_(255)
+    return img
 
 
 def pil_to_tensor(pic):
@@ -164,7 +186,7 @@ def pil_to_tensor(pic):
     # handle PIL Image
     img = torch.as_tensor(np.asarray(pic))
     img = img.view(pic.size[1], pic.size[0], len(pic.getbands()))
-    # put it from HWC to CHW format
+    # put it from HWC to CHW format, the returned tensor is a view of the HWC tensor
     img = img.permute((2, 0, 1))
     return img
 
@@ -240,9 +262,17 @@ def to_pil_image(pic, mode=None):
 
     npimg = pic
     if isinstance(pic, torch.Tensor):
+        pic = pic.cpu()
+        dtype = pic.dtype
         if pic.is_floating_point() and mode != 'F':
-            pic = pic.mul(255).byte()
-        npimg = np.transpose(pic.cpu().numpy(), (1, 2, 0))
+            pic = pic.mul(255)
+            dtype = torch.uint8
+        hwc = pic.permute((1, 2, 0))
+        if hwc.dtype != dtype or not hwc.is_contiguous():
+            # Convert the dtype and the layout in a single copy. Channels last
+            # tensors of the right dtype are used without being copied.
+            hwc = torch.empty(hwc.shape, dtype=dtype).copy_(hwc)
+        npimg = hwc.numpy()
 
     if not isinstance(npimg, np.ndarray):
         raise TypeError('Input pic must be a torch.Tensor or NumPy ndarray, ' +
@@ -84,8 +84,15 @@ class ToTensor:
         transforming target image masks. See the `references`_ for implementing the transforms for image masks.
 
     .. _references: https://github.com/pytorch/vision/tree/master/references/segmentation
+
+    Args:
+        channels_last (bool): If True, the returned (C x H x W) tensor keeps the (H x W x C)
+            memory layout of the input, which saves a transposition. Default: False.
     """
 
+    def __init__(self, channels_last=False):
+        self.channels_last = channels_last
+
     def __call__(self, pic):
         """
         Args:
@@ -94,16 +101,22 @@ class ToTensor:
         Returns:
             Tensor: Converted image.
         """
-        return F.to_tensor(pic)
+        return F.to_tensor(pic, self.channels_last)
 
     def __repr__(self):
-        return self.__class__.__name__ + '()'
+        format_string = self.__class__.__name__ + '('
+        if self.channels_last:
+            format_string += 'channels_last=True'
+        format_string += ')'
+        return format_string
 
 
 class PILToTensor:
     """Convert a ``PIL Image`` to a tensor of the same type. This transform does not support torchscript.
 
-    Converts a PIL Image (H x W x C) to a Tensor of shape (C x H x W).
+    Converts a PIL Image (H x W x C) to a Tensor of shape (C x H x W). The pixels are copied
+    once, and the returned tensor is a permuted view of them, i.e. it is in the channels last
+    memory layout.
     """
 
     def __call__(self, pic):
@@ -152,6 +165,9 @@ class ToPILImage:
 
     Converts a torch.*Tensor of shape C x H x W or a numpy ndarray of shape
     H x W x C to a PIL Image while preserving the value range.
+    Tensors whose memory is in the H x W x C layout (e.g. obtained with
+    ``ToTensor(channels_last=True)`` or ``PILToTensor``) are converted without
+    being transposed.
 
     Args:
         mode (`PIL.Image mode`_): color space and pixel depth of input data (optional).
@@ -857,37 +873,7 @@ class RandomResizedCrop(torch.nn.Module):
             sized crop.
         """
         width, height = F._get_image_size(img)
-        area = height * width
-
-        log_ratio = torch.log(torch.tensor(ratio))
-        for _ in range(10):
-            target_area = area * torch.empty(1).uniform_(scale[0], scale[1]).item()
-            aspect_ratio = torch.exp(
-                torch.empty(1).uniform_(log_ratio[0], log_ratio[1])
-            ).item()
-
-            w = int(round(math.sqrt(target_area * aspect_ratio)))
-            h = int(round(math.sqrt(target_area / aspect_ratio)))
-
-            if 0 < w <= width and 0 < h <= height:
-                i = torch.randint(0, height - h + 1, size=(1,)).item()
-                j = torch.randint(0, width - w + 1, size=(1,)).item()
-                return i, j, h, w
-
-        # Fallback to central crop
-        in_ratio = float(width) / float(height)
-        if in_ratio < min(ratio):
-            w = width
-            h = int(round(w / min(ratio)))
-        elif in_ratio > max(ratio):
-            h = height
-            w = int(round(h * max(ratio)))
-        else:  # whole image
-            w = width
-            h = height
-        i = (height - h) // 2
-        j = (width - w) // 2
-        return i, j, h, w
+        return _get_resized_crop_params(height, width, scale, ratio)
 
     def forward(self, img):
         """
@@ -1951,3 +1937,41 @@ class RandomEqualize(torch.nn.Module):
 
     def __repr__(self):
         return self.__class__.__name__ + '(p={})'.format(self.p)
+
+
+def _get_resized_crop_params(
+        height: int, width: int, scale: List[float], ratio: List[float]
+) -> Tuple[int, int, int, int]:
+    # Same as RandomResizedCrop.get_params, for an image of the given size. This
+    # allows to sample the crop before decoding the image.
+    area = height * width
+
+    log_ratio = torch.log(torch.tensor(ratio))
+    for _ in range(10):
+        target_area = area * torch.empty(1).uniform_(scale[0], scale[1]).item()
+        aspect_ratio = torch.exp(
+            torch.empty(1).uniform_(log_ratio[0], log_ratio[1])
+        ).item()
+
+        w = int(round(math.sqrt(target_area * aspect_ratio)))
+        h = int(round(math.sqrt(target_area / aspect_ratio)))
+
+        if 0 < w <= width and 0 < h <= height:
+            i = torch.randint(0, height - h + 1, size=(1,)).item()
+            j = torch.randint(0, width - w + 1, size=(1,)).item()
+            return i, j, h, w
+
+    # Fallback to central crop
+    in_ratio = float(width) / float(height)
+    if in_ratio < min(ratio):
+        w = width
+        h = int(round(w / min(ratio)))
+    elif in_ratio > max(ratio):
+        h = height
+        w = int(round(h * max(ratio)))
+    else:  # whole image
+        w = width
+        h = height
+    i = (height - h) // 2
+    j = (width - w) // 2
+    return i, j, h, w